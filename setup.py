@@ -33,6 +33,9 @@ setup(
             "pytest>=6.0",
             "pytest-cov>=2.0",
         ],
+        "hdf5": [
+            "h5py>=2.10",
+        ],
         "docs": [
             "sphinx>=3.0",
             "sphinx-rtd-theme>=0.5",
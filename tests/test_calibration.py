@@ -13,7 +13,8 @@ from typing import Tuple
 
 from xtc1reader.calibration import (
     CalibrationConstants, DetectorCalibrator, CalibrationManager,
-    CommonModeCorrection, create_default_calibration, calibrate_detector_data
+    CommonModeCorrection, create_default_calibration, calibrate_detector_data,
+    calibrate_detector_events, build_region_layout, _segmented_common_mode, _select_median
 )
 
 
@@ -99,6 +100,49 @@ def test_common_mode_correction():
     print("✓ Common mode correction")
 
 
+def test_select_median():
+    """Test the partial-sort median against np.median"""
+    print("Testing partial-sort median...")
+    
+    for values in (np.array([30000, 30002], dtype=np.int16),
+                   np.array([65535, 65533, 1], dtype=np.uint16),
+                   np.array([4, 1, 3, 2], dtype=np.uint8),
+                   np.random.default_rng(0).normal(size=101)):
+        assert _select_median(values) == np.median(values), values
+    
+    print("✓ Partial-sort median")
+
+
+def test_segmented_common_mode():
+    """Test the all-regions-at-once common mode used by calibrate_gpu()"""
+    print("Testing segmented common mode...")
+    
+    rng = np.random.default_rng(3)
+    data = rng.normal(0.0, 5.0, (40, 60))
+    regions = (np.arange(40 * 60).reshape(40, 60) // 150).astype(np.uint8)
+    regions[:, :3] = 0                 # region 0 is never corrected
+    regions[39, 50:55] = 200           # region with fewer than 10 pixels
+    data += regions * 10.0             # a different offset per region
+    data[5, 5] = 1e4                   # outlier rejected from its estimate
+    
+    # Same layout arrays as DetectorCalibrator._device_constants()
+    layout = build_region_layout(regions)
+    counts = np.diff(layout.offsets)
+    segment = np.repeat(np.arange(len(counts)), counts)
+    layout_arrays = (layout.region_ids, layout.offsets, counts, segment)
+    values = data.ravel()[layout.order]
+    
+    for algorithm, reference in (("median", CommonModeCorrection.median_subtraction),
+                                 ("mean", CommonModeCorrection.mean_subtraction)):
+        shifts = _segmented_common_mode(np, values, layout_arrays, 3.0, algorithm)
+        corrected = data.copy()
+        corrected.flat[layout.order] -= shifts[segment]
+        expected = reference(data, regions, threshold=3.0)
+        assert np.allclose(corrected, expected), algorithm
+    
+    print("✓ Segmented common mode")
+
+
 def test_detector_calibrator():
     """Test DetectorCalibrator class"""
     print("Testing DetectorCalibrator...")
@@ -155,6 +199,12 @@ def test_detector_calibrator():
     assert np.isnan(fully_calibrated[10, 10])
     assert np.isnan(fully_calibrated[20, 20])
     
+    # Fused float32 path should match the step-by-step pipeline
+    out = np.empty(shape, dtype=np.float32)
+    fast = calibrator.calibrate_fast(raw_data, out=out)
+    assert fast is out
+    assert np.allclose(fast, fully_calibrated, atol=1e-2, equal_nan=True)
+    
     # Test selective application
     no_cm = calibrator.calibrate(raw_data, apply_common_mode=False)
     no_mask = calibrator.calibrate(raw_data, apply_pixel_mask=False)
@@ -236,6 +286,30 @@ def test_calibration_manager():
     print("✓ CalibrationManager")
 
 
+def test_load_data_file_formats():
+    """Test .data loading of npy, text and raw float32 files"""
+    print("Testing calibration file formats...")
+    
+    manager = CalibrationManager()
+    values = np.arange(6, dtype=np.float32).reshape(2, 3)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = Path(temp_dir) / "run_0001.data"
+        
+        np.savetxt(data_file, values)
+        assert np.array_equal(manager._load_data_file(data_file), values)
+        
+        # Raw float32 whose leading bytes happen to be printable text
+        raw = np.frombuffer(b'1234 678' + values.tobytes(), dtype=np.float32)
+        raw.tofile(data_file)
+        assert np.array_equal(manager._load_data_file(data_file), raw)
+        
+        np.save(str(data_file), values)  # writes run_0001.data.npy
+        assert np.array_equal(manager._load_data_file(data_file), values)
+    
+    print("✓ Calibration file formats")
+
+
 def test_default_calibration():
     """Test default calibration creation"""
     print("Testing default calibration...")
@@ -308,6 +382,78 @@ def test_convenience_function():
     print("✓ Convenience function")
 
 
+def test_convenience_function_caches_constants():
+    """Test that repeated calibrate_detector_data calls load constants once"""
+    print("Testing convenience function caching...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        calib_dir = Path(temp_dir) / "calibration"
+        pedestals_dir = calib_dir / "test_detector" / "pedestals"
+        pedestals_dir.mkdir(parents=True)
+        np.save(str(pedestals_dir / "run_0007.data"), np.full((30, 40), 50.0))
+        
+        loads = []
+        original_load = CalibrationManager._load_from_directory
+        
+        def counting_load(self, detector_name, run_number):
+            loads.append((detector_name, run_number))
+            return original_load(self, detector_name, run_number)
+        
+        CalibrationManager._load_from_directory = counting_load
+        try:
+            data = np.full((30, 40), 150.0)
+            for _ in range(3):
+                calibrated = calibrate_detector_data(data, "test_detector", 7,
+                                                     calibration_dir=calib_dir)
+                assert np.allclose(calibrated, 100.0)
+            # str and Path spellings of the directory share one manager
+            calibrate_detector_data(data, "test_detector", 7, calibration_dir=str(calib_dir))
+        finally:
+            CalibrationManager._load_from_directory = original_load
+        
+        assert loads == [("test_detector", 7)]
+    
+    print("✓ Convenience function caching")
+
+
+def test_calibrate_many():
+    """Test that batch calibration matches per-frame calibrate()"""
+    print("Testing batch calibration...")
+    
+    shape = (30, 40)
+    constants = create_default_calibration("test_detector", shape, 9)
+    calibrator = DetectorCalibrator(constants)
+    
+    # Distinct frames, so any reordering of the results is caught
+    frames = np.random.normal(1050, 15, (6,) + shape)
+    frames += np.arange(6)[:, None, None] * 100
+    
+    for kwargs in ({}, {"common_mode_algorithm": "mean"}, {"apply_common_mode": False}):
+        expected = [calibrator.calibrate(frame, **kwargs) for frame in frames]
+        batch = calibrator.calibrate_many(frames, max_workers=3, **kwargs)
+        assert len(batch) == len(expected)
+        for got, want in zip(batch, expected):
+            assert np.array_equal(got, want, equal_nan=True)
+    
+    # calibrate_detector_events with the same constants saved to disk
+    with tempfile.TemporaryDirectory() as temp_dir:
+        calib_dir = Path(temp_dir) / "calibration"
+        for kind in ("pedestals", "pixel_status", "common_mode"):
+            kind_dir = calib_dir / "test_detector" / kind
+            kind_dir.mkdir(parents=True)
+            np.save(str(kind_dir / "run_0009.data"), getattr(constants, kind))
+    
+        events = calibrate_detector_events(list(frames), "test_detector", 9,
+                                           calibration_dir=calib_dir, max_workers=3)
+        assert len(events) == len(frames)
+        for got, frame in zip(events, frames):
+            assert np.array_equal(got, calibrator.calibrate(frame), equal_nan=True)
+    
+    assert calibrate_detector_events([], "test_detector", 9) == []
+    
+    print("✓ Batch calibration")
+
+
 def test_edge_cases():
     """Test edge cases and error conditions"""
     print("Testing edge cases...")
@@ -453,10 +599,15 @@ def run_all_calibration_tests():
     try:
         test_calibration_constants()
         test_common_mode_correction()
+        test_select_median()
+        test_segmented_common_mode()
         test_detector_calibrator()
         test_calibration_manager()
+        test_load_data_file_formats()
         test_default_calibration()
         test_convenience_function()
+        test_convenience_function_caches_constants()
+        test_calibrate_many()
         test_edge_cases()
         test_realistic_scenario()
         
@@ -9,11 +9,12 @@ import sys
 import tempfile
 import struct
 from xtc1reader.binary_format import (
-    parse_datagram_header, parse_xtc_header, ClockTime, TimeStamp, 
-    Sequence, Env, Damage, Src, TypeIdInfo, XTCContainer, TypeId
+    parse_datagram_header, parse_xtc_header, parse_xtc_payload, ClockTime,
+    TimeStamp, Sequence, Env, Damage, Src, TypeIdInfo, XTCContainer, TypeId
 )
-from xtc1reader.xtc_reader import XTCReader, XTCIterator
+from xtc1reader.xtc_reader import XTCReader, XTCIterator, walk_xtc_tree_iter
 from xtc1reader.data_types import parse_detector_data, is_image_type
+from xtc1reader.output_writers import StackedNpyWriter
 
 
 def test_binary_parsing():
@@ -110,6 +111,84 @@ def test_xtc_header():
     print("✓ XTC header parsing")
 
 
+def test_xtc_payload_table():
+    """Test bulk parsing of sibling XTC headers"""
+    print("Testing XTC payload table parsing...")
+    
+    # Two siblings: one with an 8-byte payload, one header-only
+    payload = (struct.pack('<5I', 0, 0x01000000, 0x11, TypeId.Id_Frame, 28) +
+               b'\x00' * 8 +
+               struct.pack('<5I', 0, 0x01000000, 0x22, TypeId.Id_EvrConfig, 20))
+    
+    table, consumed = parse_xtc_payload(payload)
+    
+    assert consumed == len(payload)
+    assert len(table) == 2
+    assert list(table.offsets) == [0, 28]
+    assert list(table.type_ids) == [TypeId.Id_Frame, TypeId.Id_EvrConfig]
+    assert table[1] == parse_xtc_header(payload, 28)
+    assert [xtc.src.phy for xtc in table] == [0x11, 0x22]
+    
+    print("✓ XTC payload table parsing")
+
+
+def test_walk_xtc_tree_type_filter():
+    """Test type-filtered tree walking through nested Id_Xtc containers"""
+    print("Testing filtered XTC tree walk...")
+    
+    # Id_Xtc(Id_Frame, Id_EvrConfig) followed by a top-level Id_Frame
+    frame_a = struct.pack('<5I', 0, 0x01000000, 0x11, TypeId.Id_Frame, 24) + b'AAAA'
+    evr = struct.pack('<5I', 0, 0x01000000, 0x22, TypeId.Id_EvrConfig, 20)
+    parent = struct.pack('<5I', 0, 0x01000000, 0x33, TypeId.Id_Xtc,
+                         20 + len(frame_a) + len(evr)) + frame_a + evr
+    frame_b = struct.pack('<5I', 0, 0x01000000, 0x44, TypeId.Id_Frame, 28) + b'BBBBBBBB'
+    payload = parent + frame_b
+    
+    everything = list(walk_xtc_tree_iter(payload))
+    assert [xtc.contains.type_id for xtc, _ in everything] == [
+        TypeId.Id_Xtc, TypeId.Id_Frame, TypeId.Id_EvrConfig, TypeId.Id_Frame]
+    
+    frames = list(walk_xtc_tree_iter(payload, type_filter={TypeId.Id_Frame}))
+    assert [xtc.src.phy for xtc, _ in frames] == [0x11, 0x44]
+    assert [data for _, data in frames] == [b'AAAA', b'BBBBBBBB']
+    
+    # The Id_Xtc parent is only yielded when asked for
+    parents = list(walk_xtc_tree_iter(payload, type_filter=[TypeId.Id_Xtc]))
+    assert [xtc.src.phy for xtc, _ in parents] == [0x33]
+    
+    print("✓ Filtered XTC tree walk")
+
+
+def test_walk_xtc_tree_zero_extent():
+    """Test that a zero-extent XTC header ends the tree walk"""
+    print("Testing zero-extent XTC header...")
+    
+    import io
+    from contextlib import redirect_stdout
+    from xtc1reader.xtc_reader import walk_xtc_tree
+    
+    frame = struct.pack('<5I', 0, 0x01000000, 0x11, TypeId.Id_Frame, 24) + b'AAAA'
+    broken = struct.pack('<5I', 0, 0x01000000, 0x22, TypeId.Id_Frame, 0) + b'\x00' * 8
+    
+    output = io.StringIO()
+    with redirect_stdout(output):
+        walked = walk_xtc_tree(frame + broken)
+        lazily = list(walk_xtc_tree_iter(frame + broken))
+    assert [(level, xtc.src.phy, data) for level, xtc, data in walked] == [(0, 0x11, b'AAAA')]
+    assert [(xtc.src.phy, data) for xtc, data in lazily] == [(0x11, b'AAAA')]
+    assert "XTC extent 0 smaller than header at offset 24" in output.getvalue()
+    assert "exceeds payload" not in output.getvalue()
+    
+    # Inside an Id_Xtc container only that container's children are cut short
+    parent = struct.pack('<5I', 0, 0x01000000, 0x33, TypeId.Id_Xtc,
+                         20 + len(broken) + len(frame)) + broken + frame
+    with redirect_stdout(io.StringIO()):
+        walked = walk_xtc_tree(parent + frame)
+    assert [(level, xtc.src.phy) for level, xtc, _ in walked] == [(0, 0x33), (0, 0x11)]
+    
+    print("✓ Zero-extent XTC header")
+
+
 def create_test_xtc_file() -> str:
     """Create a minimal test XTC file for testing"""
     print("Creating test XTC file...")
@@ -155,6 +234,33 @@ def create_test_xtc_file() -> str:
         raise
 
 
+def create_test_image_xtc_file(n_events: int = 20) -> str:
+    """Create a test XTC file with one 3x4 Id_Frame image per event"""
+    fd, filename = tempfile.mkstemp(suffix='.xtc')
+    
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for event in range(n_events):
+                # Frame payload: width, height, depth, offset + 16-bit pixels
+                pixels = struct.pack('<12H', *range(event, event + 12))
+                frame = (struct.pack('<5I', 0, 0x01000000, 0x12345678, TypeId.Id_Frame,
+                                     20 + 16 + len(pixels)) +
+                         struct.pack('<4I', 4, 3, 16, 0) + pixels)
+    
+                # Datagram header, then the rest of its Id_Xtc container
+                f.write(struct.pack('<6I', 0, 1234567890 + event, 0x123456, 0x9ABC + event,
+                                    0x87654321, 0))
+                f.write(struct.pack('<4I', 0x01000000, 0x12345678, TypeId.Id_Xtc,
+                                    20 + len(frame)))
+                f.write(frame)
+    
+        return filename
+    
+    except Exception as e:
+        os.unlink(filename)
+        raise
+
+
 def test_file_reading():
     """Test XTC file reading"""
     print("Testing XTC file reading...")
@@ -190,6 +296,36 @@ def test_file_reading():
         os.unlink(test_file)
 
 
+def test_mmap_reading():
+    """Test that memory-mapped reading matches buffered reading"""
+    print("Testing memory-mapped reading...")
+    
+    import numpy as np
+    from xtc1reader.xtc_reader import parse_from_mmap
+    
+    test_file = create_test_image_xtc_file(5)
+    
+    try:
+        with XTCReader(test_file) as reader:
+            expected = list(reader)
+    
+        mapped = [(dgram, bytes(payload)) for dgram, payload in parse_from_mmap(test_file)]
+        assert mapped == expected
+        print("✓ parse_from_mmap")
+    
+        for dgram, payload in expected:
+            # The frame container follows the 16-byte datagram XTC remainder
+            xtc = parse_xtc_header(payload, 16)
+            data = payload[36:36 + xtc.payload_size]
+            for dtype in ('<u2', '<u4', np.uint8):
+                view = xtc.payload_view(payload, 16, dtype)
+                assert np.array_equal(view, np.frombuffer(data, dtype=dtype))
+                assert view.dtype == np.dtype(dtype)
+        print("✓ XTCContainer.payload_view")
+    finally:
+        os.unlink(test_file)
+
+
 def test_data_type_parsing():
     """Test detector data type parsing"""
     print("Testing data type parsing...")
@@ -204,6 +340,212 @@ def test_data_type_parsing():
     # Could add more specific tests with real detector data formats
     
 
+def test_stacked_writer():
+    """Test stacked .npy output for extracted images"""
+    print("Testing stacked image writer...")
+    
+    import numpy as np
+    
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Capacity 2 forces the stack to grow while writing 5 frames
+        writer = StackedNpyWriter(output_dir, capacity=2)
+        for event in range(5):
+            writer.write(event, "camera_v1_raw", np.full((3, 4), event, dtype=np.uint16))
+        outputs = writer.close()
+        
+        stack_file = os.path.join(output_dir, "camera_v1_raw.npy")
+        assert outputs == [(stack_file, (5, 3, 4))]
+        
+        stack = np.load(stack_file)
+        assert stack.shape == (5, 3, 4)
+        assert stack.dtype == np.uint16
+        assert list(stack[:, 0, 0]) == [0, 1, 2, 3, 4]
+        
+        events = np.load(os.path.join(output_dir, "camera_v1_raw.events.npy"))
+        assert list(events) == [0, 1, 2, 3, 4]
+    
+    print("✓ Stacked image writer")
+
+
+def test_npy_event_writer_masks():
+    """Test that per-event .npy output saves one mask per image key"""
+    print("Testing per-event writer masks...")
+    
+    import numpy as np
+    from xtc1reader.output_writers import NpyEventWriter
+    
+    with tempfile.TemporaryDirectory() as output_dir:
+        mask = np.ones((3, 4), dtype=bool)
+        mask[0, 0] = False
+    
+        writer = NpyEventWriter(output_dir)
+        for event in range(3):
+            writer.write(event, "epix10ka2m_v1_psana", np.full((3, 4), event, dtype=np.float32),
+                         mask=mask)
+            writer.write(event, "epix10ka2m_v1_raw", np.zeros((2, 3, 4), dtype=np.uint16))
+        outputs = writer.close()
+    
+        assert len(outputs) == 6
+        mask_files = sorted(f for f in os.listdir(output_dir) if f.endswith(".mask.npy"))
+        assert mask_files == ["epix10ka2m_v1_psana.mask.npy"]
+        assert np.array_equal(np.load(os.path.join(output_dir, mask_files[0])), mask)
+    
+        # Writers sharing mask_keys (one per worker batch) save it only once
+        os.unlink(os.path.join(output_dir, mask_files[0]))
+        mask_keys = set()
+        first = NpyEventWriter(output_dir, mask_keys=mask_keys)
+        first.write(3, "epix10ka2m_v1_psana", np.zeros((3, 4), dtype=np.float32), mask=mask)
+        first.close()
+        assert mask_keys == {"epix10ka2m_v1_psana"}
+        os.unlink(os.path.join(output_dir, mask_files[0]))
+        second = NpyEventWriter(output_dir, mask_keys=mask_keys)
+        second.write(4, "epix10ka2m_v1_psana", np.zeros((3, 4), dtype=np.float32), mask=mask)
+        second.close()
+        assert not any(f.endswith(".mask.npy") for f in os.listdir(output_dir))
+    
+    print("✓ Per-event writer masks")
+
+
+def test_hdf5_writer():
+    """Test HDF5 output for extracted images"""
+    import pytest
+    h5py = pytest.importorskip('h5py')
+    print("Testing HDF5 image writer...")
+    
+    import numpy as np
+    from xtc1reader.output_writers import Hdf5Writer
+    
+    with tempfile.TemporaryDirectory() as output_dir:
+        mask = np.ones((3, 4), dtype=bool)
+        mask[0, 0] = False
+    
+        # Capacity 2 forces the dataset to grow (2 -> 4 -> 8) and be trimmed to 5
+        writer = Hdf5Writer(output_dir, capacity=2)
+        for event in range(5):
+            writer.write(10 + event, "camera_v1_raw",
+                         np.full((3, 4), event, dtype=np.uint16), mask=mask)
+        outputs = writer.close()
+    
+        h5_file = os.path.join(output_dir, "extracted.h5")
+        assert outputs == [(f"{h5_file}:camera_v1_raw", (5, 3, 4))]
+    
+        with h5py.File(h5_file, 'r') as f:
+            stack = f["camera_v1_raw"][()]
+            assert stack.shape == (5, 3, 4)
+            assert stack.dtype == np.uint16
+            assert list(stack[:, 0, 0]) == [0, 1, 2, 3, 4]
+            assert list(f["camera_v1_raw_events"][()]) == [10, 11, 12, 13, 14]
+            assert np.array_equal(f["camera_v1_raw_mask"][()], mask)
+    
+    print("✓ HDF5 image writer")
+
+
+def test_batch_command():
+    """Test the batch CLI command with valid and malformed scripts"""
+    print("Testing batch command...")
+    
+    import io
+    import json
+    from contextlib import redirect_stdout
+    from xtc1reader import cli
+    from xtc1reader.cli import main
+    
+    test_file = create_test_xtc_file()
+    
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            script_file = os.path.join(temp_dir, "script.json")
+            
+            def run_batch(script):
+                with open(script_file, 'w') as f:
+                    json.dump(script, f)
+                output = io.StringIO()
+                with redirect_stdout(output):
+                    result = main(['batch', test_file, script_file])
+                return result, output.getvalue()
+            
+            result, output = run_batch([{"command": "info"},
+                                        {"command": "dump", "max_events": 1}])
+            assert result == 0
+            assert "Events analyzed: 1" in output
+            assert "Event 0:" in output
+            
+            # Not a list of step objects: an error, not a traceback
+            for script in ({"command": "info"}, ["info"], [{"command": "info"}, 1]):
+                result, output = run_batch(script)
+                assert result == 1, script
+                assert "expected a JSON" in output
+            
+            result, output = run_batch([{"command": "nope"}])
+            assert result == 1
+            assert "Unknown batch command" in output
+            
+            result, output = run_batch([{"command": "info", "max_event": 5}])
+            assert result == 1
+            assert "Invalid options for info in step 0" in output
+            
+            # A TypeError from inside a command is not reported as bad options
+            def broken_info(filename, max_events=100, reader=None):
+                raise TypeError("bug inside the command")
+            
+            original_info = cli._BATCH_COMMANDS["info"]
+            cli._BATCH_COMMANDS["info"] = broken_info
+            try:
+                run_batch([{"command": "info"}])
+                assert False, "TypeError was swallowed"
+            except TypeError as e:
+                assert str(e) == "bug inside the command"
+            finally:
+                cli._BATCH_COMMANDS["info"] = original_info
+    finally:
+        os.unlink(test_file)
+    
+    print("✓ Batch command")
+
+
+def test_parallel_extract():
+    """Test that extract --jobs and read_datagram match the serial path"""
+    print("Testing parallel extraction...")
+    
+    import io
+    from contextlib import redirect_stdout
+    from xtc1reader.cli import main
+    
+    # More events than one worker batch (_PARALLEL_TASK_EVENTS)
+    test_file = create_test_image_xtc_file(20)
+    
+    try:
+        with XTCReader(test_file) as reader:
+            events = list(reader)
+            offsets = reader.datagram_offsets()
+            assert len(offsets) == len(events) == 20
+            for offset, (dgram, payload) in zip(offsets, events):
+                assert reader.read_datagram(offset) == (dgram, payload)
+    
+        print("✓ Random access by offset")
+    
+        with tempfile.TemporaryDirectory() as temp_dir:
+            serial_dir = os.path.join(temp_dir, "serial")
+            parallel_dir = os.path.join(temp_dir, "parallel")
+            with redirect_stdout(io.StringIO()):
+                assert main(['extract', test_file, '--output-dir', serial_dir]) == 0
+                assert main(['extract', test_file, '--output-dir', parallel_dir,
+                             '--jobs', '2']) == 0
+    
+            serial_files = sorted(os.listdir(serial_dir))
+            assert len(serial_files) == 20
+            assert sorted(os.listdir(parallel_dir)) == serial_files
+            for name in serial_files:
+                with open(os.path.join(serial_dir, name), 'rb') as f:
+                    serial_bytes = f.read()
+                with open(os.path.join(parallel_dir, name), 'rb') as f:
+                    assert f.read() == serial_bytes, name
+    finally:
+        os.unlink(test_file)
+
+    print("✓ Parallel extraction")
+
+
 def run_all_tests():
     """Run all tests"""
     print("Running XTC reader tests...\n")
@@ -212,8 +554,16 @@ def run_all_tests():
         test_binary_parsing()
         test_datagram_header()
         test_xtc_header()
+        test_xtc_payload_table()
+        test_walk_xtc_tree_type_filter()
+        test_walk_xtc_tree_zero_extent()
         test_file_reading()
+        test_mmap_reading()
         test_data_type_parsing()
+        test_stacked_writer()
+        test_npy_event_writer_masks()
+        test_batch_command()
+        test_parallel_extract()
         
         print("\n✅ All tests passed!")
         return True
@@ -13,6 +13,7 @@ Usage:
 
 import argparse
 import os
+import re
 import sys
 import numpy as np
 import matplotlib.pyplot as plt
@@ -21,20 +22,29 @@ import glob
 from pathlib import Path
 from typing import Optional, Tuple, List
 
+# Suffix of the boolean validity mask saved per image key (<key>.mask.npy),
+# or by older extractions next to each assembled image
+MASK_SUFFIX = '.mask.npy'
 
-def smart_scaling(image: np.ndarray, method: str = 'mean_std') -> Tuple[float, float]:
+# Per-event image files written by the npy output format
+EVENT_FILE_PATTERN = re.compile(r'^event_\d+_(.+)$')
+
+
+def smart_scaling(image: np.ndarray, method: str = 'mean_std',
+                  mask: Optional[np.ndarray] = None) -> Tuple[float, float]:
     """
     Calculate smart intensity scaling for detector images.
     
     Args:
         image: 2D detector image array
         method: Scaling method ('mean_std', 'percentile', 'minmax')
+        mask: Precomputed validity mask (computed as image > 0 if None)
         
     Returns:
         (vmin, vmax) intensity range for display
     """
     # Mask out zero/invalid pixels
-    valid_pixels = image[image > 0]
+    valid_pixels = image[valid_mask(image, mask)]
     
     if len(valid_pixels) == 0:
         return 0, 1
@@ -62,20 +72,101 @@ def smart_scaling(image: np.ndarray, method: str = 'mean_std') -> Tuple[float, f
     return float(vmin), float(vmax)
 
 
+def valid_mask(image: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Return the validity mask for an image, computing image > 0 only if needed."""
+    if mask is not None and mask.shape == image.shape:
+        return mask
+    return image > 0
+
+
+def mask_path_for(filepath: str) -> str:
+    """
+    Path of the validity mask for an image file: a mask saved next to the
+    image itself if there is one, else the <key>.mask.npy shared by all
+    event_NNNN_<key>.npy files of one image key.
+    """
+    base, _ = os.path.splitext(filepath)
+    if os.path.exists(base + MASK_SUFFIX):
+        return base + MASK_SUFFIX
+    match = EVENT_FILE_PATTERN.match(os.path.basename(base))
+    if match:
+        return os.path.join(os.path.dirname(filepath), match.group(1) + MASK_SUFFIX)
+    return base + MASK_SUFFIX
+
+
+def stack_scaling(images: List[np.ndarray], masks: List[np.ndarray],
+                  method: str = 'mean_std') -> Tuple[float, float]:
+    """
+    Calculate a shared intensity range for a set of images.
+    
+    For 'mean_std' scaling of same-shape images the per-image sums are
+    reduced over a single (N, H, W) stack instead of concatenating the
+    valid pixels of every image.
+    
+    Args:
+        images: List of 2D detector images
+        masks: Validity masks matching images
+        method: Scaling method ('mean_std', 'percentile', 'minmax')
+        
+    Returns:
+        (vmin, vmax) intensity range shared by all images
+    """
+    same_shape = len({img.shape for img in images}) == 1
+    
+    if method == 'mean_std' and same_shape:
+        arr = np.stack(images).astype(np.float64, copy=False)
+        mask = np.stack(masks)
+        
+        counts = mask.sum(axis=(1, 2))
+        sums = np.where(mask, arr, 0).sum(axis=(1, 2))
+        sqs = np.where(mask, arr * arr, 0).sum(axis=(1, 2))
+        
+        total = counts.sum()
+        if total == 0:
+            return 0, 1
+        
+        mean_val = sums.sum() / total
+        std_val = np.sqrt(max(sqs.sum() / total - mean_val * mean_val, 0.0))
+        return float(mean_val), float(mean_val + 4 * std_val)
+    
+    all_pixels = np.concatenate([img[mask] for img, mask in zip(images, masks)])
+    if len(all_pixels) == 0:
+        return 0, 1
+    return smart_scaling(all_pixels.reshape(-1, 1), method)
+
+
 def find_image_files(directory: str, pattern: str = "*.npy") -> List[str]:
     """Find all .npy image files in directory matching pattern."""
     search_path = os.path.join(directory, pattern)
-    files = glob.glob(search_path)
+    files = [f for f in glob.glob(search_path) if not f.endswith(MASK_SUFFIX)]
     return sorted(files)
 
 
-def load_and_validate_image(filepath: str) -> Optional[np.ndarray]:
-    """Load image file and validate/convert to 2D array."""
+def load_image_mask(filepath: str) -> Optional[np.ndarray]:
+    """Memory-map the validity mask for an image (see mask_path_for), if one was saved."""
+    mask_file = mask_path_for(filepath)
+    if not os.path.exists(mask_file):
+        return None
+    try:
+        return np.load(mask_file, mmap_mode='r')
+    except Exception as e:
+        print(f"Warning: could not load mask {mask_file}: {e}")
+        return None
+
+
+def load_and_validate_image(filepath: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Load image file and validate/convert to 2D array.
+    
+    Returns:
+        (image, mask) where mask is the precomputed validity mask saved
+        alongside the image, or None if unavailable
+    """
     try:
         image = np.load(filepath)
         
         if image.ndim == 2:
-            return image
+            return image, load_image_mask(filepath)
         elif image.ndim == 3:
             # Handle raw detector frames (e.g., 16x352x384) - sum or take first panel
             if 'raw' in filepath.lower():
@@ -90,37 +181,40 @@ def load_and_validate_image(filepath: str) -> Optional[np.ndarray]:
                             panel_idx = i * 4 + j
                             row_panels.append(image[panel_idx])
                         panels.append(np.hstack(row_panels))
-                    return np.vstack(panels)
+                    return np.vstack(panels), None
                 else:
                     # Fallback: sum all frames
-                    return np.sum(image, axis=0)
+                    return np.sum(image, axis=0), None
             else:
                 print(f"Warning: {filepath} has unexpected 3D shape: {image.shape}")
-                return np.sum(image, axis=0)
+                return np.sum(image, axis=0), None
         else:
             print(f"Warning: {filepath} has unsupported shape: {image.shape}")
-            return None
+            return None, None
             
     except Exception as e:
         print(f"Error loading {filepath}: {e}")
-        return None
+        return None, None
 
 
 def plot_single_image(image: np.ndarray, title: str, scaling: str = 'mean_std', 
                      vmin: Optional[float] = None, vmax: Optional[float] = None,
-                     colormap: str = 'viridis', use_log: bool = False):
+                     colormap: str = 'viridis', use_log: bool = False,
+                     mask: Optional[np.ndarray] = None):
     """Plot a single detector image with specified scaling."""
     
+    mask = valid_mask(image, mask)
+    
     # Calculate intensity range
     if vmin is None or vmax is None:
-        calc_vmin, calc_vmax = smart_scaling(image, scaling)
+        calc_vmin, calc_vmax = smart_scaling(image, scaling, mask)
         if vmin is None:
             vmin = calc_vmin
         if vmax is None:
             vmax = calc_vmax
     
     # Create figure
-    plt.figure(figsize=(10, 8))
+    plt.figure(figsize=(10, 8), constrained_layout=True)
     
     # Plot image
     norm = LogNorm(vmin=max(vmin, 1), vmax=vmax) if use_log else None
@@ -137,7 +231,7 @@ def plot_single_image(image: np.ndarray, title: str, scaling: str = 'mean_std',
     plt.ylabel('Y pixels')
     
     # Add statistics text
-    valid_pixels = image[image > 0]
+    valid_pixels = image[mask]
     if len(valid_pixels) > 0:
         stats_text = f'Shape: {image.shape}\n'
         stats_text += f'Valid pixels: {len(valid_pixels):,}\n'
@@ -148,22 +242,25 @@ def plot_single_image(image: np.ndarray, title: str, scaling: str = 'mean_std',
         plt.text(0.02, 0.98, stats_text, transform=plt.gca().transAxes, 
                 fontsize=10, verticalalignment='top', 
                 bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-    
-    plt.tight_layout()
 
 
 def plot_comparison(images: List[np.ndarray], titles: List[str], 
-                   scaling: str = 'mean_std', colormap: str = 'viridis'):
+                   scaling: str = 'mean_std', colormap: str = 'viridis',
+                   masks: Optional[List[Optional[np.ndarray]]] = None):
     """Plot multiple images side by side for comparison."""
     
     n_images = len(images)
     if n_images == 0:
         return
     
+    if masks is None:
+        masks = [None] * n_images
+    masks = [valid_mask(img, m) for img, m in zip(images, masks)]
+    
     # Calculate common intensity range for fair comparison
     all_valid_pixels = []
-    for img in images:
-        valid = img[img > 0]
+    for img, mask in zip(images, masks):
+        valid = img[mask]
         if len(valid) > 0:
             all_valid_pixels.extend(valid)
     
@@ -177,7 +274,7 @@ def plot_comparison(images: List[np.ndarray], titles: List[str],
     cols = min(3, n_images)
     rows = (n_images + cols - 1) // cols
     
-    fig, axes = plt.subplots(rows, cols, figsize=(5*cols, 4*rows))
+    fig, axes = plt.subplots(rows, cols, figsize=(5*cols, 4*rows), constrained_layout=True)
     if n_images == 1:
         axes = [axes]
     elif rows == 1 and n_images > 1:
@@ -185,7 +282,7 @@ def plot_comparison(images: List[np.ndarray], titles: List[str],
     elif rows > 1:
         axes = axes.flatten()
     
-    for i, (image, title) in enumerate(zip(images, titles)):
+    for i, (image, title, mask) in enumerate(zip(images, titles, masks)):
         if n_images == 1:
             ax = axes[0] if isinstance(axes, list) else axes
         else:
@@ -201,9 +298,9 @@ def plot_comparison(images: List[np.ndarray], titles: List[str],
         ax.set_ylabel('Y pixels')
         
         # Add statistics
-        valid_pixels = image[image > 0]
-        if len(valid_pixels) > 0:
-            stats = f'{image.shape[0]}×{image.shape[1]}\n{len(valid_pixels):,} pixels'
+        n_valid = int(np.count_nonzero(mask))
+        if n_valid > 0:
+            stats = f'{image.shape[0]}×{image.shape[1]}\n{n_valid:,} pixels'
             ax.text(0.02, 0.98, stats, transform=ax.transAxes, 
                    fontsize=9, verticalalignment='top',
                    bbox=dict(boxstyle='round', facecolor='white', alpha=0.7))
@@ -213,14 +310,11 @@ def plot_comparison(images: List[np.ndarray], titles: List[str],
         for i in range(n_images, len(axes)):
             axes[i].set_visible(False)
     
-    # Add shared colorbar
-    plt.subplots_adjust(right=0.85)
-    cbar_ax = fig.add_axes([0.87, 0.15, 0.02, 0.7])
-    cbar = fig.colorbar(im, cax=cbar_ax)
+    # Add shared colorbar (placed by the constrained layout engine)
+    cbar = fig.colorbar(im, ax=axes, shrink=0.8)
     cbar.set_label('Intensity (ADU)', rotation=270, labelpad=15)
     
     plt.suptitle(f'Detector Image Comparison (scaling: {scaling})', fontsize=14)
-    plt.tight_layout()
 
 
 def plot_multi_event(image_files: List[str], max_events: int = 9,
@@ -229,12 +323,14 @@ def plot_multi_event(image_files: List[str], max_events: int = 9,
     
     # Load up to max_events images
     images = []
+    masks = []
     titles = []
     
     for i, filepath in enumerate(image_files[:max_events]):
-        image = load_and_validate_image(filepath)
+        image, mask = load_and_validate_image(filepath)
         if image is not None:
             images.append(image)
+            masks.append(valid_mask(image, mask))
             filename = os.path.basename(filepath)
             # Extract event number from filename
             event_num = filename.split('_')[1] if '_' in filename else str(i)
@@ -249,23 +345,16 @@ def plot_multi_event(image_files: List[str], max_events: int = 9,
     cols = int(np.ceil(np.sqrt(n_images)))
     rows = int(np.ceil(n_images / cols))
     
-    fig, axes = plt.subplots(rows, cols, figsize=(4*cols, 3*rows))
-    if n_images == 1:
-        axes = [axes]
-    elif rows == 1:
-        axes = axes.reshape(1, -1)
+    fig, axes = plt.subplots(rows, cols, figsize=(4*cols, 3*rows), constrained_layout=True)
+    axes = np.asarray(axes).reshape(rows, cols)
     
     # Calculate common intensity range
-    all_pixels = np.concatenate([img[img > 0] for img in images if len(img[img > 0]) > 0])
-    if len(all_pixels) > 0:
-        vmin, vmax = smart_scaling(all_pixels.reshape(-1, 1), scaling)
-    else:
-        vmin, vmax = 0, 1
+    vmin, vmax = stack_scaling(images, masks, scaling)
     
     for i, (image, title) in enumerate(zip(images, titles)):
         row = i // cols
         col = i % cols
-        ax = axes[row, col] if rows > 1 else axes[col]
+        ax = axes[row, col]
         
         # Plot image
         im = ax.imshow(image, cmap=colormap, vmin=vmin, vmax=vmax, 
@@ -283,17 +372,13 @@ def plot_multi_event(image_files: List[str], max_events: int = 9,
     for i in range(n_images, rows * cols):
         row = i // cols
         col = i % cols
-        ax = axes[row, col] if rows > 1 else axes[col]
-        ax.set_visible(False)
+        axes[row, col].set_visible(False)
     
-    # Add shared colorbar
-    fig.subplots_adjust(right=0.85)
-    cbar_ax = fig.add_axes([0.87, 0.15, 0.03, 0.7])
-    cbar = fig.colorbar(im, cax=cbar_ax)
+    # Add shared colorbar (placed by the constrained layout engine)
+    cbar = fig.colorbar(im, ax=axes, shrink=0.8)
     cbar.set_label('Intensity (ADU)', rotation=270, labelpad=15)
     
     plt.suptitle(f'Multi-Event View ({len(images)} events)', fontsize=14)
-    plt.tight_layout()
 
 
 def plot_panel_view(image: np.ndarray, title: str, panels_shape: Tuple[int, int] = (4, 4)):
@@ -304,7 +389,8 @@ def plot_panel_view(image: np.ndarray, title: str, panels_shape: Tuple[int, int]
     panel_cols = cols // panels_shape[1]
     
     fig, axes = plt.subplots(panels_shape[0], panels_shape[1], 
-                            figsize=(2*panels_shape[1], 2*panels_shape[0]))
+                            figsize=(2*panels_shape[1], 2*panels_shape[0]),
+                            constrained_layout=True)
     
     for i in range(panels_shape[0]):
         for j in range(panels_shape[1]):
@@ -325,7 +411,6 @@ def plot_panel_view(image: np.ndarray, title: str, panels_shape: Tuple[int, int]
             ax.set_yticks([])
     
     plt.suptitle(f'{title} - Panel View', fontsize=12)
-    plt.tight_layout()
 
 
 def main():
@@ -391,13 +476,13 @@ Examples:
     try:
         if args.mode == 'single':
             # Load first image
-            image = load_and_validate_image(image_files[0])
+            image, mask = load_and_validate_image(image_files[0])
             if image is None:
                 return 1
             
             title = f"Detector Image: {os.path.basename(image_files[0])}"
             plot_single_image(image, title, args.scaling, args.vmin, args.vmax, 
-                            args.colormap, args.log_scale)
+                            args.colormap, args.log_scale, mask)
             
         elif args.mode == 'comparison':
             # Load multiple assembly types for comparison
@@ -421,15 +506,17 @@ Examples:
             
             # Load images
             images = []
+            masks = []
             valid_titles = []
             for filepath, title in zip(comparison_files, comparison_titles):
-                img = load_and_validate_image(filepath)
+                img, mask = load_and_validate_image(filepath)
                 if img is not None:
                     images.append(img)
+                    masks.append(mask)
                     valid_titles.append(title)
             
             if images:
-                plot_comparison(images, valid_titles, args.scaling, args.colormap)
+                plot_comparison(images, valid_titles, args.scaling, args.colormap, masks)
             else:
                 print("No valid comparison images found")
                 return 1
@@ -439,7 +526,7 @@ Examples:
             
         elif args.mode == 'panels':
             # Load first image for panel view
-            image = load_and_validate_image(image_files[0])
+            image, _ = load_and_validate_image(image_files[0])
             if image is None:
                 return 1
                 
@@ -14,43 +14,101 @@ License: MIT
 __version__ = "0.1.0"
 __author__ = "LCLS Data Analysis"
 
-from .xtc_reader import (
-    XTCReader, Datagram, XTCContainer, XTCIterator,
-    get_xtc_info, walk_xtc_tree, print_xtc_tree
-)
-from .binary_format import (
-    parse_datagram_header, parse_xtc_header,
-    TypeId, TransitionId, DamageFlags
-)
-from .geometry import (
-    DetectorSegment, DetectorGeometry, CoordinateArrays,
-    create_cspad_geometry, create_pnccd_geometry, create_camera_geometry,
-    compute_segment_coordinates, compute_detector_coordinates
-)
-from .calibration import (
-    CalibrationConstants, DetectorCalibrator, CalibrationManager,
-    CommonModeCorrection, create_default_calibration, calibrate_detector_data
-)
-from .data_types import (
-    Epix10ka2MData, parse_epix10ka2m_array, parse_detector_data
-)
-from .epix_utils import (
-    assemble_epix10ka2m_image, get_detector_info, extract_panel, extract_quad,
-    assemble_epix10ka2m_psana_compatible, get_psana_geometry_info, 
-    compare_assembly_methods, validate_psana_assembly
-)
-from .geometry_parser import (
-    parse_geometry_file, load_default_epix10ka2m_geometry, validate_geometry,
-    print_geometry_summary, GeometryParseError
-)
-from .geometry_definitions import (
-    DetectorGeometry, PanelGeometry, CoordinateArrays, PixelIndices,
-    EPIX10KA2M_PANEL_SHAPE, EPIX10KA2M_NUM_PANELS, EPIX10KA2M_PIXEL_SIZE_UM
-)
-from .detector_discovery import (
-    DetectorInfo, LCLSEnvironment, create_detector_discovery,
-    resolve_detector_from_psana_style, print_detector_discovery_summary
-)
+import importlib
+
+# Public names mapped to the submodule that defines them, or to a
+# (submodule, attribute) pair for names re-exported under an alias.
+# Submodules are imported on first attribute access (PEP 562) so that
+# `import xtc1reader` does not pull in NumPy and every detector module
+# up front.
+_LAZY = {
+    # xtc_reader
+    'XTCReader': 'xtc_reader',
+    'Datagram': 'xtc_reader',
+    'XTCContainer': 'xtc_reader',
+    'XTCIterator': 'xtc_reader',
+    'get_xtc_info': 'xtc_reader',
+    'walk_xtc_tree': 'xtc_reader',
+    'walk_xtc_tree_iter': 'xtc_reader',
+    'print_xtc_tree': 'xtc_reader',
+    # binary_format
+    'parse_datagram_header': 'binary_format',
+    'parse_xtc_header': 'binary_format',
+    'TypeId': 'binary_format',
+    'TransitionId': 'binary_format',
+    'DamageFlags': 'binary_format',
+    # geometry
+    'DetectorSegment': 'geometry',
+    'LegacyDetectorGeometry': ('geometry', 'DetectorGeometry'),
+    'LegacyCoordinateArrays': ('geometry', 'CoordinateArrays'),
+    'create_cspad_geometry': 'geometry',
+    'create_pnccd_geometry': 'geometry',
+    'create_camera_geometry': 'geometry',
+    'compute_segment_coordinates': 'geometry',
+    'compute_detector_coordinates': 'geometry',
+    'get_detector_coordinates': 'geometry',
+    # calibration
+    'CalibrationConstants': 'calibration',
+    'DetectorCalibrator': 'calibration',
+    'CalibrationManager': 'calibration',
+    'CommonModeCorrection': 'calibration',
+    'create_default_calibration': 'calibration',
+    'calibrate_detector_data': 'calibration',
+    'calibrate_detector_events': 'calibration',
+    # data_types
+    'Epix10ka2MData': 'data_types',
+    'parse_epix10ka2m_array': 'data_types',
+    'parse_detector_data': 'data_types',
+    # epix_utils
+    'assemble_epix10ka2m_image': 'epix_utils',
+    'get_detector_info': 'epix_utils',
+    'extract_panel': 'epix_utils',
+    'extract_quad': 'epix_utils',
+    'assemble_epix10ka2m_psana_compatible': 'epix_utils',
+    'get_psana_geometry_info': 'epix_utils',
+    'compare_assembly_methods': 'epix_utils',
+    'validate_psana_assembly': 'epix_utils',
+    # geometry_parser
+    'parse_geometry_file': 'geometry_parser',
+    'load_default_epix10ka2m_geometry': 'geometry_parser',
+    'validate_geometry': 'geometry_parser',
+    'print_geometry_summary': 'geometry_parser',
+    'GeometryParseError': 'geometry_parser',
+    # geometry_definitions
+    'DetectorGeometry': 'geometry_definitions',
+    'PanelGeometry': 'geometry_definitions',
+    'CoordinateArrays': 'geometry_definitions',
+    'PixelIndices': 'geometry_definitions',
+    'EPIX10KA2M_PANEL_SHAPE': 'geometry_definitions',
+    'EPIX10KA2M_NUM_PANELS': 'geometry_definitions',
+    'EPIX10KA2M_PIXEL_SIZE_UM': 'geometry_definitions',
+    # detector_discovery
+    'DetectorInfo': 'detector_discovery',
+    'LCLSEnvironment': 'detector_discovery',
+    'create_detector_discovery': 'detector_discovery',
+    'clear_detector_cache': 'detector_discovery',
+    'resolve_detector_from_psana_style': 'detector_discovery',
+    'print_detector_discovery_summary': 'detector_discovery',
+}
+
+
+def __getattr__(name):
+    """Import the defining submodule on first access to a public name."""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    target = _LAZY[name]
+    if isinstance(target, tuple):
+        module_name, attr = target
+    else:
+        module_name, attr = target, name
+    module = importlib.import_module('.' + module_name, __name__)
+    value = getattr(module, attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 __all__ = [
     'XTCReader',
@@ -59,6 +117,7 @@ __all__ = [
     'XTCIterator',
     'get_xtc_info',
     'walk_xtc_tree', 
+    'walk_xtc_tree_iter',
     'print_xtc_tree',
     'parse_datagram_header',
     'parse_xtc_header',
@@ -66,19 +125,21 @@ __all__ = [
     'TransitionId', 
     'DamageFlags',
     'DetectorSegment',
-    'DetectorGeometry', 
-    'CoordinateArrays',
+    'LegacyDetectorGeometry',
+    'LegacyCoordinateArrays',
     'create_cspad_geometry',
     'create_pnccd_geometry',
     'create_camera_geometry',
     'compute_segment_coordinates',
     'compute_detector_coordinates',
+    'get_detector_coordinates',
     'CalibrationConstants',
     'DetectorCalibrator',
     'CalibrationManager',
     'CommonModeCorrection',
     'create_default_calibration',
     'calibrate_detector_data',
+    'calibrate_detector_events',
     'Epix10ka2MData',
     'parse_epix10ka2m_array',
     'parse_detector_data',
@@ -105,6 +166,7 @@ __all__ = [
     'DetectorInfo',
     'LCLSEnvironment',
     'create_detector_discovery',
+    'clear_detector_cache',
     'resolve_detector_from_psana_style',
     'print_detector_discovery_summary'
 ]
\ No newline at end of file
@@ -11,6 +11,8 @@ import struct
 from typing import NamedTuple, Optional
 from enum import IntEnum
 
+import numpy as np
+
 
 class TransitionId(IntEnum):
     """XTC transition types"""
@@ -102,12 +104,66 @@ class ClockTime(NamedTuple):
         return self.seconds + self.nanoseconds / 1e9
 
 
-class TimeStamp(NamedTuple):
-    """8-byte pulse timing information"""
-    ticks: int       # 119MHz counter (24 bits)
-    control: int     # Control bits (8 bits)
-    fiducials: int   # 360Hz pulse ID (17 bits)
-    vector: int      # Event distribution seed (15 bits)
+# TimeStamp bitfields packed into the two sequence stamp words
+_TICKS_MASK = 0xFFFFFF        # stamp_low bits 0-23
+_CONTROL_SHIFT = 24           # stamp_low bits 24-31
+_CONTROL_MASK = 0xFF
+_FIDUCIALS_MASK = 0x1FFFF     # stamp_high bits 0-16
+_VECTOR_SHIFT = 17            # stamp_high bits 17-31
+_VECTOR_MASK = 0x7FFF
+
+class TimeStamp:
+    """
+    8-byte pulse timing information.
+    
+    Both stamp words are kept in a single 64-bit int (stamp_low in the
+    low half, stamp_high in the high half); fields are masked out on access.
+    """
+    __slots__ = ('raw',)
+    
+    def __init__(self, ticks: int, control: int, fiducials: int, vector: int):
+        stamp_low = (ticks & _TICKS_MASK) | ((control & _CONTROL_MASK) << _CONTROL_SHIFT)
+        stamp_high = (fiducials & _FIDUCIALS_MASK) | ((vector & _VECTOR_MASK) << _VECTOR_SHIFT)
+        self.raw = stamp_low | (stamp_high << 32)
+    
+    @classmethod
+    def from_words(cls, stamp_low: int, stamp_high: int) -> 'TimeStamp':
+        """Build from the two raw uint32 stamp words of a Sequence"""
+        stamp = cls.__new__(cls)
+        stamp.raw = stamp_low | (stamp_high << 32)
+        return stamp
+    
+    @property
+    def ticks(self) -> int:
+        """119MHz counter (24 bits)"""
+        return self.raw & _TICKS_MASK
+    
+    @property
+    def control(self) -> int:
+        """Control bits (8 bits)"""
+        return (self.raw >> _CONTROL_SHIFT) & _CONTROL_MASK
+    
+    @property
+    def fiducials(self) -> int:
+        """360Hz pulse ID (17 bits)"""
+        return (self.raw >> 32) & _FIDUCIALS_MASK
+    
+    @property
+    def vector(self) -> int:
+        """Event distribution seed (15 bits)"""
+        return (self.raw >> (32 + _VECTOR_SHIFT)) & _VECTOR_MASK
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TimeStamp):
+            return NotImplemented
+        return self.raw == other.raw
+    
+    def __hash__(self) -> int:
+        return hash(self.raw)
+    
+    def __repr__(self) -> str:
+        return (f"TimeStamp(ticks={self.ticks}, control={self.control}, "
+                f"fiducials={self.fiducials}, vector={self.vector})")
 
 
 class Sequence(NamedTuple):
@@ -196,17 +252,81 @@ class TypeIdInfo(NamedTuple):
         return bool(self.value & 0x80000000)
 
 
-class XTCContainer(NamedTuple):
-    """16-byte XTC container header"""
-    damage: Damage
-    src: Src  
-    contains: TypeIdInfo
-    extent: int      # uint32_t total size including header
+class XTCContainer:
+    """
+    20-byte XTC container header, stored as its raw uint32 words.
+    
+    The Damage, Src and TypeIdInfo views are built only when the
+    corresponding attribute is accessed.
+    """
+    __slots__ = ('damage_raw', 'src_log', 'src_phy', 'typeid_raw', 'extent')
+    
+    def __init__(self, damage_raw: int, src_log: int, src_phy: int,
+                 typeid_raw: int, extent: int):
+        self.damage_raw = damage_raw
+        self.src_log = src_log
+        self.src_phy = src_phy
+        self.typeid_raw = typeid_raw
+        self.extent = extent      # uint32_t total size including header
+    
+    @property
+    def damage(self) -> Damage:
+        return Damage(self.damage_raw)
+    
+    @property
+    def src(self) -> Src:
+        return Src(self.src_log, self.src_phy)
+    
+    @property
+    def contains(self) -> TypeIdInfo:
+        return TypeIdInfo(self.typeid_raw)
+    
+    @property
+    def type_id(self) -> int:
+        """Type ID of the contained data (bits 0-15)"""
+        return self.typeid_raw & 0xFFFF
+    
+    @property
+    def version(self) -> int:
+        """Version of the contained data (bits 16-30)"""
+        return (self.typeid_raw >> 16) & 0x7FFF
     
     @property
     def payload_size(self) -> int:
         """Size of payload data (extent - header size)"""
         return self.extent - 20  # XTC header is 20 bytes
+    
+    def payload_view(self, buf, offset: int, dtype='<u2') -> np.ndarray:
+        """
+        Zero-copy array view of this container's payload.
+        
+        Args:
+            buf: Buffer holding the container (bytes, memoryview, mmap)
+            offset: Byte offset of this container's 20-byte header in buf
+            dtype: Element type; always interpreted as little-endian, so
+                big-endian hosts get a byte-swapped view rather than a copy
+        """
+        dtype = np.dtype(dtype).newbyteorder('<')
+        return np.frombuffer(buf, dtype=dtype,
+                             count=self.payload_size // dtype.itemsize,
+                             offset=offset + 20)
+    
+    def _words(self) -> tuple[int, int, int, int, int]:
+        return (self.damage_raw, self.src_log, self.src_phy,
+                self.typeid_raw, self.extent)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, XTCContainer):
+            return NotImplemented
+        return self._words() == other._words()
+    
+    def __hash__(self) -> int:
+        return hash(self._words())
+    
+    def __repr__(self) -> str:
+        return (f"XTCContainer(damage=0x{self.damage_raw:08x}, "
+                f"src=0x{self.src_log:08x}:0x{self.src_phy:08x}, "
+                f"typeid=0x{self.typeid_raw:08x}, extent={self.extent})")
 
 
 class Datagram(NamedTuple):
@@ -218,40 +338,47 @@ class Datagram(NamedTuple):
 
 # Binary parsing functions using little-endian format
 
-def parse_datagram_header(data: bytes) -> Datagram:
+# Precompiled header layouts (avoids re-parsing the format string per call)
+_SEQ_ENV_DMG = struct.Struct('<6I')  # Sequence(16) + Env(4) + Damage(4)
+_XTC_HDR = struct.Struct('<5I')      # Damage + Src(8) + TypeId + extent
+_XTC_TAIL = struct.Struct('<4I')     # Src(8) + TypeId + extent
+_XTC_EXTENT = struct.Struct('<I')    # extent field alone (header offset 16)
+
+# Structured layout of a 20-byte XTC header for bulk decoding
+_XTC_DTYPE = np.dtype([
+    ('damage', '<u4'),
+    ('src_log', '<u4'),
+    ('src_phy', '<u4'),
+    ('typeid', '<u4'),
+    ('extent', '<u4'),
+])
+
+def parse_datagram_header(data: bytes, offset: int = 0) -> Datagram:
     """
     Parse 24-byte datagram header from binary data.
     
     Format: Sequence(16) + Env(4) + partial XTC(4 damage bytes)
     Note: Remaining 12 bytes of XTC header are in payload
-    """
-    if len(data) < 24:
-        raise ValueError(f"Datagram header too short: {len(data)} < 24 bytes")
     
-    # Parse Sequence (16 bytes)
-    clock_ns, clock_sec, stamp_low, stamp_high = struct.unpack('<4I', data[0:16])
+    Accepts any buffer (bytes, memoryview, mmap); nothing is copied.
+    """
+    if len(data) < offset + 24:
+        raise ValueError(f"Datagram header too short: {len(data) - offset} < 24 bytes")
     
-    # Extract timestamp fields  
-    ticks = stamp_low & 0xFFFFFF
-    control = (stamp_low >> 24) & 0xFF
-    fiducials = stamp_high & 0x1FFFF
-    vector = (stamp_high >> 17) & 0x7FFF
+    # Sequence (16 bytes) + Env (4 bytes) + XTC damage (4 bytes)
+    (clock_ns, clock_sec, stamp_low, stamp_high,
+     env_val, damage_val) = _SEQ_ENV_DMG.unpack_from(data, offset)
     
+    # Timestamp fields are decoded lazily from the raw stamp words
     clock = ClockTime(clock_sec, clock_ns)
-    stamp = TimeStamp(ticks, control, fiducials, vector)
+    stamp = TimeStamp.from_words(stamp_low, stamp_high)
     seq = Sequence(clock, stamp)
     
-    # Parse Env (4 bytes)
-    env_val = struct.unpack('<I', data[16:20])[0]
     env = Env(env_val)
     
-    # Parse first 4 bytes of XTC (damage field)
-    damage_val = struct.unpack('<I', data[20:24])[0]
-    damage = Damage(damage_val)
-    
     # XTC container is incomplete - need remaining 12 bytes from payload
     # Return partial datagram for now
-    return Datagram(seq, env, XTCContainer(damage, Src(0, 0), TypeIdInfo(0), 0))
+    return Datagram(seq, env, XTCContainer(damage_val, 0, 0, 0, 0))
 
 
 def parse_xtc_header(data: bytes, offset: int = 0) -> XTCContainer:
@@ -259,75 +386,111 @@ def parse_xtc_header(data: bytes, offset: int = 0) -> XTCContainer:
     Parse 20-byte XTC container header from binary data.
     
     Format: Damage(4) + Src_log(4) + Src_phy(4) + TypeId(4) + extent(4) = 20 bytes
-    """
-    if len(data) < offset + 20:
-        raise ValueError(f"XTC header too short at offset {offset}")
     
+    Raises struct.error if fewer than 20 bytes remain after offset.
+    """
     # Unpack all 20 bytes: damage + src_log + src_phy + typeid + extent
-    damage_val, src_log, src_phy, typeid_val, extent = struct.unpack(
-        '<5I', data[offset:offset+20]
-    )
-    
-    damage = Damage(damage_val)
-    src = Src(src_log, src_phy)
-    contains = TypeIdInfo(typeid_val)
-    
-    return XTCContainer(damage, src, contains, extent)
+    return XTCContainer(*_XTC_HDR.unpack_from(data, offset))
 
 
-def complete_datagram_with_xtc(partial_dgram: Datagram, xtc_data: bytes) -> Datagram:
+def complete_datagram_with_xtc(partial_dgram: Datagram, xtc_data: bytes,
+                               offset: int = 0) -> Datagram:
     """
     Complete a partial datagram by parsing the full XTC header from payload.
     """
-    if len(xtc_data) < 16:
+    if len(xtc_data) < offset + 16:
         raise ValueError("XTC data too short for remaining header")
     
     # Parse remaining XTC fields (src_log + src_phy + typeid + extent)
-    src_log, src_phy, typeid_val, extent = struct.unpack('<4I', xtc_data[0:16])
-    
-    src = Src(src_log, src_phy)
-    contains = TypeIdInfo(typeid_val)
+    src_log, src_phy, typeid_val, extent = _XTC_TAIL.unpack_from(xtc_data, offset)
     
     # Create complete XTC container  
-    xtc = XTCContainer(partial_dgram.xtc.damage, src, contains, extent)
+    xtc = XTCContainer(partial_dgram.xtc.damage_raw, src_log, src_phy,
+                       typeid_val, extent)
     
     return Datagram(partial_dgram.seq, partial_dgram.env, xtc)
 
 
-def parse_xtc_payload(data: bytes, offset: int = 0) -> tuple[list[XTCContainer], int]:
+class XTCHeaderTable:
+    """
+    Sibling XTC headers decoded in bulk into a structured NumPy array.
+
+    Field arrays (``damage``, ``src_log``, ``src_phy``, ``typeid``,
+    ``extent``) are available directly for vectorized use. Indexing or
+    iterating yields XTCContainer objects, built only for the entries
+    actually accessed.
+    """
+
+    __slots__ = ('headers', 'offsets')
+
+    def __init__(self, headers: np.ndarray, offsets: np.ndarray):
+        self.headers = headers    # structured array with _XTC_DTYPE
+        self.offsets = offsets    # byte offset of each header in the payload
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+    def __getitem__(self, index: int) -> XTCContainer:
+        return XTCContainer(*self.headers[index].item())
+
+    def __iter__(self):
+        for i in range(len(self.headers)):
+            yield self[i]
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name in _XTC_DTYPE.names:
+            return self.headers[name]
+        raise AttributeError(name)
+
+    @property
+    def type_ids(self) -> np.ndarray:
+        """Type ID (bits 0-15) of every header"""
+        return self.headers['typeid'] & 0xFFFF
+
+
+def parse_xtc_payload(data: bytes, offset: int = 0) -> tuple[XTCHeaderTable, int]:
     """
-    Parse XTC containers from payload data recursively.
+    Parse sibling XTC container headers from payload data.
+    
+    Walks the payload once reading only the extent fields to find header
+    offsets, then decodes all headers in one NumPy gather.
     
-    Returns: (list of XTC containers, bytes consumed)
+    Returns: (XTCHeaderTable of containers, bytes consumed)
     """
-    containers = []
+    offsets = []
     pos = offset
+    size = len(data)
     
-    while pos + 16 <= len(data):
-        xtc = parse_xtc_header(data, pos)
-        containers.append(xtc)
+    while pos + 16 <= size:
+        if size < pos + 20:
+            raise ValueError(f"XTC header too short at offset {pos}")
+        offsets.append(pos)
         
         # Move to next XTC (current header + payload)
-        pos += xtc.extent
+        pos += _XTC_EXTENT.unpack_from(data, pos + 16)[0]
         
         # Stop if we've consumed all data
-        if pos >= len(data):
+        if pos >= size:
             break
     
-    return containers, pos - offset
+    offsets = np.asarray(offsets, dtype=np.intp)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    gathered = raw[offsets[:, None] + np.arange(_XTC_DTYPE.itemsize)]
+    headers = np.ascontiguousarray(gathered).view(_XTC_DTYPE).reshape(-1)
+    
+    return XTCHeaderTable(headers, offsets), pos - offset
+
+
+# Value -> name tables (canonical member names, as TypeId(value).name)
+_TYPE_ID_NAMES = {t.value: t.name for t in TypeId}
+_TRANSITION_NAMES = {t.value: t.name for t in TransitionId}
 
 
 def type_id_name(type_id: int) -> str:
     """Get human-readable name for type ID"""
-    try:
-        return TypeId(type_id).name
-    except ValueError:
-        return f"Unknown_{type_id}"
+    return _TYPE_ID_NAMES.get(type_id, f"Unknown_{type_id}")
 
 
 def transition_name(transition_id: int) -> str:
     """Get human-readable name for transition ID"""
-    try:
-        return TransitionId(transition_id).name
-    except ValueError:
-        return f"Unknown_{transition_id}"
\ No newline at end of file
+    return _TRANSITION_NAMES.get(transition_id, f"Unknown_{transition_id}")
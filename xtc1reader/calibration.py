@@ -8,13 +8,46 @@ basic analysis.
 
 import numpy as np
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional, NamedTuple, TYPE_CHECKING, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 import warnings
 
 if TYPE_CHECKING:
-    from numpy.typing import NDArray
+    from numpy.typing import NDArray, DTypeLike
+
+
+# Byte alignment for per-pixel constants (one AVX-512 register / cache line)
+_ALIGNMENT = 64
+
+# Leading bytes used to tell calibration file formats apart
+_NPY_MAGIC = b'\x93NUMPY'
+_TEXT_BYTES = frozenset(b'\t\n\r' + bytes(range(32, 127)))
+
+
+def _aligned_contiguous(array, alignment: int = _ALIGNMENT) -> 'NDArray':
+    """
+    Return array as a single C-contiguous ndarray whose data starts on an
+    `alignment`-byte boundary, copying only when needed.
+    
+    Per-tile sequences (e.g. one pedestal tile per ASIC) are stacked into
+    one array so corrections run as a single vectorized call.
+    """
+    if isinstance(array, (list, tuple)) or getattr(array, 'dtype', None) == object:
+        array = np.stack([np.asarray(tile) for tile in array])
+    array = np.asarray(array)
+    
+    if array.flags.c_contiguous and array.ctypes.data % alignment == 0:
+        return array
+    
+    # Over-allocate raw bytes and start the view at the first aligned address
+    buffer = np.empty(array.nbytes + alignment, dtype=np.uint8)
+    start = -buffer.ctypes.data % alignment
+    aligned = buffer[start:start + array.nbytes].view(array.dtype).reshape(array.shape)
+    np.copyto(aligned, array)
+    return aligned
 
 
 @dataclass
@@ -29,6 +62,19 @@ class CalibrationConstants:
     common_mode: Optional['NDArray'] = None      # Common mode regions/parameters
     gain: Optional['NDArray'] = None             # Gain correction per pixel
     
+    # Region table derived from common_mode (see region_layout())
+    _region_layout: Optional['RegionLayout'] = field(
+        default=None, init=False, repr=False, compare=False)
+    _region_source: Optional['NDArray'] = field(
+        default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Per-pixel constants as single contiguous, 64-byte aligned arrays
+        if self.pedestals is not None:
+            self.pedestals = _aligned_contiguous(self.pedestals)
+        if self.pixel_status is not None:
+            self.pixel_status = _aligned_contiguous(self.pixel_status)
+    
     def is_valid(self) -> bool:
         """Check if calibration constants are valid and complete"""
         return self.pedestals is not None
@@ -40,6 +86,18 @@ class CalibrationConstants:
     def has_pixel_status(self) -> bool:
         """Check if pixel status mask is available"""
         return self.pixel_status is not None
+    
+    def region_layout(self) -> Optional['RegionLayout']:
+        """
+        Common mode region table (region ids and pixel groups), built once
+        per region map and rebuilt only if common_mode is replaced.
+        """
+        if self.common_mode is None:
+            return None
+        if self._region_layout is None or self._region_source is not self.common_mode:
+            self._region_layout = build_region_layout(self.common_mode)
+            self._region_source = self.common_mode
+        return self._region_layout
 
 
 @dataclass
@@ -54,6 +112,112 @@ class CalibrationMetadata:
     description: str = ""
 
 
+class RegionLayout(NamedTuple):
+    """
+    Pixels grouped by common mode region in CSR form.
+    
+    Pixels of the g-th region (id region_ids[g]) are the flat indices
+    order[offsets[g]:offsets[g + 1]].
+    """
+    region_ids: 'NDArray'    # Sorted unique region ids
+    offsets: 'NDArray'       # Start of each region in order (len = n_regions + 1)
+    order: 'NDArray'         # Flat pixel indices sorted by region id
+
+
+def build_region_layout(regions: 'NDArray') -> RegionLayout:
+    """
+    Sort pixels by region id once so every region is a contiguous slice.
+    
+    Args:
+        regions: Region map for common mode groups
+        
+    Returns:
+        RegionLayout for the region map
+    """
+    flat = np.asarray(regions).ravel()
+    order = np.argsort(flat, kind='stable')
+    region_ids, starts = np.unique(flat[order], return_index=True)
+    offsets = np.append(starts, flat.size)
+    return RegionLayout(region_ids, offsets, order)
+
+
+def _select_median(values: 'NDArray') -> float:
+    """
+    Median of a 1D array via a partial sort (np.partition) of the
+    middle element(s) only; matches np.median for NaN-free data.
+    """
+    n = len(values)
+    k = n // 2
+    if n % 2:
+        return np.partition(values, k)[k]
+    lower, upper = np.partition(values, (k - 1, k))[k - 1:k + 1]
+    # Average in float: integer dtypes would overflow in lower + upper
+    return (float(lower) + float(upper)) / 2
+
+
+def _segmented_common_mode(xp, values, layout_arrays, threshold: float,
+                           algorithm: str):
+    """
+    Per-region common mode shifts for region-sorted pixel values, computed
+    for all regions at once with segmented sorts and bincounts.
+    
+    Array-module agnostic (NumPy or CuPy via `xp`); follows the same rules
+    as CommonModeCorrection: region 0 and regions under 10 pixels get no
+    shift, and the outlier-rejected estimate is used when more than 5
+    pixels survive.
+    
+    Args:
+        xp: Array module (numpy or cupy)
+        values: Pixel values gathered in layout order
+        layout_arrays: (region_ids, offsets, counts, segment) in xp arrays,
+            where segment is the region index of every gathered pixel
+        threshold: Outlier rejection threshold in standard deviations
+        algorithm: "median" or "mean"
+        
+    Returns:
+        Shift per region
+    """
+    region_ids, offsets, counts, segment = layout_arrays
+    n_regions = len(region_ids)
+    starts = offsets[:-1]
+    safe_counts = xp.maximum(counts, 1)
+    
+    def segment_centre(sorted_values, first, n):
+        # Median of each segment from its sorted block [first, first + n)
+        n = xp.maximum(n, 1)
+        lower = sorted_values[first + (n - 1) // 2]
+        upper = sorted_values[first + n // 2]
+        return (lower + upper) / 2
+    
+    sums = xp.bincount(segment, weights=values, minlength=n_regions)
+    means = sums / safe_counts
+    if algorithm == "median":
+        order = xp.lexsort(xp.stack([values, segment]))
+        centre = segment_centre(values[order], starts, counts)
+    else:
+        centre = means
+    
+    deviation = values - means[segment]
+    variance = xp.bincount(segment, weights=deviation * deviation,
+                           minlength=n_regions) / safe_counts
+    std = xp.sqrt(variance)
+    
+    # Outlier-rejected estimate over the surviving pixels of each region
+    good = xp.abs(values - centre[segment]) < threshold * std[segment]
+    n_good = xp.bincount(segment, weights=good.astype(values.dtype),
+                         minlength=n_regions).astype(counts.dtype)
+    if algorithm == "median":
+        # Good pixels sort first within each region, in ascending value order
+        order = xp.lexsort(xp.stack([values, ~good, segment]))
+        refined = segment_centre(values[order], starts, n_good)
+    else:
+        refined = xp.bincount(segment, weights=values * good,
+                              minlength=n_regions) / xp.maximum(n_good, 1)
+    
+    shifts = xp.where(n_good > 5, refined, centre)
+    return xp.where((region_ids == 0) | (counts < 10), 0, shifts)
+
+
 class CommonModeCorrection:
     """
     Common mode correction algorithms for different detector types.
@@ -64,7 +228,8 @@ class CommonModeCorrection:
     
     @staticmethod
     def median_subtraction(data: 'NDArray', regions: Optional['NDArray'] = None,
-                          threshold: float = 3.0) -> 'NDArray':
+                          threshold: float = 3.0, inplace: bool = False,
+                          layout: Optional[RegionLayout] = None) -> 'NDArray':
         """
         Median-based common mode correction.
         
@@ -72,6 +237,8 @@ class CommonModeCorrection:
             data: Raw detector data (2D array)
             regions: Region map for common mode groups (same shape as data)
             threshold: Outlier rejection threshold in standard deviations
+            inplace: Correct data in place instead of returning a copy
+            layout: Precomputed build_region_layout(regions), reused across frames
             
         Returns:
             Corrected data
@@ -79,41 +246,50 @@ class CommonModeCorrection:
         if data.ndim != 2:
             raise ValueError("Data must be 2D array")
         
-        corrected = data.copy()
+        corrected = data if inplace else data.copy()
         
         if regions is None:
             # Apply global common mode
             median_val = np.median(data)
             corrected -= median_val
         else:
-            # Apply per-region common mode
-            unique_regions = np.unique(regions)
-            for region_id in unique_regions:
+            # Apply per-region common mode. Pixels are gathered once in
+            # region order so each region is a contiguous slice.
+            if layout is None:
+                layout = build_region_layout(regions)
+            values = data.ravel()[layout.order]
+            offsets = layout.offsets
+            shifts = np.zeros(len(layout.region_ids))
+            
+            for g, region_id in enumerate(layout.region_ids):
                 if region_id == 0:  # Skip region 0 (usually means no correction)
                     continue
-                    
-                mask = regions == region_id
-                region_data = data[mask]
+                
+                region_data = values[offsets[g]:offsets[g + 1]]
                 
                 if len(region_data) < 10:  # Skip regions with too few pixels
                     continue
                 
                 # Robust median with outlier rejection
-                median_val = np.median(region_data)
+                median_val = _select_median(region_data)
                 std_val = np.std(region_data)
                 
                 # Remove outliers and recalculate
                 good_pixels = np.abs(region_data - median_val) < threshold * std_val
                 if np.sum(good_pixels) > 5:
-                    median_val = np.median(region_data[good_pixels])
+                    median_val = _select_median(region_data[good_pixels])
                 
-                corrected[mask] -= median_val
+                shifts[g] = median_val
+            
+            # Scatter the per-region medians back in one pass
+            corrected.flat[layout.order] -= np.repeat(shifts, np.diff(offsets))
         
         return corrected
     
     @staticmethod
     def mean_subtraction(data: 'NDArray', regions: Optional['NDArray'] = None,
-                        threshold: float = 3.0) -> 'NDArray':
+                        threshold: float = 3.0, inplace: bool = False,
+                        layout: Optional[RegionLayout] = None) -> 'NDArray':
         """
         Mean-based common mode correction (alternative to median).
         
@@ -121,6 +297,8 @@ class CommonModeCorrection:
             data: Raw detector data (2D array)
             regions: Region map for common mode groups
             threshold: Outlier rejection threshold in standard deviations
+            inplace: Correct data in place instead of returning a copy
+            layout: Precomputed build_region_layout(regions), reused across frames
             
         Returns:
             Corrected data
@@ -128,21 +306,25 @@ class CommonModeCorrection:
         if data.ndim != 2:
             raise ValueError("Data must be 2D array")
         
-        corrected = data.copy()
+        corrected = data if inplace else data.copy()
         
         if regions is None:
             # Apply global common mode
             mean_val = np.mean(data)
             corrected -= mean_val
         else:
-            # Apply per-region common mode
-            unique_regions = np.unique(regions)
-            for region_id in unique_regions:
+            # Apply per-region common mode on contiguous region slices
+            if layout is None:
+                layout = build_region_layout(regions)
+            values = data.ravel()[layout.order]
+            offsets = layout.offsets
+            shifts = np.zeros(len(layout.region_ids))
+            
+            for g, region_id in enumerate(layout.region_ids):
                 if region_id == 0:
                     continue
-                    
-                mask = regions == region_id
-                region_data = data[mask]
+                
+                region_data = values[offsets[g]:offsets[g + 1]]
                 
                 if len(region_data) < 10:
                     continue
@@ -156,7 +338,9 @@ class CommonModeCorrection:
                 if np.sum(good_pixels) > 5:
                     mean_val = np.mean(region_data[good_pixels])
                 
-                corrected[mask] -= mean_val
+                shifts[g] = mean_val
+            
+            corrected.flat[layout.order] -= np.repeat(shifts, np.diff(offsets))
         
         return corrected
 
@@ -175,77 +359,139 @@ class DetectorCalibrator:
         """
         self.constants = constants
         
+        # Pedestals cast once to their working dtype
+        self._raw_pedestals: Optional['NDArray'] = None
+        self._pedestals: Optional['NDArray'] = None
+        
+        # Boolean bad-pixel mask derived from pixel_status
+        self._status: Optional['NDArray'] = None
+        self._bad_pixels: Optional['NDArray'] = None
+        
+        # Device copies of the constants for calibrate_gpu(), keyed by the
+        # host arrays they were made from
+        self._gpu_key: Optional[tuple] = None
+        self._gpu_constants: Optional[dict] = None
+        
         if not constants.is_valid():
             warnings.warn(f"Calibration constants for {constants.detector_name} "
                          f"run {constants.run_number} are incomplete")
     
-    def apply_pedestals(self, data: 'NDArray') -> 'NDArray':
+    def apply_pedestals(self, data: 'NDArray', inplace: bool = False) -> 'NDArray':
         """
         Apply pedestal subtraction.
         
+        Uint16 data with int16 pedestals is subtracted in int16, halving
+        the bytes touched compared to a float32 result. This assumes raw
+        ADU values below 32768, which holds for the 14-bit LCLS ADCs.
+        
         Args:
             data: Raw detector data
+            inplace: Subtract into data when its dtype can hold the result
+                (e.g. float data, or uint16 data with int16 pedestals)
             
         Returns:
             Pedestal-corrected data
         """
         if self.constants.pedestals is None:
             warnings.warn("No pedestal data available, skipping correction")
-            return data.copy()
+            return data if inplace else data.copy()
         
-        if data.shape != self.constants.pedestals.shape:
+        pedestals = self._working_pedestals()
+        if data.shape != pedestals.shape:
             raise ValueError(f"Data shape {data.shape} doesn't match "
-                           f"pedestal shape {self.constants.pedestals.shape}")
+                           f"pedestal shape {pedestals.shape}")
+        
+        if data.dtype == np.uint16 and pedestals.dtype == np.int16:
+            out = data.view(np.int16) if inplace else None
+            return np.subtract(data, pedestals, out=out, dtype=np.int16,
+                               casting='unsafe')
+        
+        if inplace and np.result_type(data, pedestals) == data.dtype:
+            np.subtract(data, pedestals, out=data)
+            return data
         
-        return data - self.constants.pedestals
+        return data - pedestals
     
-    def apply_pixel_mask(self, data: 'NDArray', mask_value: float = np.nan) -> 'NDArray':
+    def apply_pixel_mask(self, data: 'NDArray', mask_value: float = np.nan,
+                         inplace: bool = False) -> 'NDArray':
         """
         Apply pixel status mask to mark bad pixels.
         
         Args:
             data: Detector data
             mask_value: Value to assign to bad pixels (default: NaN)
+            inplace: Mask data in place instead of returning a copy
             
         Returns:
             Masked data
         """
         if self.constants.pixel_status is None:
-            return data.copy()
+            return data if inplace else data.copy()
         
         if data.shape != self.constants.pixel_status.shape:
             raise ValueError(f"Data shape {data.shape} doesn't match "
                            f"pixel status shape {self.constants.pixel_status.shape}")
         
-        corrected = data.copy()
-        bad_pixels = self.constants.pixel_status > 0
-        corrected[bad_pixels] = mask_value
+        corrected = data if inplace else data.copy()
+        np.putmask(corrected, self._bad_pixel_mask(), mask_value)
         
         return corrected
     
-    def apply_common_mode(self, data: 'NDArray', algorithm: str = "median") -> 'NDArray':
+    def apply_common_mode(self, data: 'NDArray', algorithm: str = "median",
+                          inplace: bool = False) -> 'NDArray':
         """
         Apply common mode correction.
         
         Args:
             data: Detector data
             algorithm: Algorithm to use ("median" or "mean")
+            inplace: Correct data in place instead of returning a copy
             
         Returns:
             Common mode corrected data
         """
+        regions = self.constants.common_mode
+        layout = self.constants.region_layout()
+        
         if algorithm == "median":
-            return CommonModeCorrection.median_subtraction(data, self.constants.common_mode)
+            return CommonModeCorrection.median_subtraction(
+                data, regions, inplace=inplace, layout=layout)
         elif algorithm == "mean":
-            return CommonModeCorrection.mean_subtraction(data, self.constants.common_mode)
+            return CommonModeCorrection.mean_subtraction(
+                data, regions, inplace=inplace, layout=layout)
         else:
             raise ValueError(f"Unknown common mode algorithm: {algorithm}")
     
+    def _working_pedestals(self) -> 'NDArray':
+        """
+        Pedestals in their working dtype (rebuilt if replaced).
+        
+        Float pedestals are cast once to aligned float32 so frames are
+        not promoted to float64 on every subtraction; int16 pedestals are
+        kept for the integer path.
+        """
+        pedestals = self.constants.pedestals
+        if self._pedestals is None or self._raw_pedestals is not pedestals:
+            if pedestals.dtype != np.int16:
+                pedestals = pedestals.astype(np.float32, copy=False)
+            self._pedestals = _aligned_contiguous(pedestals)
+            self._raw_pedestals = self.constants.pedestals
+        return self._pedestals
+    
+    def _bad_pixel_mask(self) -> 'NDArray':
+        """Boolean mask of bad pixels (rebuilt if pixel_status is replaced)"""
+        status = self.constants.pixel_status
+        if self._bad_pixels is None or self._status is not status:
+            self._bad_pixels = status > 0
+            self._status = status
+        return self._bad_pixels
+    
     def calibrate(self, data: 'NDArray', 
                   apply_pedestals: bool = True,
                   apply_common_mode: bool = True,
                   apply_pixel_mask: bool = True,
-                  common_mode_algorithm: str = "median") -> 'NDArray':
+                  common_mode_algorithm: str = "median",
+                  inplace: bool = False) -> 'NDArray':
         """
         Apply all calibration corrections in the proper order.
         
@@ -254,32 +500,191 @@ class DetectorCalibrator:
         2. Common mode correction  
         3. Pixel masking
         
+        At most one full-frame array is allocated; every later step works
+        in place on it.
+        
         Args:
             data: Raw detector data
             apply_pedestals: Apply pedestal correction
             apply_common_mode: Apply common mode correction
             apply_pixel_mask: Apply pixel status mask
             common_mode_algorithm: Algorithm for common mode ("median" or "mean")
+            inplace: Reuse data as the output buffer when its dtype allows
             
         Returns:
             Fully calibrated data
         """
-        result = data.copy()
+        do_common_mode = apply_common_mode and self.constants.has_common_mode()
+        do_pixel_mask = apply_pixel_mask and self.constants.has_pixel_status()
         
-        # Step 1: Pedestal subtraction
+        # Step 1: Pedestal subtraction (produces the working array)
         if apply_pedestals:
-            result = self.apply_pedestals(result)
+            result = self.apply_pedestals(data, inplace=inplace)
+        else:
+            result = data if inplace else data.copy()
+        
+        # Integer results (e.g. int16 pedestal path) need a float working
+        # array for fractional common mode shifts and NaN masking
+        if result.dtype.kind in 'iu' and (do_common_mode or do_pixel_mask):
+            result = result.astype(np.float32)
         
         # Step 2: Common mode correction
-        if apply_common_mode and self.constants.has_common_mode():
-            result = self.apply_common_mode(result, common_mode_algorithm)
+        if do_common_mode:
+            result = self.apply_common_mode(result, common_mode_algorithm, inplace=True)
         
         # Step 3: Pixel masking (done last to preserve NaN propagation)
-        if apply_pixel_mask and self.constants.has_pixel_status():
-            result = self.apply_pixel_mask(result)
+        if do_pixel_mask:
+            result = self.apply_pixel_mask(result, inplace=True)
         
         return result
 
+    def calibrate_fast(self, data: 'NDArray', out: Optional['NDArray'] = None,
+                       common_mode_algorithm: str = "median",
+                       mask_value: float = np.nan) -> 'NDArray':
+        """
+        Apply all available corrections into a single float32 buffer.
+        
+        Equivalent to calibrate() with every correction enabled, but the
+        pedestal subtraction writes straight into `out`, common mode and
+        masking then update it in place using the cached region layout and
+        bad-pixel mask. Passing the previous event's result as `out` makes
+        an event loop allocation-free.
+        
+        Args:
+            data: Raw detector data
+            out: Optional float32 output buffer with the shape of data
+            common_mode_algorithm: Algorithm for common mode ("median" or "mean")
+            mask_value: Value to assign to bad pixels (default: NaN)
+            
+        Returns:
+            Calibrated float32 data (`out` if given)
+        """
+        if out is None:
+            out = np.empty(data.shape, dtype=np.float32)
+        elif out.shape != data.shape or out.dtype != np.float32:
+            raise ValueError(f"Output buffer must be float32 with shape {data.shape}")
+        
+        # Step 1: Pedestal subtraction straight into the output buffer
+        if self.constants.pedestals is not None:
+            pedestals = self._working_pedestals()
+            if data.shape != pedestals.shape:
+                raise ValueError(f"Data shape {data.shape} doesn't match "
+                               f"pedestal shape {pedestals.shape}")
+            np.subtract(data, pedestals, out=out, casting='unsafe')
+        else:
+            np.copyto(out, data, casting='unsafe')
+        
+        # Step 2: Common mode correction in place
+        if self.constants.has_common_mode():
+            self.apply_common_mode(out, common_mode_algorithm, inplace=True)
+        
+        # Step 3: Pixel masking in place
+        if self.constants.has_pixel_status():
+            self.apply_pixel_mask(out, mask_value, inplace=True)
+        
+        return out
+
+    def calibrate_gpu(self, data, common_mode_algorithm: str = "median",
+                      mask_value: float = np.nan, threshold: float = 3.0):
+        """
+        Apply all available corrections on the GPU with CuPy.
+        
+        Constants are copied to the device once and reused. Common mode is
+        computed for every region at once (segmented sort + bincount), so
+        the number of kernel launches does not grow with the region count.
+        Run under a `cupy.cuda.Stream` to overlap with the next frame's
+        host-to-device copy.
+        
+        Args:
+            data: Raw detector data (NumPy or CuPy array)
+            common_mode_algorithm: Algorithm for common mode ("median" or "mean")
+            mask_value: Value to assign to bad pixels (default: NaN)
+            threshold: Outlier rejection threshold in standard deviations
+            
+        Returns:
+            Calibrated float32 CuPy array
+        """
+        try:
+            import cupy as cp
+        except ImportError as e:
+            raise ImportError("calibrate_gpu() requires CuPy "
+                              "(https://docs.cupy.dev/en/stable/install.html)") from e
+        
+        if common_mode_algorithm not in ("median", "mean"):
+            raise ValueError(f"Unknown common mode algorithm: {common_mode_algorithm}")
+        
+        gpu = self._device_constants(cp)
+        # Always a new array: asarray would hand back a float32 device
+        # input itself, and the steps below modify frame in place
+        frame = cp.array(data, dtype=cp.float32, copy=True)
+        
+        # Step 1: Pedestal subtraction
+        if gpu['pedestals'] is not None:
+            if frame.shape != gpu['pedestals'].shape:
+                raise ValueError(f"Data shape {frame.shape} doesn't match "
+                               f"pedestal shape {gpu['pedestals'].shape}")
+            frame -= gpu['pedestals']
+        
+        # Step 2: Common mode correction, all regions at once
+        if gpu['layout'] is not None:
+            order = gpu['layout'][0]
+            flat = frame.reshape(-1)
+            shifts = _segmented_common_mode(cp, flat[order], gpu['layout'][1:],
+                                            threshold, common_mode_algorithm)
+            flat[order] -= shifts.astype(cp.float32)[gpu['layout'][4]]
+        
+        # Step 3: Pixel masking
+        if gpu['bad_pixels'] is not None:
+            frame[gpu['bad_pixels']] = mask_value
+        
+        return frame
+    
+    def _device_constants(self, cp) -> dict:
+        """Device copies of pedestals, bad-pixel mask and region layout"""
+        constants = self.constants
+        key = (constants.pedestals, constants.pixel_status, constants.common_mode)
+        if self._gpu_constants is not None and all(
+                a is b for a, b in zip(self._gpu_key, key)):
+            return self._gpu_constants
+        
+        gpu = {'pedestals': None, 'bad_pixels': None, 'layout': None}
+        if constants.pedestals is not None:
+            gpu['pedestals'] = cp.asarray(constants.pedestals, dtype=cp.float32)
+        if constants.pixel_status is not None:
+            gpu['bad_pixels'] = cp.asarray(self._bad_pixel_mask())
+        if constants.common_mode is not None:
+            layout = constants.region_layout()
+            counts = np.diff(layout.offsets)
+            segment = np.repeat(np.arange(len(counts)), counts)
+            gpu['layout'] = tuple(cp.asarray(a) for a in (
+                layout.order, layout.region_ids, layout.offsets, counts, segment))
+        
+        self._gpu_key = key
+        self._gpu_constants = gpu
+        return gpu
+    
+    def calibrate_many(self, frames, max_workers: Optional[int] = None,
+                       **kwargs) -> List['NDArray']:
+        """
+        Calibrate independent events concurrently.
+        
+        The heavy NumPy operations release the GIL, so a thread pool
+        scales across cores without copying frames to worker processes.
+        
+        Args:
+            frames: Iterable of raw detector frames (or an (N, ...) stack)
+            max_workers: Thread count (default: ThreadPoolExecutor default)
+            **kwargs: Additional arguments passed to calibrate()
+            
+        Returns:
+            List of calibrated frames, in input order
+        """
+        def calibrate_one(frame):
+            return self.calibrate(frame, **kwargs)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(calibrate_one, frames))
+
 
 class CalibrationManager:
     """
@@ -295,6 +700,7 @@ class CalibrationManager:
         """
         self.calibration_dir = Path(calibration_dir) if calibration_dir else None
         self._constants_cache: Dict[Tuple[str, int], CalibrationConstants] = {}
+        self._calibrator_cache: Dict[Tuple[str, int], DetectorCalibrator] = {}
     
     def load_constants(self, detector_name: str, run_number: int) -> Optional[CalibrationConstants]:
         """
@@ -392,13 +798,17 @@ class CalibrationManager:
             except Exception as e:
                 warnings.warn(f"Failed to load common mode from {common_mode_file}: {e}")
         
-        return CalibrationConstants(
+        constants = CalibrationConstants(
             detector_name=detector_name,
             run_number=run_number,
             pedestals=pedestals,
             pixel_status=pixel_status,
             common_mode=common_mode
         )
+        
+        # Build the region table once per run rather than per event
+        constants.region_layout()
+        return constants
     
     def _find_closest_calibration_file(self, directory: Path, run_number: int) -> Optional[Path]:
         """Find calibration file with closest run number"""
@@ -434,30 +844,26 @@ class CalibrationManager:
         # Check if there's a .npy file with .data extension
         npy_file = file_path.with_suffix('.data.npy')
         if npy_file.exists():
-            try:
-                return np.load(npy_file)
-            except:
-                pass
-        
-        try:
-            # Try numpy binary format first
-            return np.load(file_path)
-        except:
-            pass
+            file_path = npy_file
         
-        try:
-            # Try text format
-            return np.loadtxt(file_path)
-        except:
-            pass
+        # Detect the format from the leading bytes instead of trying loaders
+        with open(file_path, 'rb') as f:
+            header = f.read(8)
         
         try:
-            # Try raw binary (assume float32)
+            if header.startswith(_NPY_MAGIC):
+                # Memory-mapped: pages are loaded on demand and shared
+                return np.load(file_path, mmap_mode='r')
+            if all(b in _TEXT_BYTES for b in header):
+                try:
+                    return np.loadtxt(file_path)
+                except ValueError:
+                    # Raw binary whose first bytes merely look like text
+                    pass
+            # Raw binary (assume float32)
             return np.fromfile(file_path, dtype=np.float32)
-        except:
-            pass
-        
-        raise ValueError(f"Could not load data from {file_path}")
+        except Exception as e:
+            raise ValueError(f"Could not load data from {file_path}") from e
     
     def get_calibrator(self, detector_name: str, run_number: int) -> Optional[DetectorCalibrator]:
         """
@@ -470,15 +876,23 @@ class CalibrationManager:
         Returns:
             DetectorCalibrator instance or None if constants not available
         """
+        cache_key = (detector_name, run_number)
+        calibrator = self._calibrator_cache.get(cache_key)
+        if calibrator is not None:
+            return calibrator
+        
         constants = self.load_constants(detector_name, run_number)
         if constants is None:
             return None
         
-        return DetectorCalibrator(constants)
+        calibrator = DetectorCalibrator(constants)
+        self._calibrator_cache[cache_key] = calibrator
+        return calibrator
 
 
 def create_default_calibration(detector_name: str, shape: Tuple[int, ...], 
-                              run_number: int = 1) -> CalibrationConstants:
+                              run_number: int = 1,
+                              pedestal_dtype: 'DTypeLike' = np.float32) -> CalibrationConstants:
     """
     Create default calibration constants for testing or when real calibration
     is not available.
@@ -487,32 +901,32 @@ def create_default_calibration(detector_name: str, shape: Tuple[int, ...],
         detector_name: Name of detector
         shape: Shape of detector data
         run_number: Run number
+        pedestal_dtype: Pedestal dtype; use np.int16 for integer uint16 workflows
         
     Returns:
         CalibrationConstants with default values
     """
+    rng = np.random.default_rng()
+    
     # Default pedestals (small random values around 100 ADU)
-    pedestals = np.random.normal(100.0, 5.0, shape).astype(np.float32)
+    pedestals = rng.normal(100.0, 5.0, shape)
+    if np.issubdtype(pedestal_dtype, np.integer):
+        pedestals = np.rint(pedestals)
+    pedestals = pedestals.astype(pedestal_dtype)
     
-    # Default pixel status (mark 1% of pixels as bad randomly)
-    pixel_status = np.zeros(shape, dtype=np.uint8)
+    # Default pixel status (mark ~1% of pixels as bad randomly)
     bad_fraction = 0.01
-    num_bad = int(np.prod(shape) * bad_fraction)
-    if num_bad > 0:
-        flat_indices = np.random.choice(np.prod(shape), num_bad, replace=False)
-        np.put(pixel_status, flat_indices, 1)
+    pixel_status = (rng.random(shape, dtype=np.float32) < bad_fraction).astype(np.uint8)
     
     # Default common mode regions (simple row-based for 2D detectors)
     common_mode = None
     if len(shape) == 2:
-        common_mode = np.zeros(shape, dtype=np.uint8)
         # Group rows to avoid uint8 overflow (max 255 regions)
         max_regions = 254  # Leave room for 0 = no correction
         rows_per_region = max(1, shape[0] // max_regions)
-        for i in range(shape[0]):
-            region_id = (i // rows_per_region) + 1
-            region_id = min(region_id, max_regions)  # Ensure no overflow
-            common_mode[i, :] = region_id
+        row_regions = np.minimum(np.arange(shape[0]) // rows_per_region + 1, max_regions)
+        common_mode = np.empty(shape, dtype=np.uint8)
+        common_mode[:] = row_regions[:, None]
     
     return CalibrationConstants(
         detector_name=detector_name,
@@ -539,13 +953,58 @@ def calibrate_detector_data(data: 'NDArray', detector_name: str, run_number: int
     Returns:
         Calibrated data
     """
-    manager = CalibrationManager(calibration_dir)
+    calibrator = _get_calibrator_or_default(data.shape, detector_name, run_number,
+                                            calibration_dir)
+    return calibrator.calibrate(data, **kwargs)
+
+
+def calibrate_detector_events(frames, detector_name: str, run_number: int,
+                              calibration_dir: Optional[Union[str, Path]] = None,
+                              max_workers: Optional[int] = None,
+                              **kwargs) -> List['NDArray']:
+    """
+    Calibrate a batch of events in parallel with automatic constant loading.
+    
+    Args:
+        frames: Sequence of raw detector frames (or an (N, ...) stack)
+        detector_name: Name of detector
+        run_number: Run number
+        calibration_dir: Directory containing calibration files
+        max_workers: Thread count for DetectorCalibrator.calibrate_many()
+        **kwargs: Additional arguments passed to calibrate()
+        
+    Returns:
+        List of calibrated frames, in input order
+    """
+    if len(frames) == 0:
+        return []
+    
+    calibrator = _get_calibrator_or_default(np.shape(frames[0]), detector_name,
+                                            run_number, calibration_dir)
+    return calibrator.calibrate_many(frames, max_workers=max_workers, **kwargs)
+
+
+@lru_cache(maxsize=8)
+def _get_manager(calibration_dir: Optional[Path]) -> CalibrationManager:
+    """
+    CalibrationManager shared by the convenience functions for one
+    calibration directory, so its constants and calibrators are loaded
+    once instead of on every call (clear with _get_manager.cache_clear()).
+    """
+    return CalibrationManager(calibration_dir)
+
+
+def _get_calibrator_or_default(shape: Tuple[int, ...], detector_name: str,
+                               run_number: int,
+                               calibration_dir: Optional[Union[str, Path]]) -> DetectorCalibrator:
+    """Load a calibrator, falling back to default constants with a warning"""
+    manager = _get_manager(Path(calibration_dir) if calibration_dir else None)
     calibrator = manager.get_calibrator(detector_name, run_number)
     
     if calibrator is None:
         warnings.warn(f"No calibration found for {detector_name} run {run_number}, "
                      "using default calibration")
-        constants = create_default_calibration(detector_name, data.shape, run_number)
+        constants = create_default_calibration(detector_name, shape, run_number)
         calibrator = DetectorCalibrator(constants)
     
-    return calibrator.calibrate(data, **kwargs)
\ No newline at end of file
+    return calibrator
@@ -5,55 +5,69 @@ Provides utilities to inspect and analyze XTC files.
 """
 
 import argparse
+import io
+import os
 import sys
 import time
+from contextlib import closing
 import numpy as np
-from .xtc_reader import XTCReader, get_xtc_info, print_xtc_tree
-from .data_types import parse_detector_data, is_image_type, get_type_description
+from .xtc_reader import (XTCReader, get_xtc_info, print_xtc_tree, walk_xtc_tree_iter,
+                         open_reader, iter_datagrams)
+from .data_types import (parse_detector_data, get_type_description, IMAGE_TYPE_IDS,
+                         CameraFrame, CSPadElement, Epix10ka2MData)
 from .binary_format import TypeId, transition_name
-from .geometry import create_cspad_geometry, create_pnccd_geometry, create_camera_geometry, compute_detector_coordinates
-from .epix_utils import get_detector_info, assemble_epix10ka2m_image, get_psana_geometry_info, assemble_epix10ka2m_psana_compatible
+
+# Geometry, Epix, calibration and output writer modules are imported inside
+# the code that uses them, so inspecting a file with info/dump does not load
+# them. numpy stays a top-level import: the binary format parsers need it
+# for every command anyway.
+
+
+# Type ID -> clean, short detector name used in output filenames
+_CLEAN_DETECTOR_NAME = {
+    TypeId.Id_Frame: "camera",
+    TypeId.Id_pnCCDframe: "pnccd", 
+    TypeId.Id_CspadElement: "cspad",
+    TypeId.Id_PrincetonFrame: "princeton",
+    TypeId.Id_Epix10kaArray: "epix10ka2m",
+    TypeId.Id_Experimental_6193: "epix10ka2m",
+    TypeId.Id_Experimental_117: "epix10ka2m", 
+    TypeId.Id_Experimental_118: "epix10ka2m",
+}
+
 
 def get_clean_detector_name(type_id: int) -> str:
     """Get a clean, short detector name for filenames"""
-    name_map = {
-        TypeId.Id_Frame: "camera",
-        TypeId.Id_pnCCDframe: "pnccd", 
-        TypeId.Id_CspadElement: "cspad",
-        TypeId.Id_PrincetonFrame: "princeton",
-        TypeId.Id_Epix10kaArray: "epix10ka2m",
-        TypeId.Id_Experimental_6193: "epix10ka2m",
-        TypeId.Id_Experimental_117: "epix10ka2m", 
-        TypeId.Id_Experimental_118: "epix10ka2m",
-    }
-    return name_map.get(type_id, f"type_{type_id}")
-from .geometry_parser import load_default_epix10ka2m_geometry, print_geometry_summary
-from .calibration import CalibrationManager, create_default_calibration, calibrate_detector_data
-
-
-def info_command(filename: str, max_events: int = 100):
+    name = _CLEAN_DETECTOR_NAME.get(type_id)
+    return name if name is not None else f"type_{type_id}"
+
+
+def info_command(filename: str, max_events: int = 100, reader: XTCReader = None):
     """Print summary information about XTC file"""
     print(f"Analyzing XTC file: {filename}")
     print("=" * 50)
     
     try:
-        info = get_xtc_info(filename, max_events=max_events)
+        info = get_xtc_info(filename, max_events=max_events, reader=reader)
         
-        print(f"File size: {info['file_size']:,} bytes")
-        print(f"Events analyzed: {info['events_analyzed']}")
-        print()
+        # The summary is written with a single call once it is complete
+        lines = [f"File size: {info['file_size']:,} bytes",
+                 f"Events analyzed: {info['events_analyzed']}",
+                 ""]
         
         if info['type_counts']:
-            print("Data types found:")
-            for type_name, count in sorted(info['type_counts'].items()):
-                print(f"  {type_name}: {count}")
-            print()
+            lines.append("Data types found:")
+            lines.extend(f"  {type_name}: {count}"
+                         for type_name, count in sorted(info['type_counts'].items()))
+            lines.append("")
         
         if info['damage_counts']:
-            print("Damage flags found:")
-            for damage, count in sorted(info['damage_counts'].items()):
-                print(f"  {damage}: {count}")
-            print()
+            lines.append("Damage flags found:")
+            lines.extend(f"  {damage}: {count}"
+                         for damage, count in sorted(info['damage_counts'].items()))
+            lines.append("")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
             
     except Exception as e:
         print(f"Error analyzing file: {e}")
@@ -62,45 +76,62 @@ def info_command(filename: str, max_events: int = 100):
     return 0
 
 
-def dump_command(filename: str, max_events: int = 10, show_tree: bool = False):
+# Number of events dump_command formats before writing them to stdout
+_DUMP_FLUSH_EVENTS = 64
+
+
+def dump_command(filename: str, max_events: int = 10, show_tree: bool = False,
+                 reader: XTCReader = None):
     """Dump XTC file contents in human-readable format"""
     print(f"Dumping XTC file: {filename}")
     print("=" * 50)
     
+    # Event text is collected in memory and written to stdout in blocks
+    # of _DUMP_FLUSH_EVENTS events rather than one print call per line
+    out = io.StringIO()
+    
     try:
-        with XTCReader(filename) as reader:
+        with open_reader(filename, reader, use_mmap=True) as reader:
             for i, (dgram, payload) in enumerate(reader):
                 if i >= max_events:
                     break
                 
-                print(f"\nEvent {i}:")
-                print(f"  Time: {dgram.seq.clock.as_double():.6f} seconds")
-                print(f"  Fiducials: {dgram.seq.stamp.fiducials}")
-                print(f"  Env: 0x{dgram.env.value:08x}")
-                print(f"  XTC: {get_type_description(dgram.xtc.contains.type_id)} "
-                      f"v{dgram.xtc.contains.version} "
-                      f"({dgram.xtc.extent} bytes)")
+                xtc = dgram.xtc
+                out.write(f"\nEvent {i}:\n"
+                          f"  Time: {dgram.seq.clock.as_double():.6f} seconds\n"
+                          f"  Fiducials: {dgram.seq.stamp.fiducials}\n"
+                          f"  Env: 0x{dgram.env.value:08x}\n"
+                          f"  XTC: {get_type_description(xtc.type_id)} "
+                          f"v{xtc.version} "
+                          f"({xtc.extent} bytes)\n")
+                
+                if xtc.damage.flags:
+                    out.write(f"  Damage: 0x{xtc.damage.flags:06x}\n")
                 
-                if dgram.xtc.damage.flags:
-                    print(f"  Damage: 0x{dgram.xtc.damage.flags:06x}")
+                if show_tree and len(payload) > 16:
+                    out.write("  XTC Tree:\n")
+                    # Skip first 16 bytes (rest of XTC header); view, not copy
+                    print_xtc_tree(memoryview(payload)[16:], file=out)
                 
-                if show_tree and len(payload) > 12:
-                    print("  XTC Tree:")
-                    print_xtc_tree(payload[12:])  # Skip first 12 bytes (rest of XTC header)
+                if (i + 1) % _DUMP_FLUSH_EVENTS == 0:
+                    sys.stdout.write(out.getvalue())
+                    out.seek(0)
+                    out.truncate()
                 
     except Exception as e:
+        sys.stdout.write(out.getvalue())
         print(f"Error dumping file: {e}")
         return 1
     
+    sys.stdout.write(out.getvalue())
+    sys.stdout.flush()
     return 0
 
 
-def extract_psana_style(exp: str, run: str, detector_name: str, output_dir: str = ".", max_events: int = 1000):
+def extract_psana_style(exp: str, run: str, detector_name: str, output_dir: str = ".", max_events: int = 1000,
+                        output_format: str = "npy"):
     """Extract detector data using psana-style experiment/run/detector specification"""
-    import os
-    import numpy as np
     from .detector_discovery import resolve_detector_from_psana_style
-    from .epix_utils import assemble_epix10ka2m_image, assemble_epix10ka2m_psana_compatible
     
     print(f"Psana-style extraction:")
     print(f"  Experiment: {exp}")
@@ -125,21 +156,182 @@ def extract_psana_style(exp: str, run: str, detector_name: str, output_dir: str
     
     os.makedirs(output_dir, exist_ok=True)
     
-    # Process first XTC file (or could iterate through all)
-    return extract_command_with_detector_info(xtc_files[0], output_dir, detector_info, max_events)
+    # Events of all files of the run are numbered consecutively
+    return extract_command_with_detector_info(xtc_files, output_dir, detector_info, max_events,
+                                              output_format=output_format)
 
 
-def extract_command(filename: str, output_dir: str = ".", detector_type: str = None, max_events: int = 1000):
+def extract_command(filename: str, output_dir: str = ".", detector_type: str = None, max_events: int = 1000,
+                    output_format: str = "npy", reader: XTCReader = None, jobs: int = 1):
     """Extract detector data from XTC file (original direct file method)"""
-    return extract_command_with_detector_info(filename, output_dir, None, max_events, detector_type)
+    return extract_command_with_detector_info(filename, output_dir, None, max_events, detector_type,
+                                              output_format, reader, jobs)
+
+
+def _extract_output_keys(type_id: int, version: int):
+    """
+    Detector name and the raw/simple/psana output keys for images of one
+    type ID and version.
+    """
+    detector_name = get_clean_detector_name(type_id)
+    key = f"{detector_name}_v{version}"
+    return detector_name, f"{key}_raw", f"{key}_simple", f"{key}_psana"
 
 
-def extract_command_with_detector_info(filename: str, output_dir: str, detector_info = None, max_events: int = 1000, detector_type: str = None):
-    """Extract detector data from XTC file with optional detector info"""
-    import os
-    import numpy as np
+def _extract_event(i: int, payload, wanted_types: frozenset, writer, state: dict) -> int:
+    """
+    Parse the wanted detector images of one event and hand them to writer.
+    
+    state carries per-run caches between events: 'output_keys' (raw
+    TypeId word -> _extract_output_keys() result), 'psana_mask' and
+    'images' (output key -> assembled image buffer reused every event;
+    writers copy or save an image before write() returns).
+    Returns the number of images written.
+    """
+    output_keys = state['output_keys']
+    images = state['images']
+    extracted_count = 0
+    
+    # Walk through XTC tree, yielding only detector image containers
+    # Skip first 16 bytes of payload (XTC header remainder) for tree walking;
+    # a memoryview so neither the event nor its containers are copied
+    actual_payload = memoryview(payload)[16:]
+    
+    for xtc, data in walk_xtc_tree_iter(actual_payload, max_level=5,
+                                        type_filter=wanted_types):
+        type_id = xtc.type_id
+        version = xtc.version
+        
+        # Detector name and output keys only depend on the type ID
+        # and version, so they are resolved once per pair
+        if xtc.typeid_raw not in output_keys:
+            output_keys[xtc.typeid_raw] = _extract_output_keys(type_id, version)
+        detector_name, raw_key, simple_key, psana_key = output_keys[xtc.typeid_raw]
+        
+        try:
+            # Parse detector data
+            parsed_data = parse_detector_data(data, type_id, version)
+            
+            # Branch on the parsed type (unparsed experimental payloads
+            # come back as raw bytes and are skipped)
+            if isinstance(parsed_data, (CameraFrame, CSPadElement)):
+                # Save raw detector data
+                writer.write(i, raw_key, parsed_data.data)
+                extracted_count += 1
+            
+            # Special handling for Epix10ka2M - save assembled images too
+            elif isinstance(parsed_data, Epix10ka2MData):
+                # Loaded on the first Epix event only (a sys.modules hit after)
+                from .epix_utils import (assemble_epix10ka2m_image, assemble_epix10ka2m_dual,
+                                         assemble_epix10ka2m_psana_compatible)
+                
+                # This is Epix10ka2M data - save raw frames
+                writer.write(i, raw_key, parsed_data.frames)
+                
+                # Simple and psana-compatible assembly in one pass over the
+                # frames; without a usable geometry only the simple one is made
+                simple_image = psana_image = None
+                try:
+                    simple_image, psana_image = assemble_epix10ka2m_dual(
+                        parsed_data.frames, simple_out=images.get(simple_key),
+                        psana_out=images.get(psana_key))
+                except Exception as e:
+                    print(f"Warning: Psana assembly failed: {e}")
+                    try:
+                        simple_image = assemble_epix10ka2m_image(
+                            parsed_data.frames, include_gaps=False, out=images.get(simple_key))
+                    except Exception as e:
+                        print(f"Warning: Simple assembly failed: {e}")
+                
+                # Save simple assembly
+                if simple_image is not None:
+                    images[simple_key] = simple_image
+                    writer.write(i, simple_key, simple_image)
+                
+                # Save psana-compatible assembly
+                if psana_image is not None:
+                    images[psana_key] = psana_image
+                    
+                    # Gap pixels are fixed by the geometry, so the validity
+                    # mask is computed once and saved alongside the images
+                    if state['psana_mask'] is None:
+                        mask = assemble_epix10ka2m_psana_compatible(
+                            np.ones_like(parsed_data.frames)) > 0
+                        mask.flags.writeable = False
+                        state['psana_mask'] = mask
+                    writer.write(i, psana_key, psana_image, mask=state['psana_mask'])
+                
+                extracted_count += 3  # Raw + simple + psana
+        
+        except Exception as e:
+            print(f"Warning: Failed to parse {detector_name} data in event {i}: {e}")
     
-    print(f"Extracting detector data from: {filename}")
+    return extracted_count
+
+
+# Per-process caches of _extract_events_in_worker; 'reader' is the open
+# reader of the file the worker was last given, 'mask_keys' the image keys
+# whose mask this worker already saved
+_worker_state = {'output_keys': {}, 'psana_mask': None, 'images': {}, 'reader': None,
+                 'mask_keys': set()}
+
+# Events handed to a worker process per task
+_PARALLEL_TASK_EVENTS = 8
+
+
+def _extract_events_in_worker(filename: str, events: list, wanted_types: frozenset, output_dir: str):
+    """
+    Process pool task: extract (event index, file offset) events of
+    filename to per-event .npy files. The worker reads the events from
+    its own memory map of the file, so no event data is pickled.
+    """
+    from .output_writers import NpyEventWriter
+    
+    reader = _worker_state['reader']
+    if reader is None or reader.filename != filename:
+        if reader is not None:
+            reader.close()
+        reader = _worker_state['reader'] = XTCReader(filename, use_mmap=True)
+    
+    writer = NpyEventWriter(output_dir, mask_keys=_worker_state['mask_keys'])
+    count = 0
+    for i, offset in events:
+        dgram, payload = reader.read_datagram(offset)
+        count += _extract_event(i, payload, wanted_types, writer, _worker_state)
+    return count, writer.close()
+
+
+def _open_events(filename, reader: XTCReader = None):
+    """
+    Context manager over the (dgram, payload) pairs of one XTC file, or
+    of a list of files read back to back (see iter_datagrams).
+    """
+    if isinstance(filename, (list, tuple)):
+        return closing(iter_datagrams(filename, use_mmap=True))
+    return open_reader(filename, reader, use_mmap=True)
+
+
+def extract_command_with_detector_info(filename, output_dir: str, detector_info = None, max_events: int = 1000, detector_type: str = None,
+                                       output_format: str = "npy", reader: XTCReader = None, jobs: int = 1):
+    """
+    Extract detector data from XTC file with optional detector info.
+    
+    filename may also be a list of files (e.g. all chunks of a run),
+    whose events are numbered consecutively and share max_events.
+    output_format selects the on-disk layout: "npy" writes one file per
+    event and image, "stacked" writes one (N, ...) array per detector
+    image kind (see output_writers). An already open reader may be
+    passed in to reuse its file handle (see batch_command).
+    
+    With jobs > 1 (npy output only), events are read in order and their
+    parsing, assembly and saving is spread over a pool of jobs processes.
+    """
+    from .output_writers import create_output_writer
+    
+    if isinstance(filename, (list, tuple)):
+        print(f"Extracting detector data from {len(filename)} files: {', '.join(filename)}")
+    else:
+        print(f"Extracting detector data from: {filename}")
     print(f"Output directory: {output_dir}")
     
     if detector_info:
@@ -148,104 +340,219 @@ def extract_command_with_detector_info(filename: str, output_dir: str, detector_
     elif detector_type:
         print(f"Filtering for detector type: {detector_type}")
     
+    if jobs > 1 and output_format != "npy":
+        print(f"Error: --jobs requires --output-format npy (got {output_format})")
+        return 1
+    
     os.makedirs(output_dir, exist_ok=True)
     
+    # Image type IDs to extract, with the detector type filter applied once
+    # here so the tree walk only yields (and slices) wanted containers
+    if detector_type:
+        wanted_types = frozenset(
+            tid for tid in IMAGE_TYPE_IDS
+            if detector_type.lower() in get_clean_detector_name(tid).lower())
+    else:
+        wanted_types = IMAGE_TYPE_IDS
+    
+    if jobs > 1:
+        return _extract_parallel(filename, output_dir, max_events, wanted_types, reader, jobs)
+    
+    try:
+        writer = create_output_writer(output_format, output_dir, capacity=max_events)
+    except ImportError as e:
+        print(f"Error: {e}")
+        return 1
     extracted_count = 0
+    state = {'output_keys': {}, 'psana_mask': None, 'images': {}}
     
     try:
-        with XTCReader(filename) as reader:
-            for i, (dgram, payload) in enumerate(reader):
+        with _open_events(filename, reader) as events:
+            for i, (dgram, payload) in enumerate(events):
                 if i >= max_events:
                     break
                 
-                # Walk through XTC tree looking for detector data
-                from .xtc_reader import walk_xtc_tree
-                # Skip first 16 bytes of payload (XTC header remainder) for tree walking
-                actual_payload = payload[16:] if len(payload) > 16 else b''
-                tree = walk_xtc_tree(actual_payload, max_level=5)
+                extracted_count += _extract_event(i, payload, wanted_types, writer, state)
+    
+    except Exception as e:
+        print(f"Error extracting data: {e}")
+        return 1
+    
+    finally:
+        try:
+            outputs = writer.close()
+        except Exception as e:
+            # Background saves report their errors when the writer is closed
+            print(f"Error writing output: {e}")
+            outputs = None
+    
+    if outputs is None:
+        return 1
+    
+    for path, shape in outputs:
+        print(f"Saved {path} (shape: {shape})")
+    
+    print(f"\nExtracted {extracted_count} detector images")
+    return 0
+
+
+def _extract_parallel(filename, output_dir: str, max_events: int, wanted_types: frozenset,
+                      reader: XTCReader = None, jobs: int = 2):
+    """
+    Extract events on a process pool. Each file is indexed here with one
+    pass over the datagram headers; workers are then sent batches of
+    _PARALLEL_TASK_EVENTS (event index, file offset) pairs and read the
+    events themselves. At most 2 * jobs batches are in flight at once,
+    and results are collected in event order.
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    
+    extracted_count = 0
+    outputs = []
+    pending = deque()
+    
+    def collect(future):
+        nonlocal extracted_count
+        count, event_outputs = future.result()
+        extracted_count += count
+        outputs.extend(event_outputs)
+    
+    filenames = list(filename) if isinstance(filename, (list, tuple)) else [filename]
+    
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            first_event = 0
+            for name in filenames:
+                if first_event >= max_events:
+                    break
                 
-                for level, xtc, data in tree:
-                    type_id = xtc.contains.type_id
-                    
-                    if is_image_type(type_id):
-                        # Get clean detector name for filenames
-                        detector_name = get_clean_detector_name(type_id)
-                        
-                        # Filter by detector type if specified
-                        if detector_type and detector_type.lower() not in detector_name.lower():
-                            continue
-                        
-                        try:
-                            # Parse detector data
-                            parsed_data = parse_detector_data(data, type_id, xtc.contains.version)
-                            
-                            if hasattr(parsed_data, 'data') and isinstance(parsed_data.data, np.ndarray):
-                                # Save raw detector data
-                                output_file = os.path.join(output_dir, 
-                                    f"event_{i:04d}_{detector_name}_v{xtc.contains.version}_raw.npy")
-                                np.save(output_file, parsed_data.data)
-                                
-                                print(f"Saved {detector_name} raw data: {output_file} "
-                                      f"(shape: {parsed_data.data.shape})")
-                                extracted_count += 1
-                                
-                            # Special handling for Epix10ka2M - save assembled images too
-                            elif hasattr(parsed_data, 'frames') and isinstance(parsed_data.frames, np.ndarray):
-                                # This is Epix10ka2M data - save raw frames
-                                raw_file = os.path.join(output_dir, 
-                                    f"event_{i:04d}_{detector_name}_v{xtc.contains.version}_raw.npy")
-                                np.save(raw_file, parsed_data.frames)
-                                print(f"Saved {detector_name} raw frames: {raw_file} "
-                                      f"(shape: {parsed_data.frames.shape})")
-                                
-                                # Save simple assembly
-                                try:
-                                    simple_image = assemble_epix10ka2m_image(parsed_data.frames, include_gaps=False)
-                                    simple_file = os.path.join(output_dir,
-                                        f"event_{i:04d}_{detector_name}_v{xtc.contains.version}_simple.npy")
-                                    np.save(simple_file, simple_image)
-                                    print(f"Saved {detector_name} simple assembly: {simple_file} "
-                                          f"(shape: {simple_image.shape})")
-                                except Exception as e:
-                                    print(f"Warning: Simple assembly failed: {e}")
-                                
-                                # Save psana-compatible assembly
-                                try:
-                                    psana_image = assemble_epix10ka2m_psana_compatible(parsed_data.frames)
-                                    psana_file = os.path.join(output_dir,
-                                        f"event_{i:04d}_{detector_name}_v{xtc.contains.version}_psana.npy")
-                                    np.save(psana_file, psana_image)
-                                    print(f"Saved {detector_name} psana assembly: {psana_file} "
-                                          f"(shape: {psana_image.shape})")
-                                except Exception as e:
-                                    print(f"Warning: Psana assembly failed: {e}")
-                                
-                                extracted_count += 3  # Raw + simple + psana
-                        
-                        except Exception as e:
-                            print(f"Warning: Failed to parse {detector_name} data in event {i}: {e}")
+                # An open reader is only passed in for a single file
+                with open_reader(name, reader if len(filenames) == 1 else None) as file_reader:
+                    offsets = file_reader.datagram_offsets(max_events - first_event)
+                
+                for start in range(0, len(offsets), _PARALLEL_TASK_EVENTS):
+                    events = [(first_event + k, offset) for k, offset in
+                              enumerate(offsets[start:start + _PARALLEL_TASK_EVENTS], start)]
+                    pending.append(executor.submit(_extract_events_in_worker, name, events,
+                                                   wanted_types, output_dir))
+                    if len(pending) >= 2 * jobs:
+                        collect(pending.popleft())
+                
+                first_event += len(offsets)
+            
+            while pending:
+                collect(pending.popleft())
     
     except Exception as e:
         print(f"Error extracting data: {e}")
         return 1
     
+    for path, shape in outputs:
+        print(f"Saved {path} (shape: {shape})")
+    
     print(f"\nExtracted {extracted_count} detector images")
     return 0
 
 
-def geometry_command(detector_type: str, output_file: str = None):
-    """Generate and show detector geometry information"""
+# Full detector data shape per detector type (calibration create-default)
+_DETECTOR_SHAPES = {
+    "cspad": (32, 185, 388),  # 32 segments of 185x388
+    "pnccd": (512, 512),
+    "camera": (1024, 1024),
+    "epix10ka2m": (16, 352, 384),  # 16 panels of 352x384
+}
+
+# Predefined geometries shown by the geometry command, with the arguments
+# passed to get_detector_geometry/get_detector_coordinates
+_GEOMETRY_ARGS = {
+    "cspad": {},
+    "pnccd": {},
+    "camera": {"width": 1024, "height": 1024},
+}
+
+
+# Commands that can be run from a batch script, by script name
+_BATCH_COMMANDS = {
+    "info": info_command,
+    "dump": dump_command,
+    "extract": extract_command,
+}
+
+
+def batch_command(filename: str, script_file: str):
+    """
+    Run several file commands over one XTC file, sharing a single reader.
+    
+    The script is a JSON list of steps; each step names a command (info,
+    dump or extract) and gives its keyword arguments, e.g.
+    
+        [{"command": "info", "max_events": 100},
+         {"command": "extract", "output_dir": "out", "detector_type": "epix"}]
+    """
+    import inspect
+    import json
+    
+    try:
+        with open(script_file) as f:
+            steps = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading batch script: {e}")
+        return 1
+    
+    if not isinstance(steps, list):
+        print("Error reading batch script: expected a JSON list of steps")
+        return 1
+    for n, step in enumerate(steps):
+        if not isinstance(step, dict):
+            print(f"Invalid batch step {n}: expected a JSON object, got {step!r}")
+            return 1
+    
+    with XTCReader(filename, use_mmap=True) as reader:
+        for n, step in enumerate(steps):
+            options = dict(step)
+            command = options.pop("command", None)
+            func = _BATCH_COMMANDS.get(command)
+            if func is None:
+                print(f"Unknown batch command in step {n}: {command}")
+                print(f"Available commands: {', '.join(_BATCH_COMMANDS)}")
+                return 1
+            
+            # Only the option check is guarded: a TypeError raised while the
+            # command runs is a bug in it, and keeps its traceback
+            try:
+                inspect.signature(func).bind(filename, reader=reader, **options)
+            except TypeError as e:
+                print(f"Invalid options for {command} in step {n}: {e}")
+                return 1
+            
+            result = func(filename, reader=reader, **options)
+            if result:
+                return result
+    
+    return 0
+
+
+def geometry_command(detector_type: str, output_file: str = None, compress: bool = False):
+    """
+    Generate and show detector geometry information.
+    
+    Coordinates are saved to output_file uncompressed (np.savez) unless
+    compress is set, which trades CPU time for a smaller file.
+    """
+    from .geometry import get_detector_geometry, get_detector_coordinates
+    from .epix_utils import get_detector_info, get_psana_geometry_info
+    from .geometry_parser import load_default_epix10ka2m_geometry, print_geometry_summary
+    
     print(f"Generating {detector_type} geometry...")
     
     try:
         # Create geometry based on detector type
-        if detector_type.lower() == 'cspad':
-            geometry = create_cspad_geometry()
-        elif detector_type.lower() == 'pnccd':
-            geometry = create_pnccd_geometry()
-        elif detector_type.lower() == 'camera':
-            geometry = create_camera_geometry()
-        elif detector_type.lower() == 'epix10ka2m':
+        detector_key = detector_type.lower()
+        geometry_args = _GEOMETRY_ARGS.get(detector_key)
+        if geometry_args is not None:
+            geometry = get_detector_geometry(detector_key, **geometry_args)
+        elif detector_key == 'epix10ka2m':
             # Handle Epix10ka2M detector info with both simple and psana-compatible geometry
             print("=== Simple Assembly Info ===")
             detector_info = get_detector_info()
@@ -302,18 +609,18 @@ def geometry_command(detector_type: str, output_file: str = None):
         
         # Compute coordinates
         print("Computing detector coordinates...")
-        coords = compute_detector_coordinates(geometry)
+        coords = get_detector_coordinates(detector_key, **geometry_args)
         print(f"Coordinate arrays shape: {coords.x_coords.shape}")
         print(f"X range: {coords.x_coords.min():.1f} to {coords.x_coords.max():.1f} μm")
         print(f"Y range: {coords.y_coords.min():.1f} to {coords.y_coords.max():.1f} μm")
         
         # Save coordinates if requested
         if output_file:
-            import numpy as np
-            np.savez(output_file,
-                    x_coords=coords.x_coords,
-                    y_coords=coords.y_coords,
-                    z_coords=coords.z_coords)
+            save = np.savez_compressed if compress else np.savez
+            save(output_file,
+                 x_coords=coords.x_coords,
+                 y_coords=coords.y_coords,
+                 z_coords=coords.z_coords)
             print(f"Coordinates saved to: {output_file}")
         
         return 0
@@ -323,9 +630,25 @@ def geometry_command(detector_type: str, output_file: str = None):
         return 1
 
 
+def _count_bad_pixels(pixel_status: np.ndarray) -> int:
+    """Number of pixels with a status > 0"""
+    if pixel_status.dtype.kind in 'bu':
+        # Unsigned status: nonzero is bad, counted without a boolean temporary
+        return int(np.count_nonzero(pixel_status))
+    return int(np.count_nonzero(pixel_status > 0))
+
+
 def calibration_command(action: str, detector_type: str = None, run_number: int = None,
-                       calibration_dir: str = None, output_file: str = None):
-    """Manage detector calibration constants and apply calibrations"""
+                       calibration_dir: str = None, output_file: str = None,
+                       detailed: bool = False):
+    """
+    Manage detector calibration constants and apply calibrations.
+    
+    The info action prints array shapes and dtypes only; with detailed
+    it also computes the pedestal mean, bad pixel count and number of
+    common mode regions, which each scan the full arrays.
+    """
+    from .calibration import CalibrationManager, create_default_calibration
     
     if action == "test":
         # Test calibration system
@@ -350,15 +673,8 @@ def calibration_command(action: str, detector_type: str = None, run_number: int
         print(f"Creating default calibration for {detector_type} run {run_number}...")
         
         # Determine detector shape based on type
-        if detector_type.lower() == "cspad":
-            shape = (32, 185, 388)  # 32 segments of 185x388
-        elif detector_type.lower() == "pnccd":
-            shape = (512, 512)
-        elif detector_type.lower() == "camera":
-            shape = (1024, 1024)
-        elif detector_type.lower() == "epix10ka2m":
-            shape = (16, 352, 384)  # 16 panels of 352x384
-        else:
+        shape = _DETECTOR_SHAPES.get(detector_type.lower())
+        if shape is None:
             print(f"Unknown detector type: {detector_type}")
             return 1
         
@@ -368,7 +684,7 @@ def calibration_command(action: str, detector_type: str = None, run_number: int
         print(f"  Run: {constants.run_number}")
         print(f"  Pedestals shape: {constants.pedestals.shape}")
         print(f"  Pixel status shape: {constants.pixel_status.shape}")
-        print(f"  Bad pixels: {np.sum(constants.pixel_status > 0)}")
+        print(f"  Bad pixels: {_count_bad_pixels(constants.pixel_status)}")
         
         if output_file:
             np.savez(output_file,
@@ -401,16 +717,26 @@ def calibration_command(action: str, detector_type: str = None, run_number: int
         print(f"  Run: {constants.run_number}")
         print(f"  Valid: {constants.is_valid()}")
         
+        if not detailed:
+            for label, array in (("Pedestals", constants.pedestals),
+                                 ("Pixel status", constants.pixel_status),
+                                 ("Common mode", constants.common_mode)):
+                if array is not None:
+                    print(f"  {label}: {array.shape} {array.dtype}")
+            return 0
+        
         if constants.pedestals is not None:
-            print(f"  Pedestals: {constants.pedestals.shape}, mean={np.mean(constants.pedestals):.1f}")
+            print(f"  Pedestals: {constants.pedestals.shape}, mean={constants.pedestals.mean(dtype=np.float64):.1f}")
         
         if constants.has_pixel_status():
-            bad_pixels = np.sum(constants.pixel_status > 0)
-            total_pixels = np.prod(constants.pixel_status.shape)
+            bad_pixels = _count_bad_pixels(constants.pixel_status)
+            total_pixels = constants.pixel_status.size
             print(f"  Bad pixels: {bad_pixels}/{total_pixels} ({100*bad_pixels/total_pixels:.1f}%)")
         
         if constants.has_common_mode():
-            regions = np.unique(constants.common_mode)
+            # Reuse the region table cached on the constants instead of
+            # sorting the region map again with np.unique
+            regions = constants.region_layout().region_ids
             print(f"  Common mode regions: {len(regions)}")
         
         return 0
@@ -427,9 +753,6 @@ def test_command():
     
     # Try to import and run tests from the tests directory
     try:
-        import sys
-        import os
-        
         # Add tests directory to path
         tests_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'tests')
         if os.path.exists(tests_dir):
@@ -447,39 +770,23 @@ def test_command():
         return 1
 
 
-def main():
-    """Main command-line interface"""
-    parser = argparse.ArgumentParser(
-        description="XTC1 Reader - Minimal LCLS1 XTC file reader",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  xtc1reader info data.xtc                    # Show file summary  
-  xtc1reader dump data.xtc --max-events 5    # Dump first 5 events
-  xtc1reader extract data.xtc --detector cspad  # Extract CSPad images
-  xtc1reader geometry cspad                   # Show CSPad geometry
-  xtc1reader calibration test                 # Test calibration system
-  xtc1reader test                             # Run tests
-        """
-    )
-    
-    subparsers = parser.add_subparsers(dest='command', help='Available commands')
-    
-    # Info command
+def _add_info_parser(subparsers):
     info_parser = subparsers.add_parser('info', help='Show XTC file information')
     info_parser.add_argument('filename', help='XTC file to analyze')
     info_parser.add_argument('--max-events', type=int, default=100,
                            help='Maximum events to analyze (default: 100)')
-    
-    # Dump command
+
+
+def _add_dump_parser(subparsers):
     dump_parser = subparsers.add_parser('dump', help='Dump XTC file contents')
     dump_parser.add_argument('filename', help='XTC file to dump')
     dump_parser.add_argument('--max-events', type=int, default=10,
                            help='Maximum events to dump (default: 10)')
     dump_parser.add_argument('--tree', action='store_true',
                            help='Show XTC tree structure')
-    
-    # Extract command
+
+
+def _add_extract_parser(subparsers):
     extract_parser = subparsers.add_parser('extract', help='Extract detector data')
     extract_parser.add_argument('filename', help='XTC file to extract from')
     extract_parser.add_argument('--output-dir', default='.',
@@ -488,8 +795,16 @@ Examples:
                                help='Filter by detector type (e.g., cspad, pnccd)')
     extract_parser.add_argument('--max-events', type=int, default=1000,
                                help='Maximum events to process (default: 1000)')
-    
-    # Psana-style extract command
+    extract_parser.add_argument('--output-format', choices=['npy', 'stacked', 'hdf5'], default='npy',
+                               help='npy: one file per event and image; '
+                                    'stacked: one (N, ...) file per image kind; '
+                                    'hdf5: one compressed extracted.h5 file (default: npy)')
+    extract_parser.add_argument('--jobs', '-j', type=int, default=1,
+                               help='Worker processes for parsing and saving events '
+                                    '(npy output only, default: 1)')
+
+
+def _add_extract_psana_parser(subparsers):
     psana_parser = subparsers.add_parser('extract-psana', help='Extract detector data using psana-style parameters')
     psana_parser.add_argument('experiment', help='Experiment name (e.g., mfx100903824)')
     psana_parser.add_argument('run', help='Run number (e.g., 105)')  
@@ -498,14 +813,29 @@ Examples:
                              help='Output directory (default: current)')
     psana_parser.add_argument('--max-events', type=int, default=1000,
                              help='Maximum events to process (default: 1000)')
-    
-    # Geometry command
+    psana_parser.add_argument('--output-format', choices=['npy', 'stacked', 'hdf5'], default='npy',
+                             help='npy: one file per event and image; '
+                                  'stacked: one (N, ...) file per image kind; '
+                                  'hdf5: one compressed extracted.h5 file (default: npy)')
+
+
+def _add_batch_parser(subparsers):
+    batch_parser = subparsers.add_parser('batch', help='Run several commands on one XTC file')
+    batch_parser.add_argument('filename', help='XTC file to process')
+    batch_parser.add_argument('script', help='JSON list of steps, e.g. '
+                              '[{"command": "info"}, {"command": "extract", "output_dir": "out"}]')
+
+
+def _add_geometry_parser(subparsers):
     geometry_parser = subparsers.add_parser('geometry', help='Generate detector geometry')
     geometry_parser.add_argument('detector_type', choices=['cspad', 'pnccd', 'camera', 'epix10ka2m'],
                                 help='Detector type to generate geometry for')
     geometry_parser.add_argument('--output', '-o', help='Save coordinates to file (.npz format)')
-    
-    # Calibration command
+    geometry_parser.add_argument('--compress', action='store_true',
+                                help='Compress the saved coordinates (smaller file, slower save)')
+
+
+def _add_calibration_parser(subparsers):
     calibration_parser = subparsers.add_parser('calibration', help='Manage detector calibration')
     calibration_parser.add_argument('action', choices=['test', 'create-default', 'info'],
                                    help='Calibration action to perform')
@@ -514,11 +844,58 @@ Examples:
     calibration_parser.add_argument('--run-number', type=int, help='Run number')
     calibration_parser.add_argument('--calibration-dir', help='Calibration directory')
     calibration_parser.add_argument('--output', '-o', help='Output file for calibration data')
+    calibration_parser.add_argument('--detailed', action='store_true',
+                                   help='info: also compute pedestal mean, bad pixel and region counts')
+
+
+def _add_test_parser(subparsers):
+    subparsers.add_parser('test', help='Run internal tests')
+
+
+# Command name -> function adding its subparser, in --help order
+_SUBPARSERS = {
+    'info': _add_info_parser,
+    'dump': _add_dump_parser,
+    'extract': _add_extract_parser,
+    'extract-psana': _add_extract_psana_parser,
+    'batch': _add_batch_parser,
+    'geometry': _add_geometry_parser,
+    'calibration': _add_calibration_parser,
+    'test': _add_test_parser,
+}
+
+
+def main(argv=None):
+    """Main command-line interface"""
+    parser = argparse.ArgumentParser(
+        description="XTC1 Reader - Minimal LCLS1 XTC file reader",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  xtc1reader info data.xtc                    # Show file summary  
+  xtc1reader dump data.xtc --max-events 5    # Dump first 5 events
+  xtc1reader extract data.xtc --detector cspad  # Extract CSPad images
+  xtc1reader batch data.xtc steps.json        # Run several commands on one file
+  xtc1reader geometry cspad                   # Show CSPad geometry
+  xtc1reader calibration test                 # Test calibration system
+  xtc1reader test                             # Run tests
+        """
+    )
     
-    # Test command
-    test_parser = subparsers.add_parser('test', help='Run internal tests')
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
-    args = parser.parse_args()
+    # Only the subparser of the requested command is built; top-level
+    # --help, a missing or an unknown command get all of them
+    if argv is None:
+        argv = sys.argv[1:]
+    command = argv[0] if argv else None
+    if command in _SUBPARSERS:
+        _SUBPARSERS[command](subparsers)
+    else:
+        for add_parser in _SUBPARSERS.values():
+            add_parser(subparsers)
+    
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
@@ -532,17 +909,22 @@ Examples:
         return dump_command(args.filename, args.max_events, args.tree)
     
     elif args.command == 'extract':
-        return extract_command(args.filename, args.output_dir, args.detector, args.max_events)
+        return extract_command(args.filename, args.output_dir, args.detector, args.max_events,
+                               args.output_format, jobs=args.jobs)
     
     elif args.command == 'extract-psana':
-        return extract_psana_style(args.experiment, args.run, args.detector, args.output_dir, args.max_events)
+        return extract_psana_style(args.experiment, args.run, args.detector, args.output_dir, args.max_events,
+                                   args.output_format)
+    
+    elif args.command == 'batch':
+        return batch_command(args.filename, args.script)
     
     elif args.command == 'geometry':
-        return geometry_command(args.detector_type, args.output)
+        return geometry_command(args.detector_type, args.output, args.compress)
     
     elif args.command == 'calibration':
         return calibration_command(args.action, args.detector_type, args.run_number,
-                                 args.calibration_dir, args.output)
+                                 args.calibration_dir, args.output, args.detailed)
     
     elif args.command == 'test':
         return test_command()
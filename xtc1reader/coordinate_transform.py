@@ -5,14 +5,23 @@ Based on psana GeometryObject coordinate transformation logic.
 Implements rotations, translations, and coordinate system conversions.
 """
 
+import math
 import numpy as np
-from typing import Tuple, TYPE_CHECKING
+from functools import lru_cache
+from typing import Optional, Tuple, TYPE_CHECKING
 from .geometry_definitions import PanelGeometry, CoordinateArrays, PixelIndices
 
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
 
+@lru_cache(maxsize=256)
+def _cos_sin(angle_deg: float) -> Tuple[float, float]:
+    """(cos, sin) of an angle in degrees; panel angles repeat, so cached"""
+    angle_rad = math.radians(angle_deg)
+    return math.cos(angle_rad), math.sin(angle_rad)
+
+
 def apply_rotation_z(x: 'NDArray', y: 'NDArray', angle_deg: float) -> Tuple['NDArray', 'NDArray']:
     """
     Apply rotation around Z-axis.
@@ -27,12 +36,13 @@ def apply_rotation_z(x: 'NDArray', y: 'NDArray', angle_deg: float) -> Tuple['NDA
     if angle_deg == 0:
         return x, y
     
-    angle_rad = np.radians(angle_deg)
-    cos_a = np.cos(angle_rad)
-    sin_a = np.sin(angle_rad)
+    cos_a, sin_a = _cos_sin(angle_deg)
     
-    x_rot = x * cos_a - y * sin_a
-    y_rot = x * sin_a + y * cos_a
+    # Accumulate in place into each product so only one temporary is live
+    x_rot = np.multiply(x, cos_a)
+    x_rot -= np.multiply(y, sin_a)
+    y_rot = np.multiply(x, sin_a)
+    y_rot += np.multiply(y, cos_a)
     
     return x_rot, y_rot
 
@@ -51,12 +61,13 @@ def apply_rotation_y(x: 'NDArray', z: 'NDArray', angle_deg: float) -> Tuple['NDA
     if angle_deg == 0:
         return x, z
     
-    angle_rad = np.radians(angle_deg)
-    cos_a = np.cos(angle_rad)
-    sin_a = np.sin(angle_rad)
+    cos_a, sin_a = _cos_sin(angle_deg)
     
-    x_rot = x * cos_a + z * sin_a
-    z_rot = -x * sin_a + z * cos_a
+    # Accumulate in place into each product so only one temporary is live
+    x_rot = np.multiply(x, cos_a)
+    x_rot += np.multiply(z, sin_a)
+    z_rot = np.multiply(z, cos_a)
+    z_rot -= np.multiply(x, sin_a)
     
     return x_rot, z_rot
 
@@ -75,39 +86,60 @@ def apply_rotation_x(y: 'NDArray', z: 'NDArray', angle_deg: float) -> Tuple['NDA
     if angle_deg == 0:
         return y, z
     
-    angle_rad = np.radians(angle_deg)
-    cos_a = np.cos(angle_rad)
-    sin_a = np.sin(angle_rad)
+    cos_a, sin_a = _cos_sin(angle_deg)
     
-    y_rot = y * cos_a - z * sin_a
-    z_rot = y * sin_a + z * cos_a
+    # Accumulate in place into each product so only one temporary is live
+    y_rot = np.multiply(y, cos_a)
+    y_rot -= np.multiply(z, sin_a)
+    z_rot = np.multiply(y, sin_a)
+    z_rot += np.multiply(z, cos_a)
     
     return y_rot, z_rot
 
 
+def rotation_matrix(rot_z: float, rot_y: float, rot_x: float) -> 'NDArray':
+    """
+    3x3 matrix of the rotation sequence Z → Y → X (same as psana), i.e.
+    Rx @ Ry @ Rz with the axis rotations of apply_rotation_{z,y,x}.
+    
+    Args:
+        rot_z, rot_y, rot_x: Rotation angles in degrees
+        
+    Returns:
+        (3, 3) rotation matrix acting on column vectors (x, y, z)
+    """
+    cz, sz = _cos_sin(rot_z)
+    cy, sy = _cos_sin(rot_y)
+    cx, sx = _cos_sin(rot_x)
+    
+    rz = np.array([[cz, -sz, 0.0], [sz, cz, 0.0], [0.0, 0.0, 1.0]])
+    ry = np.array([[cy, 0.0, sy], [0.0, 1.0, 0.0], [-sy, 0.0, cy]])
+    rx = np.array([[1.0, 0.0, 0.0], [0.0, cx, -sx], [0.0, sx, cx]])
+    
+    return rx @ ry @ rz
+
+
 def apply_3d_rotation(x: 'NDArray', y: 'NDArray', z: 'NDArray', 
                      rot_z: float, rot_y: float, rot_x: float) -> Tuple['NDArray', 'NDArray', 'NDArray']:
     """
     Apply 3D rotation sequence: Z → Y → X (same as psana).
     
+    The three axis rotations are composed into one matrix (see
+    rotation_matrix) and applied in a single product over the stacked
+    coordinates, instead of one pass over the arrays per axis.
+    
     Args:
         x, y, z: Coordinate arrays
         rot_z, rot_y, rot_x: Rotation angles in degrees
         
     Returns:
-        (x_rot, y_rot, z_rot): Rotated coordinate arrays
+        (x_rot, y_rot, z_rot): Rotated coordinate arrays (new arrays)
     """
-    # Apply rotations in order: Z, Y, X (psana convention)
-    x1, y1 = apply_rotation_z(x, y, rot_z)
-    z1 = z.copy()
-    
-    x2, z2 = apply_rotation_y(x1, z1, rot_y)
-    y2 = y1.copy()
-    
-    y3, z3 = apply_rotation_x(y2, z2, rot_x)
-    x3 = x2.copy()
+    shape = np.shape(x)
+    xyz = np.stack((np.ravel(x), np.ravel(y), np.ravel(z)))
+    rotated = rotation_matrix(rot_z, rot_y, rot_x) @ xyz
     
-    return x3, y3, z3
+    return rotated[0].reshape(shape), rotated[1].reshape(shape), rotated[2].reshape(shape)
 
 
 def apply_translation(x: 'NDArray', y: 'NDArray', z: 'NDArray',
@@ -125,6 +157,10 @@ def apply_translation(x: 'NDArray', y: 'NDArray', z: 'NDArray',
     return x + dx, y + dy, z + dz
 
 
+# [R | t] of a panel that is neither rotated nor moved
+_IDENTITY_3X4 = np.eye(3, 4)
+
+
 def transform_panel_coordinates(x_panel: 'NDArray', y_panel: 'NDArray', z_panel: 'NDArray',
                                panel_geometry: PanelGeometry,
                                do_tilt: bool = True) -> CoordinateArrays:
@@ -139,27 +175,24 @@ def transform_panel_coordinates(x_panel: 'NDArray', y_panel: 'NDArray', z_panel:
         do_tilt: Whether to apply tilt corrections
         
     Returns:
-        CoordinateArrays with transformed coordinates in detector frame
+        CoordinateArrays with transformed coordinates in detector frame.
+        For an identity geometry (no rotation, tilt or offset) these are
+        the input arrays themselves, not copies.
     """
-    # Start with panel coordinates
-    x, y, z = x_panel.copy(), y_panel.copy(), z_panel.copy()
-    
-    # Get transformation parameters
-    pos = panel_geometry.position_um
-    rot = panel_geometry.rotation_deg
-    tilt = panel_geometry.tilt_deg
-    
-    # Apply rotations (design + tilt if enabled)
-    rot_z_total = rot[0] + (tilt[0] if do_tilt else 0)
-    rot_y_total = rot[1] + (tilt[1] if do_tilt else 0)
-    rot_x_total = rot[2] + (tilt[2] if do_tilt else 0)
+    # [R | t] is built once per panel and cached on the geometry object
+    affine = panel_geometry.affine_3x4 if do_tilt else panel_geometry.affine_3x4_untilted
     
-    x_rot, y_rot, z_rot = apply_3d_rotation(x, y, z, rot_z_total, rot_y_total, rot_x_total)
+    if np.array_equal(affine, _IDENTITY_3X4):
+        return CoordinateArrays(np.asarray(x_panel), np.asarray(y_panel), np.asarray(z_panel))
     
-    # Apply translation
-    x_final, y_final, z_final = apply_translation(x_rot, y_rot, z_rot, pos[0], pos[1], pos[2])
+    # Rotate and translate in one product over the (3, N) coordinates; the
+    # result is a fresh (3, ...) buffer whose rows are returned as views
+    xyz = CoordinateArrays(x_panel, y_panel, z_panel).xyz
+    shape = xyz.shape[1:]
+    out = np.matmul(affine[:, :3], xyz.reshape(3, -1))
+    out += affine[:, 3:]
     
-    return CoordinateArrays(x_final, y_final, z_final)
+    return CoordinateArrays.from_xyz(out.reshape((3,) + shape))
 
 
 def coordinates_to_pixel_indices(x: 'NDArray', y: 'NDArray', 
@@ -192,14 +225,47 @@ def coordinates_to_pixel_indices(x: 'NDArray', y: 'NDArray',
     if xy_offset_pix[1] > 0:
         y_min_adjusted -= xy_offset_pix[1] * pixel_scale_size_um
     
-    # Convert to pixel indices using psana's method
+    # Convert to pixel indices using psana's method, with one float scratch
+    # array shared by both axes
     # Note: In psana PSANA frame, X maps to rows, Y maps to columns
-    rows = np.array((x - x_min_adjusted) / pixel_scale_size_um, dtype=np.uint32)
-    cols = np.array((y - y_min_adjusted) / pixel_scale_size_um, dtype=np.uint32)
+    rows, scratch = scaled_pixel_indices(x, x_min_adjusted, pixel_scale_size_um)
+    cols, _ = scaled_pixel_indices(y, y_min_adjusted, pixel_scale_size_um, scratch)
     
     return PixelIndices(rows, cols)
 
 
+def scaled_pixel_indices(values: 'NDArray', origin: float, pixel_scale_size_um: float,
+                         scratch: Optional['NDArray'] = None) -> Tuple['NDArray', 'NDArray']:
+    """
+    uint32((values - origin) / pixel_scale_size_um), psana's coordinate to
+    pixel index conversion.
+    
+    The division writes straight into the uint32 result (truncating like
+    astype) from a single float temporary. It stays a true division in the
+    coordinates' own precision, not a multiply by the reciprocal, so
+    indices at bin edges match psana exactly.
+    
+    Args:
+        values: Coordinate array in micrometers
+        origin: Coordinate of the image edge (min - half a pixel)
+        pixel_scale_size_um: Pixel size in micrometers
+        scratch: Optional float temporary from a previous call, reused if
+            its shape and dtype fit
+        
+    Returns:
+        (indices, scratch): uint32 index array and the float temporary,
+        which can be passed to the next call
+    """
+    if (scratch is not None and scratch.shape == np.shape(values)
+            and np.result_type(values, origin) == scratch.dtype):
+        np.subtract(values, origin, out=scratch)
+    else:
+        scratch = np.subtract(values, origin)
+    indices = np.empty(scratch.shape, dtype=np.uint32)
+    np.divide(scratch, pixel_scale_size_um, out=indices, casting='unsafe')
+    return indices, scratch
+
+
 def calculate_detector_bounds(panels: dict, pixel_scale_size_um: float = 100.0) -> dict:
     """
     Calculate overall detector coordinate bounds and final image dimensions.
@@ -214,21 +280,16 @@ def calculate_detector_bounds(panels: dict, pixel_scale_size_um: float = 100.0)
     if not panels:
         return {'x_min': 0, 'x_max': 0, 'y_min': 0, 'y_max': 0, 'image_shape': (0, 0)}
     
-    # Collect all coordinates from all panels
-    all_x = []
-    all_y = []
+    # Running bounds over all panels; each panel contributes four scalar
+    # reductions instead of being flattened into one concatenated array
+    x_min = y_min = np.inf
+    x_max = y_max = -np.inf
     
     for coords in panels.values():
-        all_x.append(coords.x_coords.flatten())
-        all_y.append(coords.y_coords.flatten())
-    
-    # Combine all coordinates
-    x_all = np.concatenate(all_x)
-    y_all = np.concatenate(all_y)
-    
-    # Calculate bounds
-    x_min, x_max = float(np.min(x_all)), float(np.max(x_all))
-    y_min, y_max = float(np.min(y_all)), float(np.max(y_all))
+        x_min = min(x_min, float(np.min(coords.x_coords)))
+        x_max = max(x_max, float(np.max(coords.x_coords)))
+        y_min = min(y_min, float(np.min(coords.y_coords)))
+        y_max = max(y_max, float(np.max(coords.y_coords)))
     
     # Calculate image dimensions
     x_range = x_max - x_min
@@ -267,14 +328,20 @@ def validate_coordinate_arrays(*coord_arrays: 'NDArray') -> None:
         if arr.shape != ref_shape:
             raise ValueError(f"Coordinate array {i} has shape {arr.shape}, expected {ref_shape}")
     
-    # Check for invalid values
+    # Check for invalid values with two allocation-free reductions per
+    # array: NaN propagates through min/max and ±inf lands on an extreme,
+    # so both ends being finite means every value is
     for i, arr in enumerate(coord_arrays):
-        if not np.isfinite(arr).all():
+        if arr.size == 0:
+            continue
+        lo, hi = float(np.min(arr)), float(np.max(arr))
+        if not (np.isfinite(lo) and np.isfinite(hi)):
             raise ValueError(f"Coordinate array {i} contains non-finite values")
         
         # Check for reasonable coordinate ranges (±1 meter)
-        if np.abs(arr).max() > 1e6:  # 1 meter in micrometers
-            raise ValueError(f"Coordinate array {i} contains unreasonably large values (max: {np.abs(arr).max():.0f} μm)")
+        abs_max = max(-lo, hi)
+        if abs_max > 1e6:  # 1 meter in micrometers
+            raise ValueError(f"Coordinate array {i} contains unreasonably large values (max: {abs_max:.0f} μm)")
 
 
 def print_transformation_summary(panel_geometry: PanelGeometry, coords_before: CoordinateArrays, 
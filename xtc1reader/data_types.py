@@ -5,6 +5,7 @@ Handles decoding of binary data for various detector types found in XTC files.
 """
 
 import struct
+import warnings
 import numpy as np
 from typing import NamedTuple, Optional, Any, TYPE_CHECKING
 from .binary_format import TypeId
@@ -12,6 +13,13 @@ from .binary_format import TypeId
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
+# Precompiled payload headers, unpacked in place with unpack_from
+_FRAME_HDR = struct.Struct('<4I')          # width, height, depth, offset
+_CSPAD_ELEMENT_HDR = struct.Struct('<5I')  # tid, acqCount, opCode, quad, sectionId
+_CSPAD_CONFIG = struct.Struct('<4I')       # quadMask, asicMask, runDelay, eventCode
+_PRINCETON_HDR = struct.Struct('<4I')      # shotIdStart, readoutTime, width, height
+_EPIX_FRAME_NUMBER = struct.Struct('<I')
+
 class CameraFrame(NamedTuple):
     """Parsed camera frame data"""
     width: int
@@ -55,6 +63,21 @@ class Epix10ka2MData(NamedTuple):
         return (352, 384)
 
 
+# Little-endian pixel dtypes for camera frames, by bit depth
+_FRAME_DTYPE_U8 = np.dtype(np.uint8)
+_FRAME_DTYPE_U16 = np.dtype('<u2')
+_FRAME_DTYPE_U32 = np.dtype('<u4')
+
+
+def _frame_dtype(depth: int) -> np.dtype:
+    """Smallest unsigned pixel dtype holding depth bits"""
+    if depth <= 8:
+        return _FRAME_DTYPE_U8
+    if depth <= 16:
+        return _FRAME_DTYPE_U16
+    return _FRAME_DTYPE_U32
+
+
 def parse_camera_frame(data: bytes, type_id: int, version: int) -> CameraFrame:
     """
     Parse camera frame data from XTC payload.
@@ -73,7 +96,7 @@ def parse_camera_frame(data: bytes, type_id: int, version: int) -> CameraFrame:
     # Parse frame header - format varies by camera type
     if type_id == TypeId.Id_Frame:
         # Generic frame format
-        width, height, depth, offset = struct.unpack('<4I', data[0:16])
+        width, height, depth, offset = _FRAME_HDR.unpack_from(data)
         
         # Calculate expected data size
         bytes_per_pixel = (depth + 7) // 8  # Round up to nearest byte
@@ -82,24 +105,9 @@ def parse_camera_frame(data: bytes, type_id: int, version: int) -> CameraFrame:
         if len(data) < 16 + expected_size:
             raise ValueError(f"Frame data truncated: {len(data)} < {16 + expected_size}")
         
-        # Extract pixel data
-        pixel_data = data[16:16 + expected_size]
-        
-        # Convert to numpy array based on depth
-        if depth <= 8:
-            dtype = np.uint8
-        elif depth <= 16:
-            dtype = np.uint16
-        else:
-            dtype = np.uint32
-            
-        # Parse pixel data (little-endian)
-        if dtype == np.uint8:
-            pixels = np.frombuffer(pixel_data, dtype=np.uint8)
-        elif dtype == np.uint16:
-            pixels = np.frombuffer(pixel_data, dtype='<u2')  # little-endian uint16
-        else:
-            pixels = np.frombuffer(pixel_data, dtype='<u4')  # little-endian uint32
+        # Parse pixel data (little-endian) in place, without slicing it out
+        # first; the pixel dtype follows the bit depth
+        pixels = np.frombuffer(data, dtype=_frame_dtype(depth), count=width * height, offset=16)
         
         # Reshape to 2D image
         image = pixels.reshape((height, width))
@@ -124,7 +132,7 @@ def parse_pnccd_frame(data: bytes, version: int) -> CameraFrame:
             raise ValueError(f"pnCCD frame data too short: {len(data)} < {expected_size}")
         
         # Parse as little-endian uint16
-        pixels = np.frombuffer(data[:expected_size], dtype='<u2')
+        pixels = np.frombuffer(data, dtype='<u2', count=512 * 512)
         image = pixels.reshape((512, 512))
         
         return CameraFrame(512, 512, 16, 0, image)
@@ -141,11 +149,11 @@ def parse_cspad_element(data: bytes, version: int) -> CSPadElement:
     """
     if version in [1, 2]:
         # CSPad element format
-        if len(data) < 16:
+        if len(data) < 20:
             raise ValueError("CSPad element header too short")
         
         # Parse element header
-        tid, acq_count, op_code, quad, sect_id = struct.unpack('<5I', data[0:20])
+        tid, acq_count, op_code, quad, sect_id = _CSPAD_ELEMENT_HDR.unpack_from(data)
         
         # Calculate remaining data for pixels
         pixel_data_size = 185 * 388 * 2  # 16-bit pixels
@@ -153,9 +161,8 @@ def parse_cspad_element(data: bytes, version: int) -> CSPadElement:
         if len(data) < 20 + pixel_data_size:
             raise ValueError(f"CSPad element data too short: {len(data)} < {20 + pixel_data_size}")
         
-        # Extract pixel data  
-        pixel_data = data[20:20 + pixel_data_size]
-        pixels = np.frombuffer(pixel_data, dtype='<u2')  # little-endian uint16
+        # View pixel data in place (little-endian uint16)
+        pixels = np.frombuffer(data, dtype='<u2', count=185 * 388, offset=20)
         image = pixels.reshape((185, 388))
         
         return CSPadElement(quad, sect_id, image)
@@ -174,7 +181,7 @@ def parse_cspad_config(data: bytes, version: int) -> CSPadConfig:
         raise ValueError("CSPad config data too short")
     
     # Parse basic config fields
-    quad_mask, asic_mask, run_delay, event_code = struct.unpack('<4I', data[0:16])
+    quad_mask, asic_mask, run_delay, event_code = _CSPAD_CONFIG.unpack_from(data)
     
     return CSPadConfig(quad_mask, asic_mask, run_delay, event_code)
 
@@ -188,8 +195,7 @@ def parse_princeton_frame(data: bytes, version: int) -> CameraFrame:
             raise ValueError("Princeton frame header too short")
         
         # Princeton frame header
-        shotIdStart, readoutTime = struct.unpack('<2I', data[0:8])
-        width, height = struct.unpack('<2I', data[8:16])
+        shotIdStart, readoutTime, width, height = _PRINCETON_HDR.unpack_from(data)
         
         # Princeton uses 16-bit pixels
         pixel_data_size = width * height * 2
@@ -197,8 +203,7 @@ def parse_princeton_frame(data: bytes, version: int) -> CameraFrame:
         if len(data) < 16 + pixel_data_size:
             raise ValueError(f"Princeton frame data too short")
         
-        pixel_data = data[16:16 + pixel_data_size]
-        pixels = np.frombuffer(pixel_data, dtype='<u2')
+        pixels = np.frombuffer(data, dtype='<u2', count=width * height, offset=16)
         image = pixels.reshape((height, width))
         
         return CameraFrame(width, height, 16, 0, image)
@@ -207,7 +212,8 @@ def parse_princeton_frame(data: bytes, version: int) -> CameraFrame:
         raise ValueError(f"Unsupported Princeton version: {version}")
 
 
-def parse_epix10ka2m_array(data: bytes, version: int) -> Epix10ka2MData:
+def parse_epix10ka2m_array(data: bytes, version: int,
+                           out: Optional['NDArray'] = None) -> Epix10ka2MData:
     """
     Parse Epix10ka2M ArrayV1 data from XTC payload.
     
@@ -219,6 +225,9 @@ def parse_epix10ka2m_array(data: bytes, version: int) -> Epix10ka2MData:
     Args:
         data: Raw array data bytes
         version: Version from XTC header
+        out: Optional (16, 352, 384) uint16 array to copy the frames into,
+             e.g. a buffer reused across events. By default the frames are
+             a read-only view of data.
         
     Returns:
         Parsed Epix10ka2M data
@@ -227,7 +236,7 @@ def parse_epix10ka2m_array(data: bytes, version: int) -> Epix10ka2MData:
         raise ValueError("Epix10ka2M data too short for frame number")
     
     # Parse frame number (uint32)
-    frame_number = struct.unpack('<I', data[0:4])[0]
+    frame_number = _EPIX_FRAME_NUMBER.unpack_from(data)[0]
     
     # Calculate expected frame data size
     # 16 panels × 352 rows × 384 columns × 2 bytes/pixel
@@ -240,18 +249,56 @@ def parse_epix10ka2m_array(data: bytes, version: int) -> Epix10ka2MData:
     if len(data) < 4 + frame_data_size:
         raise ValueError(f"Epix10ka2M data too short: expected {4 + frame_data_size}, got {len(data)}")
     
-    # Extract frame data (skip first 4 bytes which are frame number)
-    frame_bytes = data[4:4 + frame_data_size]
-    
-    # Parse as uint16 array (little-endian)
-    pixel_data = np.frombuffer(frame_bytes, dtype='<u2')
+    # Parse as uint16 array (little-endian), viewing the frame data in place
+    # after the 4-byte frame number instead of copying it out first
+    pixel_data = np.frombuffer(data, dtype='<u2',
+                               count=num_panels * panel_rows * panel_cols, offset=4)
     
     # Reshape to (16, 352, 384)
     frames = pixel_data.reshape((num_panels, panel_rows, panel_cols))
     
+    if out is not None:
+        if out.shape != frames.shape or out.dtype != np.uint16:
+            raise ValueError(f"out must be a uint16 array of shape {frames.shape}, "
+                             f"got {out.dtype} {out.shape}")
+        np.copyto(out, frames)
+        frames = out
+    
     return Epix10ka2MData(frame_number, frames)
 
 
+# Experimental TypeIds that already failed to parse; warned about once each
+_FAILED_EXPERIMENTAL_TYPES = set()
+
+
+def _parse_experimental_epix10ka2m(data: bytes, type_id: int, version: int) -> Any:
+    """Parse an experimental Epix10ka2M TypeId, returning the raw bytes on failure"""
+    try:
+        return parse_epix10ka2m_array(data, version)
+    except Exception as e:
+        if type_id not in _FAILED_EXPERIMENTAL_TYPES:
+            _FAILED_EXPERIMENTAL_TYPES.add(type_id)
+            warnings.warn(f"Failed to parse experimental TypeId {type_id} as Epix10ka2M: {e}")
+        return data
+
+
+# Type ID -> parser(data, type_id, version), keyed by plain ints so raw
+# header values hit the table directly
+_PARSERS = {int(type_id): parser for type_id, parser in (
+    (TypeId.Id_Frame, parse_camera_frame),
+    (TypeId.Id_pnCCDframe, lambda data, type_id, version: parse_pnccd_frame(data, version)),
+    (TypeId.Id_CspadElement, lambda data, type_id, version: parse_cspad_element(data, version)),
+    (TypeId.Id_CspadConfig, lambda data, type_id, version: parse_cspad_config(data, version)),
+    (TypeId.Id_PrincetonFrame, lambda data, type_id, version: parse_princeton_frame(data, version)),
+    (TypeId.Id_Epix10kaArray, lambda data, type_id, version: parse_epix10ka2m_array(data, version)),
+    # Experimental TypeIds for Epix10ka2M array data (mfx100903824): the
+    # old-analysis 6193 and the corrected 117 (~4.3MB) / 118 (~4.4MB)
+    (TypeId.Id_Experimental_6193, _parse_experimental_epix10ka2m),
+    (TypeId.Id_Experimental_117, _parse_experimental_epix10ka2m),
+    (TypeId.Id_Experimental_118, _parse_experimental_epix10ka2m),
+)}
+
+
 def parse_detector_data(data: bytes, type_id: int, version: int) -> Any:
     """
     Parse detector data based on type ID and version.
@@ -262,53 +309,22 @@ def parse_detector_data(data: bytes, type_id: int, version: int) -> Any:
         version: Version from XTC header
         
     Returns:
-        Parsed detector data object (type depends on detector)
+        Parsed detector data object (type depends on detector), or the
+        raw data for unsupported types
     """
-    if type_id == TypeId.Id_Frame:
-        return parse_camera_frame(data, type_id, version)
-    
-    elif type_id == TypeId.Id_pnCCDframe:
-        return parse_pnccd_frame(data, version)
-    
-    elif type_id == TypeId.Id_CspadElement:
-        return parse_cspad_element(data, version)
-    
-    elif type_id == TypeId.Id_CspadConfig:
-        return parse_cspad_config(data, version)
-    
-    elif type_id == TypeId.Id_PrincetonFrame:
-        return parse_princeton_frame(data, version)
-    
-    elif type_id == TypeId.Id_Epix10kaArray:
-        return parse_epix10ka2m_array(data, version)
-    
-    elif type_id == TypeId.Id_Experimental_6193:
-        # Experimental TypeId for Epix10ka2M array data (mfx100903824, old analysis)
-        try:
-            return parse_epix10ka2m_array(data, version)
-        except Exception as e:
-            print(f"Warning: Failed to parse experimental TypeId {type_id} as Epix10ka2M: {e}")
-            return data
-    
-    elif type_id == TypeId.Id_Experimental_117:
-        # Corrected experimental TypeId for Epix10ka2M detector data (~4.3MB)
-        try:
-            return parse_epix10ka2m_array(data, version)
-        except Exception as e:
-            print(f"Warning: Failed to parse experimental TypeId {type_id} as Epix10ka2M: {e}")
-            return data
-            
-    elif type_id == TypeId.Id_Experimental_118:
-        # Corrected experimental TypeId for Epix10ka2M detector data (~4.4MB)
-        try:
-            return parse_epix10ka2m_array(data, version)
-        except Exception as e:
-            print(f"Warning: Failed to parse experimental TypeId {type_id} as Epix10ka2M: {e}")
-            return data
-    
-    else:
-        # Return raw data for unsupported types
+    parser = _PARSERS.get(type_id)
+    if parser is None:
         return data
+    return parser(data, type_id, version)
+
+
+# Type ID -> expected data shape, built once at import
+_DETECTOR_SHAPES = {
+    TypeId.Id_pnCCDframe: (512, 512),
+    TypeId.Id_CspadElement: (185, 388),
+    TypeId.Id_Epix10kaArray: (16, 352, 384),  # 16 panels of 352x384
+    # Add more as needed
+}
 
 
 def get_detector_shape(type_id: int, version: int) -> Optional[tuple[int, ...]]:
@@ -318,58 +334,56 @@ def get_detector_shape(type_id: int, version: int) -> Optional[tuple[int, ...]]:
     Returns:
         Tuple of dimensions or None if unknown
     """
-    shapes = {
-        TypeId.Id_pnCCDframe: (512, 512),
-        TypeId.Id_CspadElement: (185, 388),
-        TypeId.Id_Epix10kaArray: (16, 352, 384),  # 16 panels of 352x384
-        # Add more as needed
-    }
-    
-    return shapes.get(type_id)
+    return _DETECTOR_SHAPES.get(type_id)
+
+
+# Type IDs that carry image/detector data, stored as plain ints so that
+# membership tests against raw header values compare ints, not enums
+IMAGE_TYPE_IDS = frozenset(int(type_id) for type_id in (
+    TypeId.Id_Frame,
+    TypeId.Id_pnCCDframe, 
+    TypeId.Id_CspadElement,
+    TypeId.Id_PrincetonFrame,
+    TypeId.Id_Epix10kaArray,
+    # Experimental TypeIds for Epix10ka2M 
+    TypeId.Id_Experimental_6193,  # mfx100903824 Epix10ka2M array data (from old analysis)
+    TypeId.Id_Experimental_117,   # mfx100903824 Epix10ka2M detector data (corrected)
+    TypeId.Id_Experimental_118,   # mfx100903824 Epix10ka2M detector data (corrected)
+    # Add more as needed
+))
 
 
 def is_image_type(type_id: int) -> bool:
     """
     Check if type ID represents image/detector data.
     """
-    image_types = {
-        TypeId.Id_Frame,
-        TypeId.Id_pnCCDframe, 
-        TypeId.Id_CspadElement,
-        TypeId.Id_PrincetonFrame,
-        TypeId.Id_Epix10kaArray,
-        # Experimental TypeIds for Epix10ka2M 
-        TypeId.Id_Experimental_6193,  # mfx100903824 Epix10ka2M array data (from old analysis)
-        TypeId.Id_Experimental_117,   # mfx100903824 Epix10ka2M detector data (corrected)
-        TypeId.Id_Experimental_118,   # mfx100903824 Epix10ka2M detector data (corrected)
-        # Add more as needed
-    }
-    
-    return type_id in image_types
+    return type_id in IMAGE_TYPE_IDS
+
+
+# Type ID -> description, built once at import
+_TYPE_DESCRIPTIONS = {
+    TypeId.Id_Frame: "Generic camera frame",
+    TypeId.Id_pnCCDframe: "pnCCD detector frame (512x512)",
+    TypeId.Id_CspadElement: "CSPad 2x1 element (185x388)",
+    TypeId.Id_CspadConfig: "CSPad configuration",
+    TypeId.Id_PrincetonFrame: "Princeton camera frame",
+    TypeId.Id_Epix10kaArray: "Epix10ka2M detector array (16x352x384)",
+    TypeId.Id_Epix10ka2MConfig: "Epix10ka2M configuration",
+    # Experimental TypeIds for specific experiments
+    TypeId.Id_Experimental_6185: "Epix10ka2M config (experimental - mfx100903824)",
+    TypeId.Id_Experimental_6190: "Epix10ka2M config v2 (experimental - mfx100903824)",
+    TypeId.Id_Experimental_6193: "Epix10ka2M array data (experimental - mfx100903824, old analysis)",
+    TypeId.Id_Experimental_117: "Epix10ka2M detector data (experimental - mfx100903824, ~4.3MB)",
+    TypeId.Id_Experimental_118: "Epix10ka2M detector data (experimental - mfx100903824, ~4.4MB)",
+    TypeId.Id_Xtc: "XTC container",
+    TypeId.Id_EvrData: "Event receiver data",
+    TypeId.Id_EBeam: "Electron beam data",
+    TypeId.Id_Epics: "EPICS PV data",
+}
 
 
 def get_type_description(type_id: int) -> str:
     """
     Get human-readable description of data type.
     """
-    descriptions = {
-        TypeId.Id_Frame: "Generic camera frame",
-        TypeId.Id_pnCCDframe: "pnCCD detector frame (512x512)",
-        TypeId.Id_CspadElement: "CSPad 2x1 element (185x388)",
-        TypeId.Id_CspadConfig: "CSPad configuration",
-        TypeId.Id_PrincetonFrame: "Princeton camera frame",
-        TypeId.Id_Epix10kaArray: "Epix10ka2M detector array (16x352x384)",
-        TypeId.Id_Epix10ka2MConfig: "Epix10ka2M configuration",
-        # Experimental TypeIds for specific experiments
-        TypeId.Id_Experimental_6185: "Epix10ka2M config (experimental - mfx100903824)",
-        TypeId.Id_Experimental_6190: "Epix10ka2M config v2 (experimental - mfx100903824)",
-        TypeId.Id_Experimental_6193: "Epix10ka2M array data (experimental - mfx100903824, old analysis)",
-        TypeId.Id_Experimental_117: "Epix10ka2M detector data (experimental - mfx100903824, ~4.3MB)",
-        TypeId.Id_Experimental_118: "Epix10ka2M detector data (experimental - mfx100903824, ~4.4MB)",
-        TypeId.Id_Xtc: "XTC container",
-        TypeId.Id_EvrData: "Event receiver data",
-        TypeId.Id_EBeam: "Electron beam data",
-        TypeId.Id_Epics: "EPICS PV data",
-    }
-    
-    return descriptions.get(type_id, f"Unknown type {type_id}")
\ No newline at end of file
+    return _TYPE_DESCRIPTIONS.get(type_id, f"Unknown type {type_id}")
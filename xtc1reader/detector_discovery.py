@@ -8,9 +8,11 @@ direct XTC parsing and psana's detector data management system.
 """
 
 import os
-import glob
+import re
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, NamedTuple
+from typing import Dict, List, Optional, Tuple, NamedTuple, Union
 from .binary_format import TypeId
 
 
@@ -25,12 +27,41 @@ class DetectorInfo(NamedTuple):
     typeid_mappings: Dict[int, str] # TypeId mappings for this detector/experiment
 
 
+# Detector lists by experiment directory, shared by all LCLSEnvironment
+# instances: experiment path -> (time.monotonic() when scanned, detectors)
+_DISCOVERY_CACHE: Dict[str, Tuple[float, List['DetectorInfo']]] = {}
+DISCOVERY_CACHE_TTL_S = 300.0
+
+
+def clear_detector_cache() -> None:
+    """Forget all cached detector discoveries (e.g. after calib/ changed)"""
+    _DISCOVERY_CACHE.clear()
+
+
+@lru_cache(maxsize=256)
+def _xtc_file_regex(experiment: str, run: int) -> 're.Pattern':
+    """Compiled match for a run's chunk files: <exp>-r<run:04d>-s<NN>-c<NN>.xtc"""
+    return re.compile(rf"{re.escape(experiment)}-r{run:04d}-s\d+-c\d+\.xtc")
+
+
+def _scan_subdirs(path: str) -> List[os.DirEntry]:
+    """
+    Visible subdirectories of path, as glob(path/*) + isdir would find them.
+    
+    os.scandir reports the entry type from the directory listing itself,
+    so unlike isdir() no stat call is made per entry (only symlinks,
+    which are followed, need one).
+    """
+    with os.scandir(path) as entries:
+        return [entry for entry in entries
+                if not entry.name.startswith('.') and entry.is_dir()]
+
+
 class LCLSEnvironment:
     """Manages LCLS environment and data location discovery"""
     
     def __init__(self):
         self.data_root = self._get_data_root()
-        self._detector_cache = {}
     
     def _get_data_root(self) -> str:
         """Get LCLS data root from environment or use default"""
@@ -52,12 +83,19 @@ class LCLSEnvironment:
         return exp_path
     
     def discover_detectors(self, experiment: str) -> List[DetectorInfo]:
-        """Discover all detectors available for an experiment"""
-        
-        if experiment in self._detector_cache:
-            return self._detector_cache[experiment]
+        """
+        Discover all detectors available for an experiment.
         
+        Results are cached per experiment directory for
+        DISCOVERY_CACHE_TTL_S seconds across all instances; see
+        clear_detector_cache().
+        """
         exp_path = self.get_experiment_path(experiment)
+        
+        cached = _DISCOVERY_CACHE.get(exp_path)
+        if cached is not None and time.monotonic() - cached[0] < DISCOVERY_CACHE_TTL_S:
+            return cached[1]
+        
         calib_path = os.path.join(exp_path, 'calib')
         
         if not os.path.exists(calib_path):
@@ -67,11 +105,8 @@ class LCLSEnvironment:
         detectors = []
         
         # Scan calibration directory for detector types
-        for detector_calib_dir in glob.glob(os.path.join(calib_path, '*')):
-            if not os.path.isdir(detector_calib_dir):
-                continue
-                
-            detector_calib_name = os.path.basename(detector_calib_dir)
+        for detector_calib_entry in _scan_subdirs(calib_path):
+            detector_calib_name = detector_calib_entry.name
             
             # Parse detector calibration directory name (e.g., 'Epix10ka2M::CalibV1')
             if '::' not in detector_calib_name:
@@ -80,11 +115,9 @@ class LCLSEnvironment:
             detector_type = detector_calib_name.split('::')[0]
             
             # Find detector instances within this calibration directory
-            for detector_instance_dir in glob.glob(os.path.join(detector_calib_dir, '*')):
-                if not os.path.isdir(detector_instance_dir):
-                    continue
-                    
-                detector_id = os.path.basename(detector_instance_dir)
+            for detector_instance_entry in _scan_subdirs(detector_calib_entry.path):
+                detector_instance_dir = detector_instance_entry.path
+                detector_id = detector_instance_entry.name
                 
                 # Parse detector ID (e.g., 'MfxEndstation.0:Epix10ka2M.0')
                 if ':' not in detector_id:
@@ -97,7 +130,10 @@ class LCLSEnvironment:
                 geometry_dir = os.path.join(detector_instance_dir, 'geometry')
                 geometry_files = []
                 if os.path.exists(geometry_dir):
-                    geometry_files = glob.glob(os.path.join(geometry_dir, '*.geom'))
+                    with os.scandir(geometry_dir) as entries:
+                        geometry_files = [entry.path for entry in entries
+                                          if entry.name.endswith('.geom')
+                                          and not entry.name.startswith('.')]
                 
                 # Get TypeId mappings (experiment/detector specific)
                 typeid_mappings = self._discover_typeids(experiment, detector_type)
@@ -114,7 +150,7 @@ class LCLSEnvironment:
                 
                 detectors.append(detector_info)
         
-        self._detector_cache[experiment] = detectors
+        _DISCOVERY_CACHE[exp_path] = (time.monotonic(), detectors)
         return detectors
     
     def _create_detector_name(self, detector_type: str) -> str:
@@ -170,17 +206,18 @@ class LCLSEnvironment:
                 
         return None
     
-    def get_xtc_files(self, experiment: str, run: str) -> List[str]:
-        """Get XTC files for a specific experiment and run"""
+    def get_xtc_files(self, experiment: str, run: Union[str, int]) -> List[str]:
+        """Get XTC files for a specific experiment and run (e.g. '105' or 105)"""
         exp_path = self.get_experiment_path(experiment)
         xtc_path = os.path.join(exp_path, 'xtc')
         
         if not os.path.exists(xtc_path):
             return []
         
-        # Find XTC files matching the run pattern
-        pattern = f"{experiment}-r{run:0>4s}-s*-c*.xtc"
-        xtc_files = glob.glob(os.path.join(xtc_path, pattern))
+        # Find XTC files matching the run pattern in one directory listing
+        pattern = _xtc_file_regex(experiment, int(run))
+        with os.scandir(xtc_path) as entries:
+            xtc_files = [entry.path for entry in entries if pattern.fullmatch(entry.name)]
         
         return sorted(xtc_files)
 
@@ -6,17 +6,20 @@ table_nxn_epix10ka_from_ndarr() function for image assembly.
 """
 
 import numpy as np
+from functools import lru_cache
 from typing import TYPE_CHECKING, Optional
 from .geometry_definitions import DetectorGeometry, CoordinateArrays, PixelIndices
 from .geometry_parser import load_default_epix10ka2m_geometry
 from .pixel_coordinates import generate_detector_coordinates
-from .coordinate_transform import coordinates_to_pixel_indices, calculate_detector_bounds
+from .coordinate_transform import (coordinates_to_pixel_indices, calculate_detector_bounds,
+                                   scaled_pixel_indices)
 
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
 
-def assemble_epix10ka2m_image(frames: 'NDArray', include_gaps: bool = True) -> 'NDArray':
+def assemble_epix10ka2m_image(frames: 'NDArray', include_gaps: bool = True,
+                              out: Optional['NDArray'] = None) -> 'NDArray':
     """
     Convert Epix10ka2M raw panel data to assembled 2D image.
     
@@ -28,9 +31,12 @@ def assemble_epix10ka2m_image(frames: 'NDArray', include_gaps: bool = True) -> '
     Args:
         frames: Input array shaped (16, 352, 384) or compatible
         include_gaps: Whether to include gaps between panels/quads
+        out: Optional array of the assembled shape to write into (reused
+            across events to avoid allocating a new image each time);
+            ignored for single-panel input
         
     Returns:
-        Assembled 2D image array
+        Assembled 2D image array (out, if given)
         
     Raises:
         ValueError: If input array has wrong shape
@@ -44,18 +50,19 @@ def assemble_epix10ka2m_image(frames: 'NDArray', include_gaps: bool = True) -> '
     
     elif frames.ndim == 3 and frames.shape[0] == 4:
         # Quad data (4 panels) - arrange as 2x2
-        return _assemble_quad_image(frames, include_gaps)
+        return _assemble_quad_image(frames, include_gaps, out)
     
     elif frames.ndim == 3 and frames.shape[0] == 16:
         # Full detector (16 panels) - arrange as 4 quads horizontally
-        return _assemble_full_detector_image(frames, include_gaps)
+        return _assemble_full_detector_image(frames, include_gaps, out)
     
     else:
         raise ValueError(f"Unsupported frame shape: {frames.shape}. "
                         f"Expected (352,384), (4,352,384), or (16,352,384)")
 
 
-def _assemble_quad_image(quad_frames: 'NDArray', include_gaps: bool = True) -> 'NDArray':
+def _assemble_quad_image(quad_frames: 'NDArray', include_gaps: bool = True,
+                         out: Optional['NDArray'] = None) -> 'NDArray':
     """
     Assemble 4 panels into a quad image.
     
@@ -70,30 +77,15 @@ def _assemble_quad_image(quad_frames: 'NDArray', include_gaps: bool = True) -> '
         raise ValueError(f"Expected quad shape (4, 352, 384), got {quad_frames.shape}")
     
     if include_gaps:
-        gap_h = 20  # Horizontal gap between panels
-        gap_v = 20  # Vertical gap between panel rows
-        
-        # Create gaps
-        h_gap = np.zeros((352, gap_h), dtype=quad_frames.dtype)
-        v_gap = np.zeros((gap_v, 2*384 + gap_h), dtype=quad_frames.dtype)
-        
-        # Assemble top row: panel 3, gap, panel 2  
-        top_row = np.hstack([quad_frames[3], h_gap, quad_frames[2]])
-        
-        # Assemble bottom row: panel 1, gap, panel 0
-        bottom_row = np.hstack([quad_frames[1], h_gap, quad_frames[0]])
-        
-        # Stack with vertical gap
-        return np.vstack([top_row, v_gap, bottom_row])
-    
+        shape = (2*352 + 20, 2*384 + 20)  # 20-pixel gaps between panel rows/columns
     else:
-        # No gaps - simple arrangement
-        top_row = np.hstack([quad_frames[3], quad_frames[2]])
-        bottom_row = np.hstack([quad_frames[1], quad_frames[0]])
-        return np.vstack([top_row, bottom_row])
+        shape = (2*352, 2*384)
+    
+    return _place_panels(quad_frames, shape, include_gaps, out)
 
 
-def _assemble_full_detector_image(frames: 'NDArray', include_gaps: bool = True) -> 'NDArray':
+def _assemble_full_detector_image(frames: 'NDArray', include_gaps: bool = True,
+                                  out: Optional['NDArray'] = None) -> 'NDArray':
     """
     Assemble all 16 panels into full detector image.
     
@@ -105,30 +97,31 @@ def _assemble_full_detector_image(frames: 'NDArray', include_gaps: bool = True)
     if frames.shape != (16, 352, 384):
         raise ValueError(f"Expected shape (16, 352, 384), got {frames.shape}")
     
-    # Split into quads (4 panels each)
-    quads = frames.reshape(4, 4, 352, 384)
-    
-    # Assemble each quad
-    quad_images = []
-    for i in range(4):
-        quad_img = _assemble_quad_image(quads[i], include_gaps=include_gaps)
-        quad_images.append(quad_img)
-    
-    if include_gaps:
-        # Add gaps between quads
-        gap_width = 50
-        quad_gap = np.zeros((quad_images[0].shape[0], gap_width), dtype=frames.dtype)
-        
-        # Arrange quads horizontally with gaps
-        result = quad_images[0]
-        for quad_img in quad_images[1:]:
-            result = np.hstack([result, quad_gap, quad_img])
-        
-        return result
+    info = get_detector_info()
+    shape = info['assembled_shape_with_gaps' if include_gaps else 'assembled_shape_no_gaps']
     
-    else:
-        # No gaps - simple horizontal arrangement
-        return np.hstack(quad_images)
+    return _place_panels(frames, shape, include_gaps, out)
+
+
+def _place_panels(frames: 'NDArray', shape: tuple, include_gaps: bool,
+                  out: Optional['NDArray'] = None) -> 'NDArray':
+    """
+    Copy each panel into its slice of the assembled image (see
+    get_panel_coordinates); gap pixels are zero.
+    """
+    if out is None:
+        out = (np.zeros if include_gaps else np.empty)(shape, dtype=frames.dtype)
+    elif out.shape != shape:
+        raise ValueError(f"Output array has shape {out.shape}, expected {shape}")
+    elif include_gaps:
+        out.fill(0)
+    
+    panel_slices = _PANEL_SLICES_WITH_GAPS if include_gaps else _PANEL_SLICES_NO_GAPS
+    for panel_id in range(frames.shape[0]):
+        row_slice, col_slice = panel_slices[panel_id]
+        out[row_slice, col_slice] = frames[panel_id]
+    
+    return out
 
 
 def get_panel_coordinates(panel_id: int, include_gaps: bool = True) -> tuple[slice, slice]:
@@ -196,6 +189,11 @@ def get_panel_coordinates(panel_id: int, include_gaps: bool = True) -> tuple[sli
     return row_slice, col_slice
 
 
+# (row_slice, col_slice) of every panel in the simple assembly, by panel id
+_PANEL_SLICES_WITH_GAPS = tuple(get_panel_coordinates(p, include_gaps=True) for p in range(16))
+_PANEL_SLICES_NO_GAPS = tuple(get_panel_coordinates(p, include_gaps=False) for p in range(16))
+
+
 def get_detector_info() -> dict:
     """
     Get information about the Epix10ka2M detector geometry.
@@ -254,17 +252,24 @@ def calculate_detector_stats(frames: 'NDArray') -> dict:
 def assemble_epix10ka2m_psana_compatible(frames: 'NDArray', 
                                         geometry: Optional[DetectorGeometry] = None,
                                         do_tilt: bool = True,
-                                        pixel_scale_size_um: float = 100.0) -> 'NDArray':
+                                        pixel_scale_size_um: float = 100.0,
+                                        out: Optional['NDArray'] = None) -> 'NDArray':
     """
     Assemble Epix10ka2M detector image using psana-compatible coordinate-based method.
     
     This produces images matching psana's .image() output (~1691×1691 pixels).
     
+    The default geometry and its pixel index tables are loaded once per
+    process (see _psana_pixel_indices), so assembling many events with
+    geometry=None only costs the pixel scatter.
+    
     Args:
         frames: Raw detector data shaped (16, 352, 384)
         geometry: Detector geometry (loads default if None)
         do_tilt: Whether to apply tilt corrections
         pixel_scale_size_um: Pixel scale size for coordinate conversion
+        out: Optional array to assemble into, reused if it has the
+            assembled shape (a new image is allocated otherwise)
         
     Returns:
         Assembled detector image with psana-compatible dimensions
@@ -278,90 +283,175 @@ def assemble_epix10ka2m_psana_compatible(frames: 'NDArray',
     if frames.shape != (16, 352, 384):
         raise ValueError(f"Expected frames shape (16, 352, 384), got {frames.shape}")
     
-    # Load default geometry if not provided
-    if geometry is None:
-        try:
-            geometry = load_default_epix10ka2m_geometry()
-        except Exception as e:
-            raise ValueError(f"Failed to load default Epix10ka2M geometry: {e}") from e
-    
-    # Generate coordinate arrays for all panels
-    panel_coordinates = generate_detector_coordinates(geometry, do_tilt=do_tilt)
+    # Image pixel of every panel pixel, from the default geometry if not provided
+    panel_indices, shape = _psana_pixel_indices(geometry, do_tilt, pixel_scale_size_um)
     
     # Create assembled image using psana-compatible coordinate-based pixel mapping
-    assembled_image = img_from_pixel_arrays(
-        panel_coordinates, frames, pixel_scale_size_um
-    )
-    
-    return assembled_image
+    return _scatter_panels(panel_indices, shape, frames, out)
 
 
-def img_from_pixel_arrays(panel_coordinates: dict, frames: 'NDArray', 
-                         pixel_scale_size_um: float) -> 'NDArray':
+def assemble_epix10ka2m_dual(frames: 'NDArray',
+                             geometry: Optional[DetectorGeometry] = None,
+                             do_tilt: bool = True,
+                             pixel_scale_size_um: float = 100.0,
+                             simple_out: Optional['NDArray'] = None,
+                             psana_out: Optional['NDArray'] = None) -> tuple:
     """
-    Create assembled image from pixel coordinate arrays and detector data.
+    Simple (no gaps) and psana-compatible assembly in one pass over frames.
     
-    This implements the same algorithm as psana's img_from_pixel_arrays() function.
-    Uses direct pixel-to-pixel mapping without interpolation and calculates
-    final image dimensions based on maximum pixel indices (psana method).
+    Each panel is copied into its simple-assembly slot and scattered into
+    the psana image before moving on to the next panel, so the 8 MB input
+    is streamed from memory once instead of once per assembly. Results
+    are identical to assemble_epix10ka2m_image(frames, include_gaps=False)
+    and assemble_epix10ka2m_psana_compatible(frames, ...).
     
     Args:
-        panel_coordinates: Dictionary of panel coordinate arrays
-        frames: Raw detector data (16, 352, 384)
+        frames: Raw detector data shaped (16, 352, 384)
+        geometry: Detector geometry (loads default if None)
+        do_tilt: Whether to apply tilt corrections
         pixel_scale_size_um: Pixel scale size for coordinate conversion
+        simple_out: Optional (704, 3072) array for the simple assembly
+        psana_out: Optional array for the psana assembly, reused if it
+            has the assembled shape
         
     Returns:
-        Assembled detector image
+        (simple_image, psana_image) tuple
     """
-    # Collect all coordinates to determine global bounds with psana's method
-    all_x = []
-    all_y = []
-    all_data = []
-    all_row_indices = []
-    all_col_indices = []
+    frames = np.asarray(frames)
+    if frames.shape != (16, 352, 384):
+        raise ValueError(f"Expected frames shape (16, 352, 384), got {frames.shape}")
+    
+    panel_indices, shape = _psana_pixel_indices(geometry, do_tilt, pixel_scale_size_um)
+    
+    simple_shape = get_detector_info()['assembled_shape_no_gaps']
+    if simple_out is None:
+        simple_out = np.empty(simple_shape, dtype=frames.dtype)
+    elif simple_out.shape != simple_shape:
+        raise ValueError(f"Output array has shape {simple_out.shape}, expected {simple_shape}")
+    psana_out = _zeroed_image(psana_out, shape, frames.dtype)
     
     for panel_id in range(16):
-        if panel_id not in panel_coordinates:
-            continue
-            
-        coords = panel_coordinates[panel_id]
-        panel_data = frames[panel_id]
-        
-        all_x.append(coords.x_coords.flatten())
-        all_y.append(coords.y_coords.flatten())
-        all_data.append(panel_data.flatten())
+        panel = frames[panel_id]
+        row_slice, col_slice = _PANEL_SLICES_NO_GAPS[panel_id]
+        simple_out[row_slice, col_slice] = panel
+        if panel_id in panel_indices:
+            rows, cols = panel_indices[panel_id]
+            psana_out[rows, cols] = panel
+    
+    return simple_out, psana_out
+
+
+def _psana_pixel_indices(geometry: Optional[DetectorGeometry], do_tilt: bool,
+                         pixel_scale_size_um: float) -> tuple:
+    """
+    _panel_pixel_indices() for geometry, or for the default geometry
+    (cached) if geometry is None.
+    """
+    if geometry is None:
+        return _default_psana_pixel_indices(do_tilt, pixel_scale_size_um)
+    panel_coordinates = generate_detector_coordinates(geometry, do_tilt=do_tilt)
+    return _panel_pixel_indices(panel_coordinates, pixel_scale_size_um)
+
+
+@lru_cache(maxsize=4)
+def _default_psana_pixel_indices(do_tilt: bool, pixel_scale_size_um: float) -> tuple:
+    """
+    Pixel index tables of the default Epix10ka2M geometry, which is parsed
+    and transformed once per process instead of once per event. Load
+    failures are not cached. The index arrays are read-only.
+    """
+    try:
+        geometry = load_default_epix10ka2m_geometry()
+    except Exception as e:
+        raise ValueError(f"Failed to load default Epix10ka2M geometry: {e}") from e
     
-    if not all_x:
-        return np.zeros((1, 1), dtype=frames.dtype)
+    panel_coordinates = generate_detector_coordinates(geometry, do_tilt=do_tilt)
+    panel_indices, shape = _panel_pixel_indices(panel_coordinates, pixel_scale_size_um)
+    for rows, cols in panel_indices.values():
+        rows.flags.writeable = False
+        cols.flags.writeable = False
+    return panel_indices, shape
+
+
+def _panel_pixel_indices(panel_coordinates: dict, pixel_scale_size_um: float) -> tuple:
+    """
+    Image (row, col) index arrays of each panel's pixels, using psana's
+    coordinate-to-pixel conversion.
     
-    # Combine all coordinates
-    x_all = np.concatenate(all_x)
-    y_all = np.concatenate(all_y)
-    data_all = np.concatenate(all_data)
+    Returns:
+        ({panel_id: (rows, cols)}, (image_height, image_width)); the
+        index arrays have the panel's shape
+    """
+    panel_ids = [p for p in range(16) if p in panel_coordinates]
+    if not panel_ids:
+        return {}, (1, 1)
     
-    # Apply psana's coordinate-to-pixel conversion with half-pixel offset
-    x_min = float(np.min(x_all))
-    y_min = float(np.min(y_all))
+    # Global bounds over all panels with psana's method
+    x_min = min(float(panel_coordinates[p].x_coords.min()) for p in panel_ids)
+    y_min = min(float(panel_coordinates[p].y_coords.min()) for p in panel_ids)
     
     # Critical: psana's half-pixel boundary offset
     x_min_adjusted = x_min - pixel_scale_size_um / 2
     y_min_adjusted = y_min - pixel_scale_size_um / 2
     
-    # Convert to pixel indices using psana's exact method
-    row_indices = np.array((x_all - x_min_adjusted) / pixel_scale_size_um, dtype=np.uint32)
-    col_indices = np.array((y_all - y_min_adjusted) / pixel_scale_size_um, dtype=np.uint32)
+    # Convert to pixel indices using psana's exact method, reusing one
+    # float temporary for every panel and axis
+    indices = {}
+    scratch = None
+    for p in panel_ids:
+        coords = panel_coordinates[p]
+        rows, scratch = scaled_pixel_indices(coords.x_coords, x_min_adjusted, pixel_scale_size_um, scratch)
+        cols, scratch = scaled_pixel_indices(coords.y_coords, y_min_adjusted, pixel_scale_size_um, scratch)
+        indices[p] = (rows, cols)
     
     # Calculate image dimensions using psana's method: max(indices) + 1
-    image_height = int(np.max(row_indices)) + 1
-    image_width = int(np.max(col_indices)) + 1
+    image_height = max(int(rows.max()) for rows, _ in indices.values()) + 1
+    image_width = max(int(cols.max()) for _, cols in indices.values()) + 1
     
-    # Initialize output image
-    image = np.zeros((image_height, image_width), dtype=frames.dtype)
+    return indices, (image_height, image_width)
+
+
+def _scatter_panels(panel_indices: dict, shape: tuple, frames: 'NDArray',
+                    out: Optional['NDArray'] = None) -> 'NDArray':
+    """Scatter each panel into a zeroed image (last value wins for overlaps)"""
+    image = _zeroed_image(out, shape, frames.dtype)
+    for panel_id, (rows, cols) in panel_indices.items():
+        image[rows, cols] = frames[panel_id]
+    return image
+
+
+def _zeroed_image(out: Optional['NDArray'], shape: tuple, dtype) -> 'NDArray':
+    """out zero-filled if it has the requested shape, else a new zero image"""
+    if out is not None and out.shape == shape:
+        out.fill(0)
+        return out
+    return np.zeros(shape, dtype=dtype)
+
+
+def img_from_pixel_arrays(panel_coordinates: dict, frames: 'NDArray', 
+                         pixel_scale_size_um: float,
+                         out: Optional['NDArray'] = None) -> 'NDArray':
+    """
+    Create assembled image from pixel coordinate arrays and detector data.
+    
+    This implements the same algorithm as psana's img_from_pixel_arrays() function.
+    Uses direct pixel-to-pixel mapping without interpolation and calculates
+    final image dimensions based on maximum pixel indices (psana method).
     
-    # Direct pixel assignment (last value wins for overlaps)
-    image[row_indices, col_indices] = data_all
+    Args:
+        panel_coordinates: Dictionary of panel coordinate arrays
+        frames: Raw detector data (16, 352, 384)
+        pixel_scale_size_um: Pixel scale size for coordinate conversion
+        out: Optional array to assemble into, reused (zeroed) if it has
+            the assembled shape
+        
+    Returns:
+        Assembled detector image
+    """
+    panel_indices, shape = _panel_pixel_indices(panel_coordinates, pixel_scale_size_um)
     
-    return image
+    # Direct pixel assignment, panel by panel (last value wins for overlaps)
+    return _scatter_panels(panel_indices, shape, frames, out)
 
 
 def get_psana_geometry_info(geometry: Optional[DetectorGeometry] = None) -> dict:
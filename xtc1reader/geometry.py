@@ -11,6 +11,7 @@ import os
 from typing import Dict, List, Tuple, Optional, NamedTuple, TYPE_CHECKING
 from dataclasses import dataclass
 import math
+from functools import lru_cache
 
 if TYPE_CHECKING:
     from numpy.typing import NDArray
@@ -393,6 +394,33 @@ def get_detector_geometry(detector_name: str, **kwargs) -> DetectorGeometry:
         raise ValueError(f"Unknown detector: {detector_name}")
 
 
+@lru_cache(maxsize=8)
+def _cached_detector_coordinates(detector_name: str, kwargs: Tuple) -> CoordinateArrays:
+    coords = compute_detector_coordinates(get_detector_geometry(detector_name, **dict(kwargs)))
+    for array in coords:
+        if array is not None:
+            array.flags.writeable = False
+    return coords
+
+
+def get_detector_coordinates(detector_name: str, **kwargs) -> CoordinateArrays:
+    """
+    Get coordinate arrays for a predefined detector geometry.
+    
+    Results are cached per detector name and arguments, so repeated calls
+    return the same arrays without recomputing them. The cached arrays
+    are read-only; copy them before modifying.
+    
+    Args:
+        detector_name: Name of detector ("cspad", "pnccd", "camera")
+        **kwargs: Additional arguments for geometry creation
+        
+    Returns:
+        CoordinateArrays object
+    """
+    return _cached_detector_coordinates(detector_name, tuple(sorted(kwargs.items())))
+
+
 def save_coordinate_arrays(coords: CoordinateArrays, output_dir: str, prefix: str = "coords"):
     """
     Save coordinate arrays to numpy files for fast loading.
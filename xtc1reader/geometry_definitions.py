@@ -7,6 +7,7 @@ Based on psana geometry definition format and coordinate systems.
 import numpy as np
 from typing import NamedTuple, Dict, List, Optional, TYPE_CHECKING
 from dataclasses import dataclass
+from functools import cached_property
 
 if TYPE_CHECKING:
     from numpy.typing import NDArray
@@ -62,6 +63,33 @@ class PanelGeometry:
         
         if len(self.shape) != 2:
             raise ValueError(f"Shape must be (rows, cols), got {self.shape}")
+    
+    def _affine(self, do_tilt: bool) -> 'NDArray':
+        """Build the (3, 4) matrix [R | t] mapping panel to detector coordinates"""
+        from .coordinate_transform import rotation_matrix
+        
+        rot = self.rotation_deg
+        tilt = self.tilt_deg if do_tilt else (0, 0, 0)
+        affine = np.empty((3, 4))
+        affine[:, :3] = rotation_matrix(rot[0] + tilt[0], rot[1] + tilt[1], rot[2] + tilt[2])
+        affine[:, 3] = self.position_um
+        affine.flags.writeable = False
+        return affine
+    
+    @cached_property
+    def affine_3x4(self) -> 'NDArray':
+        """
+        Panel-to-detector transform [R | t] with tilt corrections (read-only).
+        
+        Computed once per panel; the geometry fields must not be changed
+        after first access.
+        """
+        return self._affine(do_tilt=True)
+    
+    @cached_property
+    def affine_3x4_untilted(self) -> 'NDArray':
+        """Same as affine_3x4 but with the design rotation only (no tilt)"""
+        return self._affine(do_tilt=False)
 
 
 @dataclass 
@@ -132,16 +160,50 @@ class DetectorGeometry:
 class CoordinateArrays(NamedTuple):
     """
     Pixel coordinate arrays for detector panels.
+    
+    Coordinates produced by this package are views xyz[0], xyz[1], xyz[2]
+    of one contiguous (3, ...) buffer (see from_xyz), so transforms can
+    stream all three through a single array without restacking them.
     """
     x_coords: 'NDArray'   # X coordinates in micrometers
     y_coords: 'NDArray'   # Y coordinates in micrometers
     z_coords: 'NDArray'   # Z coordinates in micrometers
     
+    @classmethod
+    def from_xyz(cls, xyz: 'NDArray') -> 'CoordinateArrays':
+        """Wrap a (3, ...) array; the coordinates are views of its rows."""
+        return cls(xyz[0], xyz[1], xyz[2])
+    
     @property
     def shape(self) -> tuple:
         """Shape of coordinate arrays."""
         return self.x_coords.shape
     
+    @property
+    def xyz(self) -> 'NDArray':
+        """
+        Coordinates as one (3, ...) array.
+        
+        A read-only view when the three arrays are the consecutive rows of
+        one contiguous buffer they all share (as built by from_xyz),
+        otherwise a stacked copy.
+        """
+        x, y, z = (np.asarray(a) for a in self)
+        base = x.base
+        if (isinstance(base, np.ndarray) and base is y.base and base is z.base
+                and base.flags.c_contiguous and base.dtype == x.dtype
+                and base.size == 3 * x.size
+                and x.shape == y.shape == z.shape
+                and x.flags.c_contiguous and y.flags.c_contiguous and z.flags.c_contiguous):
+            start = base.ctypes.data
+            step = x.nbytes
+            if (x.ctypes.data == start and y.ctypes.data == start + step
+                    and z.ctypes.data == start + 2 * step):
+                xyz = base.reshape((3,) + x.shape)
+                xyz.flags.writeable = False
+                return xyz
+        return np.stack((x, y, z))
+    
     def bounds(self) -> dict:
         """Get coordinate bounds."""
         return {
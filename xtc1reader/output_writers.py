@@ -0,0 +1,295 @@
+"""
+Output writers for detector images extracted from XTC files.
+
+Each writer receives images keyed by event index and an image key
+(e.g. "epix10ka2m_v1_psana") and decides how they are laid out on disk:
+
+- NpyEventWriter: one .npy file per event and key (event_0001_<key>.npy),
+  plus one <key>.mask.npy validity mask per key
+- StackedNpyWriter: one stacked (N, ...) .npy file per key, written
+  through a memory map, plus a <key>.events.npy index of event numbers
+- Hdf5Writer: one chunked, compressed HDF5 dataset per key in a single
+  extracted.h5 file (requires h5py)
+"""
+
+import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class NpyEventWriter:
+    """
+    Write every image to its own .npy file.
+
+    Files are named event_{event:04d}_{key}.npy. Validity masks depend
+    only on the geometry, so the mask passed with the first image of a
+    key is saved once as {key}.mask.npy; mask_keys may be shared between
+    writers (e.g. the per-batch writers of one worker process) so each
+    writes it only once.
+
+    With io_threads > 0 the np.save calls run on a background thread pool
+    so disk writes overlap with decoding the next event; at most
+    4 * io_threads saves are queued at once, and write errors are raised
+    from close(). Writable images are copied before queueing, so callers
+    may reuse their buffers as soon as write() returns; read-only arrays
+    are saved without a copy.
+    """
+
+    def __init__(self, output_dir: str, io_threads: int = 0,
+                 mask_keys: Optional[set] = None):
+        self.output_dir = output_dir
+        self._prefix = os.path.join(output_dir, "event_")
+        self._mask_keys = set() if mask_keys is None else mask_keys
+        self._outputs: List[Tuple[str, Tuple[int, ...]]] = []
+        self._pool = ThreadPoolExecutor(max_workers=io_threads) if io_threads > 0 else None
+        self._max_pending = 4 * io_threads
+        self._pending = deque()
+
+    def _save(self, path: str, array: np.ndarray):
+        if self._pool is None:
+            np.save(path, array, allow_pickle=False)
+            return
+        if array.flags.writeable:
+            array = array.copy()
+        if len(self._pending) >= self._max_pending:
+            self._pending.popleft().result()
+        self._pending.append(self._pool.submit(np.save, path, array, allow_pickle=False))
+
+    def _save_mask(self, key: str, mask: np.ndarray):
+        # Written to a temporary file and renamed into place, since the
+        # worker processes of a parallel extraction may all save it
+        path = os.path.join(self.output_dir, f"{key}.mask.npy")
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, mask, allow_pickle=False)
+        os.replace(temp_path, path)
+        self._mask_keys.add(key)
+
+    def write(self, event: int, key: str, array: np.ndarray,
+              mask: Optional[np.ndarray] = None) -> str:
+        """Save one image and return the file it was written to"""
+        path = f"{self._prefix}{event:04d}_{key}.npy"
+        self._save(path, array)
+        if mask is not None and key not in self._mask_keys:
+            self._save_mask(key, mask)
+        self._outputs.append((path, array.shape))
+        return path
+
+    def close(self) -> List[Tuple[str, Tuple[int, ...]]]:
+        """Finish writing; returns (path, shape) for every file written"""
+        if self._pool is not None:
+            try:
+                while self._pending:
+                    self._pending.popleft().result()
+            finally:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+        return self._outputs
+
+
+# Fixed size of the .npy header written by StackedNpyWriter. Reserving a
+# fixed, 64-byte aligned header lets the leading dimension be rewritten in
+# place when the stack is grown or trimmed.
+_NPY_HEADER_LEN = 128
+
+
+def _npy_header(dtype: np.dtype, shape: Tuple[int, ...]) -> bytes:
+    """Version 1.0 .npy header padded to exactly _NPY_HEADER_LEN bytes"""
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': shape,
+    })
+    body_len = _NPY_HEADER_LEN - 10  # magic(6) + version(2) + length(2)
+    if len(header) + 1 > body_len:
+        raise ValueError(f"Shape {shape} does not fit in the reserved .npy header")
+    body = header.ljust(body_len - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', body_len) + body.encode('latin1')
+
+
+class _NpyStack:
+    """Growable (N, ...) .npy file backed by a writable memory map"""
+
+    def __init__(self, path: str, frame_shape: Tuple[int, ...], dtype: np.dtype,
+                 capacity: int):
+        self.path = path
+        self.frame_shape = frame_shape
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self.events: List[int] = []
+        self._frame_bytes = int(np.prod(frame_shape, dtype=np.int64)) * self.dtype.itemsize
+
+        with open(path, 'wb') as f:
+            f.write(_npy_header(self.dtype, (0,) + frame_shape))
+        self._map(max(1, capacity))
+
+    def _map(self, capacity: int):
+        os.truncate(self.path, _NPY_HEADER_LEN + capacity * self._frame_bytes)
+        self.capacity = capacity
+        self.array = np.memmap(self.path, dtype=self.dtype, mode='r+',
+                               offset=_NPY_HEADER_LEN,
+                               shape=(capacity,) + self.frame_shape)
+
+    def append(self, event: int, frame: np.ndarray):
+        if self.count == self.capacity:
+            self.array.flush()
+            self._map(self.capacity * 2)
+        self.array[self.count] = frame
+        self.events.append(event)
+        self.count += 1
+
+    def close(self):
+        self.array.flush()
+        del self.array
+        with open(self.path, 'r+b') as f:
+            f.write(_npy_header(self.dtype, (self.count,) + self.frame_shape))
+        os.truncate(self.path, _NPY_HEADER_LEN + self.count * self._frame_bytes)
+
+
+class StackedNpyWriter:
+    """
+    Stack all images of a key into one (N, ...) .npy file.
+
+    The file is preallocated for `capacity` frames and written through a
+    memory map, so each image costs one array copy instead of a file
+    open, header write and close. The stack grows if needed and is
+    trimmed to the number of frames written on close. Event numbers go
+    to <key>.events.npy; images whose shape differs from the first one
+    of their key are collected into <key>.extra.npz.
+    """
+
+    def __init__(self, output_dir: str, capacity: int = 1000):
+        self.output_dir = output_dir
+        self.capacity = capacity
+        self._stacks: Dict[str, _NpyStack] = {}
+        self._extra: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def write(self, event: int, key: str, array: np.ndarray,
+              mask: Optional[np.ndarray] = None) -> str:
+        """Append one image to the stack for key and return the stack path"""
+        stack = self._stacks.get(key)
+        if stack is None:
+            path = os.path.join(self.output_dir, f"{key}.npy")
+            stack = _NpyStack(path, array.shape, array.dtype, self.capacity)
+            self._stacks[key] = stack
+            if mask is not None:
+                # Masks depend only on the geometry: store one per stack
+                np.save(path[:-len(".npy")] + ".mask.npy", mask)
+
+        if array.shape != stack.frame_shape:
+            self._extra.setdefault(key, {})[f"event_{event:04d}"] = np.array(array)
+            return os.path.join(self.output_dir, f"{key}.extra.npz")
+
+        stack.append(event, array)
+        return stack.path
+
+    def close(self) -> List[Tuple[str, Tuple[int, ...]]]:
+        """Finalize every stack; returns (path, shape) for every file written"""
+        outputs = []
+        for key, stack in self._stacks.items():
+            stack.close()
+            np.save(stack.path[:-len(".npy")] + ".events.npy",
+                    np.asarray(stack.events, dtype=np.int64))
+            outputs.append((stack.path, (stack.count,) + stack.frame_shape))
+
+        for key, arrays in self._extra.items():
+            path = os.path.join(self.output_dir, f"{key}.extra.npz")
+            np.savez(path, **arrays)
+            outputs.append((path, (len(arrays),)))
+
+        return outputs
+
+
+class Hdf5Writer:
+    """
+    Write all images into one HDF5 file, one dataset per key.
+
+    Each dataset is chunked per frame (chunks=(1, ...)) and compressed,
+    and grows along the first axis as images arrive (doubling, trimmed on
+    close). Event numbers go to <key>_events; a validity mask passed with
+    the first image of a key is stored once as <key>_mask, and images
+    whose shape differs from the first one of their key are stored under
+    the <key>_extra group.
+    """
+
+    def __init__(self, output_dir: str, capacity: int = 1000,
+                 filename: str = "extracted.h5", compression: str = "lzf"):
+        try:
+            import h5py
+        except ImportError as e:
+            raise ImportError("HDF5 output requires h5py "
+                              "(pip install xtc1reader[hdf5])") from e
+
+        self.path = os.path.join(output_dir, filename)
+        self.capacity = max(1, capacity)
+        self.compression = compression
+        self._file = h5py.File(self.path, 'w')
+        self._counts: Dict[str, int] = {}
+        self._events: Dict[str, List[int]] = {}
+
+    def write(self, event: int, key: str, array: np.ndarray,
+              mask: Optional[np.ndarray] = None) -> str:
+        """Append one image to the dataset for key and return the file path"""
+        if key not in self._counts:
+            self._file.create_dataset(
+                key, shape=(self.capacity,) + array.shape,
+                maxshape=(None,) + array.shape, chunks=(1,) + array.shape,
+                dtype=array.dtype, compression=self.compression)
+            self._counts[key] = 0
+            self._events[key] = []
+            if mask is not None:
+                self._file.create_dataset(f"{key}_mask", data=mask)
+
+        dataset = self._file[key]
+        if array.shape != dataset.shape[1:]:
+            self._file.require_group(f"{key}_extra").create_dataset(
+                f"event_{event:04d}", data=array, compression=self.compression)
+            return self.path
+
+        count = self._counts[key]
+        if count == dataset.shape[0]:
+            dataset.resize(2 * count, axis=0)
+        dataset[count] = array
+        self._counts[key] = count + 1
+        self._events[key].append(event)
+        return self.path
+
+    def close(self) -> List[Tuple[str, Tuple[int, ...]]]:
+        """Trim datasets and close the file; returns (path:key, shape) per dataset"""
+        outputs = []
+        for key, count in self._counts.items():
+            dataset = self._file[key]
+            dataset.resize(count, axis=0)
+            self._file.create_dataset(f"{key}_events",
+                                      data=np.asarray(self._events[key], dtype=np.int64))
+            outputs.append((f"{self.path}:{key}", dataset.shape))
+            if f"{key}_extra" in self._file:
+                outputs.append((f"{self.path}:{key}_extra",
+                                (len(self._file[f"{key}_extra"]),)))
+        self._file.close()
+        return outputs
+
+
+def create_output_writer(output_format: str, output_dir: str,
+                         capacity: int = 1000, io_threads: int = 2):
+    """
+    Create the image writer for an --output-format choice.
+
+    Args:
+        output_format: "npy" (one file per image), "stacked" or "hdf5"
+        output_dir: Directory to write into
+        capacity: Expected number of events (preallocation hint)
+        io_threads: Background save threads for "npy" (0 = save inline)
+    """
+    if output_format == "npy":
+        return NpyEventWriter(output_dir, io_threads)
+    elif output_format == "stacked":
+        return StackedNpyWriter(output_dir, capacity)
+    elif output_format == "hdf5":
+        return Hdf5Writer(output_dir, capacity)
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
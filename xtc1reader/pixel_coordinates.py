@@ -33,10 +33,13 @@ def generate_epix10ka_panel_coordinates(panel_geometry: PanelGeometry) -> Coordi
     # Generate coordinate arrays using psana's algorithm
     x_coords, y_coords = _generate_epix10ka_xy_arrays(rows, cols, pixel_size, wide_pixel_size)
     
-    # Z coordinates are all zero in panel frame (flat detector)
-    z_coords = np.zeros_like(x_coords)
+    # Store x, y, z in one (3, rows, cols) buffer; Z is all zero in the
+    # panel frame (flat detector)
+    xyz = np.zeros((3,) + x_coords.shape, dtype=x_coords.dtype)
+    xyz[0] = x_coords
+    xyz[1] = y_coords
     
-    return CoordinateArrays(x_coords, y_coords, z_coords)
+    return CoordinateArrays.from_xyz(xyz)
 
 
 def _generate_epix10ka_xy_arrays(rows: int, cols: int, pixel_size: float, 
@@ -5,7 +5,10 @@ Provides the main XTCReader class for reading LCLS1 XTC files.
 """
 
 import os
-from typing import Iterator, List, Optional, BinaryIO
+import mmap
+from collections import Counter
+from contextlib import nullcontext
+from typing import Collection, Iterator, List, Optional, BinaryIO
 from .binary_format import (
     Datagram, XTCContainer, parse_datagram_header, 
     complete_datagram_with_xtc, parse_xtc_header, TypeId
@@ -21,17 +24,26 @@ class XTCReader:
         for dgram, payload in reader:
             print(f"Event at {dgram.seq.clock.as_double():.6f} seconds")
             # Process dgram and payload...
+    
+    With use_mmap=True the file is memory-mapped and each payload is a
+    read-only memoryview into the mapping instead of a bytes copy; views
+    (and arrays built on them with np.frombuffer) must not be used after
+    the reader is closed.
     """
     
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, use_mmap: bool = False):
         """
         Initialize XTC reader for given file.
         
         Args:
             filename: Path to XTC file to read
+            use_mmap: Yield zero-copy memoryview payloads from a memory map
         """
         self.filename = filename
+        self.use_mmap = use_mmap
         self._fd: Optional[BinaryIO] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
         self._file_size = os.path.getsize(filename)
         self._bytes_read = 0
         
@@ -51,17 +63,44 @@ class XTCReader:
         self._fd = open(self.filename, 'rb')
         self._bytes_read = 0
         
+        if self.use_mmap and self._file_size > 0:
+            self._mm = mmap.mmap(self._fd.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                self._mm.madvise(mmap.MADV_SEQUENTIAL)
+            self._view = memoryview(self._mm)
+        elif hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(self._fd.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        
     def close(self):
         """Close the XTC file"""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # caller still holds payload views; unmapped when they are freed
+            self._mm = None
         if self._fd is not None:
             self._fd.close()
             self._fd = None
+    
+    def rewind(self):
+        """Restart iteration from the first datagram, reusing the open file"""
+        if self._fd is None:
+            self.open()
+            return
+        self._fd.seek(0)
+        self._bytes_read = 0
             
     def __iter__(self) -> Iterator[tuple[Datagram, bytes]]:
         """Iterate over datagrams in the file"""
         if self._fd is None:
             self.open()
-            
+        
+        if self.use_mmap:
+            return self._map_datagrams()
         return self._read_datagrams()
     
     def _read_datagrams(self) -> Iterator[tuple[Datagram, bytes]]:
@@ -107,6 +146,83 @@ class XTCReader:
                 print(f"Error reading datagram at byte {self._bytes_read}: {e}")
                 break
     
+    def _map_datagrams(self) -> Iterator[tuple[Datagram, memoryview]]:
+        """Generator that yields (datagram, payload view) tuples from the mapping"""
+        view = self._view
+        size = self._file_size
+        
+        while view is not None and self._bytes_read + 40 <= size:
+            pos = self._bytes_read
+            
+            # 24-byte datagram header + remaining 16 bytes of XTC header
+            partial_dgram = parse_datagram_header(view, pos)
+            dgram = complete_datagram_with_xtc(partial_dgram, view, pos + 24)
+            
+            end = pos + 40 + max(dgram.xtc.payload_size, 0)
+            if end > size:
+                print(f"Error reading datagram at byte {pos}: "
+                      f"Incomplete payload: {size - pos - 40} < {dgram.xtc.payload_size}")
+                break
+            
+            # Same layout as the read() path: XTC header remainder + payload
+            self._bytes_read = end
+            yield dgram, view[pos + 24:end]
+    
+    def _read_at(self, offset: int, size: int) -> bytes:
+        """size bytes at a file offset, without moving the iteration position"""
+        if self._view is not None:
+            return self._view[offset:offset + size]
+        if hasattr(os, 'pread'):
+            return os.pread(self._fd.fileno(), size, offset)
+        pos = self._fd.tell()
+        try:
+            self._fd.seek(offset)
+            return self._fd.read(size)
+        finally:
+            self._fd.seek(pos)
+    
+    def datagram_offsets(self, max_count: Optional[int] = None) -> List[int]:
+        """
+        File offsets of the datagrams, from one pass over their 40-byte
+        headers (payloads are not read). Used with read_datagram to hand
+        out events by position, e.g. to worker processes.
+        
+        Args:
+            max_count: Stop after this many datagrams (None for all)
+        """
+        if self._fd is None:
+            self.open()
+        
+        offsets = []
+        pos = 0
+        size = self._file_size
+        while pos + 40 <= size and (max_count is None or len(offsets) < max_count):
+            header = self._read_at(pos, 40)
+            dgram = complete_datagram_with_xtc(parse_datagram_header(header), header, 24)
+            end = pos + 40 + max(dgram.xtc.payload_size, 0)
+            if end > size:
+                break  # truncated last datagram, as in iteration
+            offsets.append(pos)
+            pos = end
+        return offsets
+    
+    def read_datagram(self, offset: int) -> tuple[Datagram, bytes]:
+        """
+        (datagram, payload) of the datagram starting at a file offset
+        returned by datagram_offsets, in the same form iteration yields.
+        """
+        if self._fd is None:
+            self.open()
+        
+        header = self._read_at(offset, 40)
+        if len(header) < 40:
+            raise ValueError(f"No datagram header at byte {offset}")
+        dgram = complete_datagram_with_xtc(parse_datagram_header(header), header, 24)
+        payload = self._read_at(offset + 24, 16 + max(dgram.xtc.payload_size, 0))
+        if len(payload) < 16 + dgram.xtc.payload_size:
+            raise ValueError(f"Incomplete payload: {len(payload) - 16} < {dgram.xtc.payload_size}")
+        return dgram, payload
+    
     @property
     def progress(self) -> float:
         """Reading progress as fraction 0.0 to 1.0"""
@@ -115,6 +231,72 @@ class XTCReader:
         return min(1.0, self._bytes_read / self._file_size)
 
 
+def open_reader(filename: str, reader: Optional[XTCReader] = None,
+                use_mmap: bool = False):
+    """
+    Context manager over an XTCReader for filename.
+    
+    Opens (and on exit closes) a new reader, or, if an open reader is
+    passed in, rewinds it to the first datagram and leaves it open so
+    several passes can share one file handle.
+    """
+    if reader is None:
+        return XTCReader(filename, use_mmap=use_mmap)
+    reader.rewind()
+    return nullcontext(reader)
+
+
+def prefetch_file(filename: str, length: int = 64 << 20):
+    """
+    Ask the kernel to start reading the first length bytes of filename
+    into the page cache in the background (no-op where posix_fadvise
+    is unavailable or the file cannot be opened).
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(filename, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def iter_datagrams(filenames: List[str], use_mmap: bool = False,
+                   prefetch_bytes: int = 64 << 20) -> Iterator[tuple[Datagram, bytes]]:
+    """
+    Iterate over the datagrams of several XTC files (e.g. the chunks of
+    one run) in order.
+    
+    When a file is opened, the start of the next one is prefetched (see
+    prefetch_file) so its first blocks stream into the page cache while
+    the current file is being processed.
+    """
+    for k, filename in enumerate(filenames):
+        with XTCReader(filename, use_mmap=use_mmap) as reader:
+            if prefetch_bytes and k + 1 < len(filenames):
+                prefetch_file(filenames[k + 1], prefetch_bytes)
+            yield from reader
+
+
+def parse_from_mmap(filename: str) -> Iterator[tuple[Datagram, memoryview]]:
+    """
+    Iterate over datagrams of a memory-mapped XTC file without copying.
+    
+    Yields the same (datagram, payload) pairs as XTCReader, except that
+    each payload is a read-only memoryview into the mapping rather than
+    a bytes copy. Payload views can be handed directly to XTCIterator,
+    walk_xtc_tree or np.frombuffer.
+    
+    Args:
+        filename: Path to XTC file
+    """
+    with XTCReader(filename, use_mmap=True) as reader:
+        yield from reader
+
+
 class XTCIterator:
     """
     Recursive iterator for XTC containers within a payload.
@@ -164,54 +346,123 @@ class XTCIterator:
                 break
 
 
-def walk_xtc_tree(payload: bytes, level: int = 0, max_level: int = 10) -> List[tuple[int, XTCContainer, bytes]]:
+_ID_XTC = int(TypeId.Id_Xtc)
+
+
+def _walk_xtc_ranges(payload: bytes, level: int = 0, max_level: int = 10,
+                     type_filter: Optional[Collection[int]] = None
+                     ) -> Iterator[tuple[int, XTCContainer, int, int]]:
+    """
+    Depth-first walk of an XTC tree with an explicit stack instead of
+    recursion, yielding (level, container, data_start, data_end) so that
+    callers decide whether to slice out the container data.
+
+    With a type_filter only containers whose type ID is in it are yielded;
+    Id_Xtc containers are still descended into, and an empty filter
+    returns without parsing anything.
+    """
+    if type_filter is not None and not type_filter:
+        return
+
+    # Each entry is (offset, end, level) of a sibling run still to be walked
+    stack = [(0, len(payload), level)] if level <= max_level else []
+
+    while stack:
+        offset, end, level = stack.pop()
+
+        while offset + 20 <= end:
+            xtc = parse_xtc_header(payload, offset)
+            data_start = offset + 20
+            data_end = offset + xtc.extent
+
+            # A corrupt or zero extent would never advance the walk
+            if xtc.extent < 20:
+                print(f"Warning: XTC extent {xtc.extent} smaller than header at offset {offset}")
+                break
+            if data_end > end:
+                print(f"Warning: XTC extent {xtc.extent} exceeds payload at offset {offset}")
+                break
+
+            type_id = xtc.type_id
+            if type_filter is None or type_id in type_filter:
+                yield level, xtc, data_start, data_end
+
+            offset = data_end
+
+            # Descend into containers, resuming with the siblings afterwards
+            if type_id == _ID_XTC and level < max_level:
+                stack.append((offset, end, level))
+                offset, end, level = data_start, data_end, level + 1
+
+
+def walk_xtc_tree(payload: bytes, level: int = 0, max_level: int = 10,
+                  type_filter: Optional[Collection[int]] = None) -> List[tuple[int, XTCContainer, bytes]]:
     """
-    Recursively walk XTC tree structure and return all containers.
+    Walk XTC tree structure and return all containers.
     
     Args:
         payload: XTC payload bytes
-        level: Current recursion level (for indentation)
-        max_level: Maximum recursion depth to prevent infinite loops
+        level: Level of the top-level containers (for indentation)
+        max_level: Maximum nesting depth to prevent infinite loops
+        type_filter: Type IDs to return (None returns all containers)
         
     Returns:
-        List of (level, container, data) tuples
+        List of (level, container, data) tuples, depth-first
     """
-    results = []
-    
-    if level > max_level:
-        return results
-    
-    iterator = XTCIterator(payload)
-    
-    for xtc, data in iterator:
-        results.append((level, xtc, data))
-        
-        # If this is a container type, recurse into it
-        if xtc.contains.type_id == TypeId.Id_Xtc:
-            child_results = walk_xtc_tree(data, level + 1, max_level)
-            results.extend(child_results)
-    
-    return results
+    return [(level, xtc, payload[start:end])
+            for level, xtc, start, end in _walk_xtc_ranges(payload, level, max_level, type_filter)]
+
+
+def walk_xtc_tree_iter(payload: bytes, max_level: int = 10,
+                       type_filter: Optional[Collection[int]] = None
+                       ) -> Iterator[tuple[XTCContainer, bytes]]:
+    """
+    Walk XTC tree structure lazily, yielding matching containers.
+
+    Same depth-first order as walk_xtc_tree, but only containers whose
+    type ID is in `type_filter` have their data sliced out and yielded.
+
+    Args:
+        payload: XTC payload bytes
+        max_level: Maximum nesting depth to descend into
+        type_filter: Type IDs to yield (None yields all containers);
+            Id_Xtc containers are descended into either way
+
+    Yields:
+        (container, data) tuples
+    """
+    for level, xtc, start, end in _walk_xtc_ranges(payload, 0, max_level, type_filter):
+        yield xtc, payload[start:end]
+
+
+# Type ID -> TypeId member name, built once at import
+_TYPE_LABELS = {t.value: t.name for t in TypeId}
+
 
+def _type_label(type_id: int) -> str:
+    """TypeId name for a type ID, or Type_<n> for unknown IDs"""
+    label = _TYPE_LABELS.get(type_id)
+    return label if label is not None else f"Type_{type_id}"
 
-def print_xtc_tree(payload: bytes, max_level: int = 5):
+
+def print_xtc_tree(payload: bytes, max_level: int = 5, file=None):
     """
     Print a human-readable tree view of XTC structure.
     
     Args:
         payload: XTC payload bytes
         max_level: Maximum recursion depth
+        file: Text stream to print to (default: sys.stdout)
     """
-    tree = walk_xtc_tree(payload, max_level=max_level)
-    
-    for level, xtc, data in tree:
+    # Only headers are printed, so container data is never sliced out
+    for level, xtc, _, _ in _walk_xtc_ranges(payload, 0, max_level):
         indent = "  " * level
-        type_name = xtc.contains.type_id.name if hasattr(xtc.contains.type_id, 'name') else f"Type_{xtc.contains.type_id}"
+        type_name = _type_label(xtc.type_id)
         
         print(f"{indent}{type_name} v{xtc.contains.version} "
               f"[{xtc.extent} bytes] "
               f"src=0x{xtc.src.log:08x}:0x{xtc.src.phy:08x} "
-              f"damage=0x{xtc.damage.value:08x}")
+              f"damage=0x{xtc.damage.value:08x}", file=file)
 
 
 # Convenience functions
@@ -238,13 +489,16 @@ def read_xtc_file(filename: str, max_events: Optional[int] = None) -> List[tuple
     return events
 
 
-def get_xtc_info(filename: str, max_events: int = 10) -> dict:
+def get_xtc_info(filename: str, max_events: int = 10,
+                 reader: Optional[XTCReader] = None) -> dict:
     """
     Get summary information about an XTC file.
     
     Args:
         filename: Path to XTC file
         max_events: Number of events to analyze
+        reader: Already open XTCReader for filename to reuse (rewound
+            and left open); a new reader is opened if None
         
     Returns:
         Dictionary with file statistics
@@ -258,7 +512,12 @@ def get_xtc_info(filename: str, max_events: int = 10) -> dict:
         'transition_counts': {}
     }
     
-    with XTCReader(filename) as reader:
+    # Count by raw integer damage flags and type IDs while reading; the
+    # string keys are formatted once per distinct value afterwards
+    damage_counts = Counter()
+    type_counts = Counter()
+    
+    with open_reader(filename, reader) as reader:
         for i, (dgram, payload) in enumerate(reader):
             if i >= max_events:
                 break
@@ -266,16 +525,17 @@ def get_xtc_info(filename: str, max_events: int = 10) -> dict:
             info['events_analyzed'] += 1
             
             # Count damage flags
-            if dgram.xtc.damage.flags:
-                damage_key = f"0x{dgram.xtc.damage.flags:06x}"
-                info['damage_counts'][damage_key] = info['damage_counts'].get(damage_key, 0) + 1
+            damage_flags = dgram.xtc.damage.flags
+            if damage_flags:
+                damage_counts[damage_flags] += 1
             
             # Analyze XTC tree for type counts
             # Skip first 16 bytes of payload (XTC header remainder) for tree walking
-            actual_payload = payload[16:] if len(payload) > 16 else b''
-            tree = walk_xtc_tree(actual_payload, max_level=3)
-            for level, xtc, data in tree:
-                type_name = getattr(xtc.contains.type_id, 'name', f"Type_{xtc.contains.type_id}")
-                info['type_counts'][type_name] = info['type_counts'].get(type_name, 0) + 1
+            actual_payload = memoryview(payload)[16:]
+            for xtc, data in walk_xtc_tree_iter(actual_payload, max_level=3):
+                type_counts[xtc.type_id] += 1
+    
+    info['damage_counts'] = {f"0x{flags:06x}": count for flags, count in damage_counts.items()}
+    info['type_counts'] = {_type_label(type_id): count for type_id, count in type_counts.items()}
     
     return info
\ No newline at end of file